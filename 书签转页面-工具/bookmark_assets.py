@@ -0,0 +1,44 @@
+"""拆分资源模式：把各页面共用的CSS/JS写成按内容哈希命名的共享文件"""
+import hashlib
+import os
+
+
+class AssetStore:
+    """输出根目录下的共享资源 bookmarks.<hash>.<ext>，内容相同的资源只写一次"""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._saved = set()
+        self.paths = []  # 本次写出或引用过的资源文件
+        os.makedirs(self.root, exist_ok=True)
+
+    def save(self, content, ext):
+        """写出资源（同名文件已存在则跳过），返回文件名；content 可以是文本或字节（如图标图片）"""
+        data = content if isinstance(content, bytes) else content.encode('utf-8')
+        name = f"bookmarks.{hashlib.sha256(data).hexdigest()[:12]}.{ext}"
+        if name not in self._saved:
+            path = os.path.join(self.root, name)
+            if not os.path.exists(path):
+                # 多个进程可能同时写同一个资源，先写临时文件再原子替换
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            self._saved.add(name)
+            self.paths.append(path)
+        return name
+
+    def linker(self, page_path, transform=None):
+        """返回供渲染函数使用的 asset_link(content, ext)，地址相对于页面所在目录
+
+        transform(content, ext) 用于在写出前处理资源内容（如压缩空白）。
+        """
+        page_dir = os.path.dirname(os.path.abspath(page_path))
+
+        def asset_link(content, ext):
+            if transform is not None and isinstance(content, str):
+                content = transform(content, ext)
+            path = os.path.join(self.root, self.save(content, ext))
+            return os.path.relpath(path, page_dir).replace(os.sep, '/')
+
+        return asset_link
@@ -0,0 +1,453 @@
+"""批量转换书签HTML：一次解析同时生成 .md、_top.html、_tree.html，多进程并行处理"""
+import argparse
+import functools
+import glob
+import os
+import sys
+import time
+
+from bookmark_assets import AssetStore
+from bookmark_cache import parse_bookmark_file_cached
+from bookmark_compress import SIDECAR_SUFFIXES, MinifyWriter, minify_text, remove_sidecars, write_sidecars
+from bookmark_import import BOOKMARK_FILE_PATTERNS, has_bookmark_file_name, is_json_bookmark_file
+from bookmark_manifest import Manifest, file_sha256
+from bookmark_md import write_markdown
+from bookmark_parser import Folder
+from bookmark_shard import remove_stale_pages
+from bookmark_stats import NULL_STATS, Stats, collect, current, format_stats, load_hook
+from bookmark_stats import emit as emit_stats, merge as merge_stats
+from bookmark_top import iter_top_pages, write_top_html
+from bookmark_tree import iter_tree_pages, write_tree_html
+
+# 输出文件后缀、对应的流式写出函数，以及需要传给它的选项名
+# asset_link 不是普通选项：开启拆分资源模式时为每个页面生成一个共享资源写出函数
+# dead_links 也不是普通选项：标记模式下传入从链接检查缓存读取的失效网址集合
+OUTPUTS = [
+    ('.md', write_markdown, ('dead_links',)),
+    ('_top.html', write_top_html, ('asset_link', 'icons', 'dead_links')),
+    ('_tree.html', write_tree_html, ('lazy', 'search_index', 'asset_link', 'icons', 'dead_links', 'offline')),
+]
+
+# 支持分页输出的格式及其分页函数（见 bookmark_shard），参数与写出函数相同，asset_link 换成 asset_linker
+PAGED_OUTPUTS = {
+    '_top.html': iter_top_pages,
+    '_tree.html': iter_tree_pages,
+}
+
+NETSCAPE_DOCTYPE = '<!DOCTYPE NETSCAPE-Bookmark-file-1>'
+
+# 输出文件名中紧跟原文件名的标记：分页、搜索索引、离线清单等附属文件都以此开头
+_OUTPUT_MARKERS = tuple(suffix.split('.')[0] + '.' for suffix, _, _ in OUTPUTS if not suffix.startswith('.'))
+
+
+def is_bookmark_file(path):
+    """判断是否为浏览器导出的书签HTML或 JSON 书签（排除本工具生成的输出文件）"""
+    if not path.lower().endswith('.html'):
+        return is_json_bookmark_file(path)
+    if any(path.endswith(suffix) for suffix, _, _ in OUTPUTS):
+        return False
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        head = f.read(1024)
+    return NETSCAPE_DOCTYPE.lower() in head.lower()
+
+
+def may_be_bookmark_file(path):
+    """按文件名判断变化的文件是否可能是新的书签文件（不读取内容）：排除本工具写出的输出、附属文件与隐藏的清单、缓存"""
+    name = os.path.basename(path)
+    if name.startswith('.') or not has_bookmark_file_name(name):
+        return False
+    return not any(marker in name for marker in _OUTPUT_MARKERS)
+
+
+def find_bookmark_files(paths):
+    """展开目录与通配符，返回去重后的书签HTML文件列表"""
+    found = {}
+    for pattern in paths:
+        matches = glob.glob(pattern, recursive=True) or [pattern]
+        for path in matches:
+            if os.path.isdir(path):
+                candidates = [candidate for pattern in BOOKMARK_FILE_PATTERNS
+                              for candidate in glob.glob(os.path.join(path, '**', pattern), recursive=True)]
+            else:
+                candidates = [path]
+            for candidate in candidates:
+                if os.path.isfile(candidate) and is_bookmark_file(candidate):
+                    found.setdefault(os.path.abspath(candidate), candidate)
+    return sorted(found.values())
+
+
+def output_paths(input_file):
+    """按命名约定返回输出文件路径：<原文件名>.md / _top.html / _tree.html"""
+    output_dir = os.path.dirname(input_file)
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    return [os.path.join(output_dir, f"{base_name}{suffix}") for suffix, _, _ in OUTPUTS]
+
+
+def build_options(args, input_files):
+    """影响输出内容的选项，记录到增量构建清单中"""
+    asset_root = None
+    if args.split_assets:
+        asset_root = os.path.abspath(args.asset_root or os.path.commonpath(
+            [os.path.dirname(os.path.abspath(path)) for path in input_files]))
+    return {'outputs': [suffix for suffix, _, _ in OUTPUTS], 'lazy': args.lazy_tree,
+            'search_index': not args.no_search_index, 'asset_root': asset_root,
+            'minify': args.minify, 'compress': args.compress, 'icons': args.icons,
+            'dead_links': args.dead_links, 'dead_links_digest': None, 'page_kb': args.pages,
+            'offline': args.offline}
+
+
+def load_dead_links(args, input_files, options):
+    """读取链接检查缓存中的失效网址，并把其摘要记入选项，使失效集合变化时重新生成输出"""
+    import hashlib
+
+    from bookmark_linkcheck import LinkCache, default_cache_path
+
+    path = args.link_cache or default_cache_path(input_files)
+    if not os.path.exists(path):
+        print(f"错误：未找到链接检查结果 {path}，请先运行 bookmark_linkcheck.py。")
+        sys.exit(1)
+    dead_links = LinkCache(path).dead_links()
+    options['dead_links_digest'] = hashlib.sha256('\n'.join(sorted(dead_links)).encode('utf-8')).hexdigest()
+    return dead_links
+
+
+def convert_file(input_file, options, dead_links=None, stats=None):
+    """解析一次并写出全部输出，返回包含耗时与输出文件的结果字典
+
+    dead_links 为失效网址集合，按 options['dead_links'] 标记（mark）或删除（drop）。
+    stats 不为 None 时收集分阶段统计（见 bookmark_stats），其内容作为 Stats 的参数，结果记入 result['stats']。
+    """
+    collector = Stats(**stats) if stats is not None else NULL_STATS
+    with collect(collector):
+        result = _convert_file(input_file, options, dead_links, collector)
+    if stats is not None:
+        result['stats'] = collector.as_dict()
+    return result
+
+
+def _convert_file(input_file, options, dead_links, stats):
+    # outputs 为写出的页面（含分页与分页搜索索引），files 另含预压缩文件、共享资源与离线文件，记入增量构建清单
+    result = {'input': input_file, 'parse_time': 0.0, 'render_time': 0.0, 'outputs': [], 'files': [],
+              'sizes': {}, 'dropped': 0, 'sha256': None, 'error': None}
+    try:
+        with stats.stage('hash'):
+            result['sha256'] = file_sha256(input_file)
+        start = time.perf_counter()
+        with stats.stage('parse'):
+            document = parse_bookmark_file_cached(input_file, result['sha256'])
+        result['parse_time'] = time.perf_counter() - start
+        if stats.enabled:
+            for node in document.walk():
+                stats.count('folders' if isinstance(node, Folder) else 'links')
+        if dead_links and options['dead_links'] == 'drop':
+            from bookmark_linkcheck import remove_dead_links
+
+            with stats.stage('drop_dead_links'):
+                result['dropped'] = remove_dead_links(document, dead_links)
+            stats.count('dead_links_dropped', result['dropped'])
+
+        start = time.perf_counter()
+        assets = AssetStore(options['asset_root']) if options['asset_root'] else None
+        with stats.stage('render'):
+            for (suffix, write, option_names), output_file in zip(OUTPUTS, output_paths(input_file)):
+                with stats.stage(suffix):
+                    _render_output(document, suffix, write, option_names, output_file, options, dead_links,
+                                   assets, result)
+        result['render_time'] = time.perf_counter() - start
+
+        with stats.stage('compress'):
+            for output_file in result['outputs']:
+                if options['compress']:
+                    sizes = write_sidecars(output_file)
+                    result['sizes'][output_file].update(sizes)
+                    result['files'].extend(f"{output_file}.{key}" for key in ('gz', 'br') if key in sizes)
+                else:
+                    remove_sidecars(output_file)
+            if assets:
+                result['files'].extend(assets.paths)
+            if options['compress'] and assets:
+                # 资源文件名含内容哈希，已有预压缩文件时无需重写；图标等图片本身已压缩，跳过
+                for path in assets.paths:
+                    if path.endswith(('.css', '.js')):
+                        if not os.path.exists(path + '.gz'):
+                            write_sidecars(path)
+                        result['files'].extend(path + suffix for suffix in SIDECAR_SUFFIXES
+                                               if os.path.exists(path + suffix))
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def _render_output(document, suffix, write, option_names, output_file, options, dead_links, assets, result):
+    """生成一种输出（开启分页时为索引页与各分页），写出的文件与体积记入 result"""
+    minify = options['minify'] and suffix.endswith('.html')
+    kwargs = {name: options[name] for name in option_names if name not in ('asset_link', 'dead_links')}
+    if 'dead_links' in option_names and dead_links and options['dead_links'] == 'mark':
+        kwargs['dead_links'] = dead_links
+    paged = options['page_kb'] is not None and suffix in PAGED_OUTPUTS
+    if paged:
+        linker = None
+        if 'asset_link' in option_names and assets:
+            linker = functools.partial(assets.linker, transform=minify_text if minify else None)
+        pages = PAGED_OUTPUTS[suffix](document, output_file, options['page_kb'], asset_linker=linker, **kwargs)
+        written = []
+        for path, chunks in pages:
+            _write_output(path, lambda f: f.writelines(chunks), minify, result)
+            written.append(path)
+        remove_stale_pages(output_file, keep=written)
+    else:
+        if 'asset_link' in option_names and assets:
+            kwargs['asset_link'] = assets.linker(output_file, minify_text if minify else None)
+        _write_output(output_file, lambda f: write(document, f, **kwargs), minify, result)
+        if suffix in PAGED_OUTPUTS:
+            remove_stale_pages(output_file)
+    if 'offline' in option_names:
+        # 离线清单按写出的文件（含分页与共享资源）计算哈希，需在页面全部写出之后生成
+        from bookmark_offline import offline_paths, remove_offline_files, write_offline_files
+
+        if options['offline']:
+            write_offline_files(output_file)
+            result['files'].extend(offline_paths(output_file))
+        else:
+            remove_offline_files(output_file)
+
+
+def _write_output(path, emit, minify, result):
+    """打开输出文件并调用 emit(f) 写入内容（需要时经 MinifyWriter 压缩空白），把文件与体积记入结果"""
+    with open(path, 'w', encoding='utf-8') as f:
+        if minify:
+            writer = MinifyWriter(f)
+            emit(writer)
+            writer.finish()
+        else:
+            emit(f)
+    result['outputs'].append(path)
+    result['files'].append(path)
+    size = os.path.getsize(path)
+    result['sizes'][path] = {'before': writer.bytes_in if minify else size, 'after': size}
+    stats = current()
+    stats.count('output_files')
+    stats.count('output_bytes', size)
+
+
+def convert_all(input_files, options, workers=None, dead_links=None, stats=None):
+    """并行转换多个文件，按完成顺序逐个产出结果；workers 为 1 时在当前进程内执行"""
+    if workers == 1 or len(input_files) <= 1:
+        for input_file in input_files:
+            yield convert_file(input_file, options, dead_links, stats)
+        return
+
+    # 只有并行时才需要进程池，单文件转换不为其付出导入开销
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(convert_file, input_file, options, dead_links, stats)
+                   for input_file in input_files]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def write_stats_json(path, record):
+    """把统计写成JSON文件，path 为 - 时输出到终端"""
+    import json
+
+    text = json.dumps(record, ensure_ascii=False, indent=2)
+    if path == '-':
+        print(text)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+def format_size_report(totals):
+    """体积汇总：压缩空白前后，以及预压缩文件大小"""
+    report = f"输出体积：{totals['before'] / 1024:.1f} KB → {totals['after'] / 1024:.1f} KB"
+    if totals['gz']:
+        report += f"，gzip {totals['gz'] / 1024:.1f} KB"
+    if totals['br']:
+        report += f"，brotli {totals['br'] / 1024:.1f} KB"
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量将书签HTML转换为 .md、_top.html、_tree.html")
+    parser.add_argument('paths', nargs='+', help="书签HTML文件、目录或通配符（如 '*-大礼包'）")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="并行进程数（默认使用全部CPU核心）")
+    parser.add_argument('--lazy-tree', action='store_true',
+                        help="_tree.html 内容区改为嵌入JSON并按可视范围懒加载渲染，适合超大书签文件")
+    parser.add_argument('--no-search-index', action='store_true',
+                        help="_tree.html 不嵌入全文搜索索引，仅按分类标题过滤导航")
+    parser.add_argument('--split-assets', action='store_true',
+                        help="CSS/JS 不再内联，写成按内容哈希命名的共享文件 bookmarks.<hash>.css/.js 供各页面引用")
+    parser.add_argument('--asset-root', default=None,
+                        help="共享资源的输出目录（默认为所有输入文件所在目录的公共上级目录）")
+    parser.add_argument('--pages', type=int, default=None, metavar='KB',
+                        help="_top.html/_tree.html 分页输出：原文件作为索引页，分类按顶层拆到 <名称>.1.html 等分页，"
+                             "每页约 KB 千字节（0 为每个顶层分类一页）")
+    parser.add_argument('--icons', action='store_true',
+                        help="在链接前显示书签自带的网站图标（ICON 属性），相同图标只保留一份，以CSS类引用")
+    parser.add_argument('--dead-links', choices=('mark', 'drop'), default=None,
+                        help="按 bookmark_linkcheck.py 的检查结果处理失效链接：mark 加删除线标记，drop 直接删除")
+    parser.add_argument('--link-cache', default=None,
+                        help="链接检查结果文件（默认为输入文件公共上级目录下的 .bookmark-linkcheck.json）")
+    parser.add_argument('--minify', action='store_true',
+                        help="压缩 _top.html/_tree.html 及共享资源中的缩进、空行与整行注释")
+    parser.add_argument('--offline', action='store_true',
+                        help="为 _tree.html 生成 service worker 与离线清单 <名称>_tree.sw.js/.offline.json，"
+                             "重复打开时从浏览器缓存加载，内容更新后在后台下载（需通过 http(s) 访问）")
+    parser.add_argument('--compress', action='store_true',
+                        help="在每个输出文件旁生成预压缩的 .gz（安装 brotli 时另生成 .br），供静态服务器直接发送")
+    parser.add_argument('--sqlite', default=None, metavar='DB',
+                        help="另把全部书签写入 SQLite 数据库并建立全文索引（见 bookmark_sqlite.py search）")
+    parser.add_argument('--stats', action='store_true',
+                        help="输出各阶段（解析、分类去重、各格式渲染、压缩）耗时与文件夹、链接、重复、输出字节等计数")
+    parser.add_argument('--stats-json', default=None, metavar='FILE',
+                        help="把每个文件及汇总的统计写成JSON（- 为标准输出）")
+    parser.add_argument('--stats-memory', action='store_true',
+                        help="统计时用 tracemalloc 记录各阶段内存峰值（会明显变慢）")
+    parser.add_argument('--stats-hook', default=None, metavar='MODULE:FUNC',
+                        help="每个文件转换完成后以 (输入文件, 统计) 调用该函数，供任务调度器收集")
+    parser.add_argument('-f', '--force', action='store_true',
+                        help="忽略增量构建清单，重新生成全部输出")
+    parser.add_argument('-w', '--watch', action='store_true',
+                        help="转换完成后继续监视，书签文件保存后立即重新生成该文件的输出")
+    parser.add_argument('--poll', action='store_true',
+                        help="监视时使用定时轮询代替 inotify（网络文件系统、非 Linux 平台自动使用轮询）")
+    parser.add_argument('--debounce', type=float, default=0.2,
+                        help="监视时等待连续写入结束的时间（秒，默认 0.2）")
+    args = parser.parse_args(argv)
+
+    input_files = find_bookmark_files(args.paths)
+    if not input_files:
+        print("错误：未找到书签HTML文件。")
+        sys.exit(1)
+
+    total_start = time.perf_counter()
+    stats = None
+    if args.stats or args.stats_json or args.stats_memory or args.stats_hook:
+        stats = {'trace_memory': args.stats_memory}
+        if args.stats_hook:
+            try:
+                load_hook(args.stats_hook)
+            except ValueError as e:
+                print(f"错误：{e}")
+                sys.exit(1)
+    options = build_options(args, input_files)
+    dead_links = load_dead_links(args, input_files, options) if args.dead_links else None
+    manifests = {}
+    pending = []
+    for input_file in input_files:
+        directory = os.path.dirname(os.path.abspath(input_file))
+        manifest = manifests.setdefault(directory, Manifest(directory))
+        if args.force or not manifest.is_fresh(input_file, options):
+            pending.append(input_file)
+    skipped = len(input_files) - len(pending)
+
+    print(f"共找到 {len(input_files)} 个书签文件，需要转换 {len(pending)} 个，跳过未变化的 {skipped} 个")
+    failed = 0
+    totals = {'before': 0, 'after': 0, 'gz': 0, 'br': 0}
+    dropped = 0
+    stats_records = {}
+    stats_total = {}
+    for result in convert_all(pending, options, args.workers, dead_links, stats):
+        if result['error']:
+            failed += 1
+            print(f"转换过程中发生错误：{result['input']}：{result['error']}")
+            continue
+        directory = os.path.dirname(os.path.abspath(result['input']))
+        manifests[directory].record(result['input'], options, result['sha256'], result['files'])
+        print(f"{result['parse_time'] * 1000:8.1f} ms 解析  "
+              f"{result['render_time'] * 1000:8.1f} ms 渲染  {result['input']}")
+        dropped += result['dropped']
+        if stats is not None:
+            stats_records[result['input']] = result['stats']
+            merge_stats(stats_total, result['stats'])
+            emit_stats(result['input'], result['stats'])
+        for sizes in result['sizes'].values():
+            for key in totals:
+                totals[key] += sizes.get(key, 0)
+    for manifest in manifests.values():
+        manifest.save()
+    if options['minify'] or options['compress']:
+        print(format_size_report(totals))
+    if args.sqlite:
+        from bookmark_sqlite import index_files
+
+        written = [count for _, count in index_files(args.sqlite, input_files, args.force) if count is not None]
+        print(f"已写入数据库 {args.sqlite}：更新 {len(written)} 个集合共 {sum(written)} 个链接")
+    if dead_links is not None:
+        print(f"链接检查结果中共有 {len(dead_links)} 个失效网址"
+              + (f"，已从输出中删除 {dropped} 个链接" if options['dead_links'] == 'drop' else "，已在输出中标记"))
+    if args.stats and stats_records:
+        print(f"分阶段统计（{len(stats_records)} 个文件累计，并行时耗时之和可能超过总耗时）：")
+        print(format_stats(stats_total))
+    if args.stats_json:
+        write_stats_json(args.stats_json, {'files': stats_records, 'total': stats_total})
+    total_time = time.perf_counter() - total_start
+    print(f"转换完成！转换 {len(pending) - failed} 个，跳过 {skipped} 个，失败 {failed} 个，"
+          f"总耗时 {total_time:.2f} 秒")
+    if args.watch:
+        watch(args, options, manifests, dead_links, stats)
+    elif failed:
+        sys.exit(1)
+
+
+def watch(args, options, manifests, dead_links=None, stats=None):
+    """监视输入文件所在目录，只重新解析并生成发生变化的书签文件，按 Ctrl+C 结束"""
+    from bookmark_watch import create_watcher, wait_for_changes
+
+    watcher = create_watcher(args.poll)
+    directories = set()
+
+    def add_directories():
+        # 每次变化后重新展开路径，新建的书签文件（及其所在目录）也会被纳入
+        input_files = find_bookmark_files(args.paths)
+        for input_file in input_files:
+            directory = os.path.dirname(os.path.abspath(input_file))
+            if directory not in directories:
+                watcher.add(directory)
+                directories.add(directory)
+        return {os.path.abspath(path): path for path in input_files}
+
+    watched = add_directories()
+    print(f"正在监视 {len(directories)} 个目录（{type(watcher).__name__}），按 Ctrl+C 结束")
+    try:
+        while True:
+            changed = {os.path.abspath(path) for path in wait_for_changes(watcher, args.debounce)}
+            # 只有出现尚未监视、且可能是书签文件的新文件时才重新展开路径；本工具自己写出的文件不会触发
+            if any(may_be_bookmark_file(path) for path in changed - watched.keys()):
+                watched = add_directories()
+            for path in sorted(changed & watched.keys()):
+                input_file = watched[path]
+                directory = os.path.dirname(path)
+                manifest = manifests.setdefault(directory, Manifest(directory))
+                # 只是修改时间变化（如重新保存了相同内容）时清单按哈希判断为未变化，跳过
+                if manifest.is_fresh(input_file, options):
+                    continue
+                start = time.perf_counter()
+                result = convert_file(input_file, options, dead_links, stats)
+                if result['error']:
+                    print(f"{time.strftime('%H:%M:%S')} 转换过程中发生错误：{input_file}：{result['error']}")
+                    continue
+                manifest.record(input_file, options, result['sha256'], result['files'])
+                manifest.save()
+                if args.sqlite:
+                    from bookmark_sqlite import index_files
+
+                    index_files(args.sqlite, [input_file])
+                print(f"{time.strftime('%H:%M:%S')} 已重新生成 {input_file}："
+                      f"解析 {result['parse_time'] * 1000:.1f} ms，渲染 {result['render_time'] * 1000:.1f} ms，"
+                      f"共 {(time.perf_counter() - start) * 1000:.1f} ms")
+                if stats is not None:
+                    emit_stats(input_file, result['stats'])
+                    if args.stats:
+                        print(format_stats(result['stats']))
+    except KeyboardInterrupt:
+        print("已停止监视")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""性能基准：生成合成书签文件，分别测量解析与三种转换器渲染的耗时和内存峰值，结果保存为JSON"""
+import argparse
+import html
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from bookmark_batch import find_bookmark_files
+from bookmark_compress import MinifyWriter
+from bookmark_manifest import CONVERTER_VERSION
+from bookmark_md import write_markdown
+from bookmark_cache import dump_document, load_document
+from bookmark_parser import Folder, parse_bookmarks
+from bookmark_top import write_top_html
+from bookmark_tree import write_tree_html
+
+# 被测转换器：名称 -> 流式写出函数
+CONVERTERS = {
+    'md': write_markdown,
+    'top': write_top_html,
+    'tree': write_tree_html,
+}
+
+# 默认的合成用例：(名称, 链接数, 文件夹深度, 每层子文件夹数, 重复链接比例)
+SYNTHETIC_CASES = [
+    ('small', 1000, 2, 5, 0.05),
+    ('medium', 20000, 3, 8, 0.1),
+    ('large', 100000, 4, 6, 0.2),
+]
+
+# 输出HTML的转换器另测经 MinifyWriter 压缩空白后的耗时与体积
+HTML_CONVERTERS = {'top', 'tree'}
+
+# 压缩空白的耗时超过普通渲染的这一倍数，或输出没有变小时报告为异常
+MINIFY_SLOWDOWN_LIMIT = 2.0
+
+# 启动耗时分析的目标模块（各命令行入口）
+STARTUP_MODULES = ['bookmark_md', 'bookmark_top', 'bookmark_tree', 'bookmark_batch']
+
+_WORDS = ['学习', '工具', '资源', '设计', '在线', '下载', '文档', '导航', '视频', '音乐',
+          'open', 'source', 'github', 'docs', 'api', 'cloud', 'free', 'search', 'design', 'tools']
+
+
+def _phrase(rng, count):
+    return ''.join(rng.choice(_WORDS) for _ in range(count))
+
+
+def generate_bookmarks(num_links, depth=3, fanout=5, duplicate_ratio=0.1, seed=0):
+    """生成 Netscape 书签格式的HTML字符串
+
+    depth 为文件夹嵌套层数，fanout 为每个文件夹下的子文件夹数，
+    duplicate_ratio 为复用已生成链接（相同标题与网址）的比例；相同 seed 生成相同内容。
+    """
+    rng = random.Random(seed)
+    folders = []  # (层级, 标题)，按文档顺序
+
+    def add_folders(level):
+        for _ in range(fanout):
+            folders.append((level, _phrase(rng, 2) + str(len(folders))))
+            if level + 1 < depth:
+                add_folders(level + 1)
+
+    add_folders(0)
+
+    # 将链接随机分配到各文件夹
+    counts = [0] * len(folders)
+    for _ in range(num_links):
+        counts[rng.randrange(len(folders))] += 1
+
+    links = []
+    lines = [
+        '<!DOCTYPE NETSCAPE-Bookmark-file-1>',
+        '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">',
+        '<TITLE>Bookmarks</TITLE>',
+        '<H1>Bookmarks</H1>',
+        '<DL><p>',
+        '    <DT><H3 PERSONAL_TOOLBAR_FOLDER="true">收藏栏</H3>',
+        '    <DL><p>',
+    ]
+    open_levels = []
+    for (level, title), count in zip(folders, counts):
+        while open_levels and open_levels[-1] >= level:
+            open_levels.pop()
+            lines.append('    ' * (len(open_levels) + 2) + '</DL><p>')
+        indent = '    ' * (level + 2)
+        lines.append(f'{indent}<DT><H3>{html.escape(title)}</H3>')
+        lines.append(f'{indent}<DL><p>')
+        open_levels.append(level)
+        for _ in range(count):
+            if links and rng.random() < duplicate_ratio:
+                link_title, href = rng.choice(links)
+            else:
+                link_title = _phrase(rng, rng.randint(2, 6))
+                href = f'https://{rng.choice(_WORDS)}{len(links)}.example.com/{_phrase(rng, 1)}'
+                links.append((link_title, href))
+            lines.append(f'{indent}    <DT><A HREF="{html.escape(href)}">{html.escape(link_title)}</A>')
+    while open_levels:
+        open_levels.pop()
+        lines.append('    ' * (len(open_levels) + 2) + '</DL><p>')
+    lines.append('    </DL><p>')
+    lines.append('</DL><p>')
+    return '\n'.join(lines) + '\n'
+
+
+class _CountingSink:
+    """丢弃写入内容、只统计字节数的文件句柄，避免测量到磁盘I/O"""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, text):
+        self.bytes += len(text.encode('utf-8'))
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+
+
+def _time_median(func, repeat):
+    """重复执行取中位数（毫秒），返回 (毫秒, 最后一次的返回值)"""
+    timings = []
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), value
+
+
+def _peak_kb(func):
+    """在 tracemalloc 下单独执行一次，返回内存峰值（KB）"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_content(name, html_content, repeat=3, converters=None):
+    """对一份书签HTML分别测量解析与各转换器的渲染"""
+    parse_ms, document = _time_median(lambda: parse_bookmarks(html_content), repeat)
+    folders = links = 0
+    for node in document.walk():
+        if isinstance(node, Folder):
+            folders += 1
+        else:
+            links += 1
+    result = {
+        'name': name,
+        'input_bytes': len(html_content.encode('utf-8')),
+        'folders': folders,
+        'links': links,
+        'parse_ms': round(parse_ms, 2),
+        'parse_peak_kb': round(_peak_kb(lambda: parse_bookmarks(html_content)), 1),
+        'render': {},
+    }
+    # 从解析缓存（bookmark_cache）重建同一棵树的耗时，对应再次渲染时实际花费的“解析”时间
+    cached = dump_document(document)
+    result['cache_bytes'] = len(cached)
+    result['cache_load_ms'] = round(_time_median(lambda: load_document(cached), repeat)[0], 2)
+    for converter in converters or CONVERTERS:
+        write = CONVERTERS[converter]
+
+        def render():
+            sink = _CountingSink()
+            write(document, sink)
+            return sink.bytes
+
+        render_ms, output_bytes = _time_median(render, repeat)
+        result['render'][converter] = {
+            'ms': round(render_ms, 2),
+            'peak_kb': round(_peak_kb(render), 1),
+            'output_bytes': output_bytes,
+        }
+        if converter in HTML_CONVERTERS:
+            def render_minified():
+                sink = _CountingSink()
+                writer = MinifyWriter(sink)
+                write(document, writer)
+                writer.finish()
+                return sink.bytes
+
+            minify_ms, minify_bytes = _time_median(render_minified, repeat)
+            result['render'][converter].update(minify_ms=round(minify_ms, 2), minify_bytes=minify_bytes)
+    return result
+
+
+def check_minify(case):
+    """检查压缩空白的代价与收益：耗时超过普通渲染的 MINIFY_SLOWDOWN_LIMIT 倍或输出没有变小时返回说明行"""
+    problems = []
+    for converter, stats in case['render'].items():
+        if 'minify_ms' not in stats:
+            continue
+        # 几毫秒内的渲染计时波动较大，另加 5 ms 余量
+        if stats['minify_ms'] > stats['ms'] * MINIFY_SLOWDOWN_LIMIT + 5:
+            problems.append(f"{case['name']} {converter} 压缩空白耗时 {stats['minify_ms']:.1f} ms，"
+                            f"普通渲染 {stats['ms']:.1f} ms")
+        if stats['minify_bytes'] >= stats['output_bytes']:
+            problems.append(f"{case['name']} {converter} 压缩空白后没有变小（{stats['output_bytes']} 字节）")
+    return problems
+
+
+def find_samples(root):
+    """仓库自带的真实书签导出：<root>/*-大礼包/ 下的书签HTML"""
+    return find_bookmark_files([os.path.join(root, '*-大礼包')])
+
+
+def run_benchmarks(samples=True, synthetic=True, repeat=3, converters=None, root=None):
+    """执行全部用例，返回可序列化为JSON的结果"""
+    cases = []
+    if synthetic:
+        for name, num_links, depth, fanout, duplicate_ratio in SYNTHETIC_CASES:
+            content = generate_bookmarks(num_links, depth, fanout, duplicate_ratio)
+            cases.append(bench_content(f'synthetic-{name}', content, repeat, converters))
+            print(_format_case(cases[-1]), flush=True)
+    if samples:
+        root = root or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for path in find_samples(root):
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            cases.append(bench_content(os.path.basename(path), content, repeat, converters))
+            print(_format_case(cases[-1]), flush=True)
+    return {
+        'converter_version': CONVERTER_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'cases': cases,
+    }
+
+
+def _format_case(case):
+    parts = [f"解析 {case['parse_ms']:8.1f} ms", f"读缓存 {case['cache_load_ms']:7.1f} ms"]
+    for converter, stats in case['render'].items():
+        parts.append(f"{converter} {stats['ms']:8.1f} ms")
+        if 'minify_ms' in stats:
+            saved = 1 - stats['minify_bytes'] / stats['output_bytes'] if stats['output_bytes'] else 0
+            parts.append(f"压缩 {stats['minify_ms']:8.1f} ms -{saved:.1%}")
+    return f"{'  '.join(parts)}  {case['links']:>7} 链接  {case['name']}"
+
+
+def compare_results(baseline, current, threshold=0.1):
+    """对比两次结果，返回耗时变化超过阈值的说明行"""
+    baseline_cases = {case['name']: case for case in baseline['cases']}
+    lines = []
+    for case in current['cases']:
+        old = baseline_cases.get(case['name'])
+        if old is None:
+            continue
+        pairs = [('解析', old['parse_ms'], case['parse_ms'])]
+        if 'cache_load_ms' in old:
+            pairs.append(('读缓存', old['cache_load_ms'], case['cache_load_ms']))
+        for converter, stats in case['render'].items():
+            if converter in old['render']:
+                pairs.append((converter, old['render'][converter]['ms'], stats['ms']))
+                if 'minify_ms' in stats and 'minify_ms' in old['render'][converter]:
+                    pairs.append((f"{converter} 压缩", old['render'][converter]['minify_ms'], stats['minify_ms']))
+        for label, before, after in pairs:
+            if before and abs(after - before) / before > threshold:
+                change = '变慢' if after > before else '变快'
+                lines.append(f"{case['name']} {label}：{before:.1f} ms → {after:.1f} ms（{change} "
+                             f"{abs(after - before) / before:.0%}）")
+    return lines
+
+
+def _python(args):
+    """在工具目录下启动新的解释器执行，返回 (耗时毫秒, 标准错误输出)"""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, *args], cwd=os.path.dirname(os.path.abspath(__file__)),
+                               capture_output=True, text=True, check=True)
+    return (time.perf_counter() - start) * 1000, completed.stderr
+
+
+def _parse_importtime(stderr, module):
+    """解析 -X importtime 输出，返回 (模块的累计导入耗时毫秒, [(依赖名, 自身耗时毫秒), ...])"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if not fields[0].strip().isdigit():
+            continue  # 表头
+        entries.append((fields[2][1:].rstrip(), int(fields[0]), int(fields[1])))
+
+    # 输出按导入完成顺序排列：目标模块之前、上一个顶层导入之后的条目都是它引入的依赖
+    for index in range(len(entries) - 1, -1, -1):
+        if entries[index][0] == module:
+            break
+    else:
+        return 0.0, []
+    start = index
+    while start > 0 and entries[start - 1][0].startswith(' '):
+        start -= 1
+    dependencies = [(name.strip(), self_us / 1000) for name, self_us, _ in entries[start:index + 1]]
+    return entries[index][2] / 1000, dependencies
+
+
+def profile_startup(modules=None, repeat=5, top=5):
+    """逐个测量在新解释器中导入各入口模块的耗时，列出自身耗时最多的依赖"""
+    interpreter_ms = statistics.median(_python(['-c', 'pass'])[0] for _ in range(repeat))
+    report = {'interpreter_ms': round(interpreter_ms, 1), 'modules': {}}
+    for module in modules or STARTUP_MODULES:
+        wall_ms = statistics.median(_python(['-c', f'import {module}'])[0] for _ in range(repeat))
+        import_ms, dependencies = _parse_importtime(
+            _python(['-X', 'importtime', '-c', f'import {module}'])[1], module)
+        dependencies.sort(key=lambda item: item[1], reverse=True)
+        report['modules'][module] = {
+            'wall_ms': round(wall_ms, 1),
+            'import_ms': round(import_ms, 1),
+            'slowest': [[name, round(ms, 2)] for name, ms in dependencies[:top]],
+        }
+    return report
+
+
+def format_startup_report(report):
+    lines = [f"空解释器启动 {report['interpreter_ms']:7.1f} ms"]
+    for module, stats in report['modules'].items():
+        slowest = '、'.join(f"{name} {ms:.1f} ms" for name, ms in stats['slowest'])
+        lines.append(f"{module:<16} 总计 {stats['wall_ms']:7.1f} ms  导入 {stats['import_ms']:6.1f} ms  "
+                     f"最慢：{slowest}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量书签解析与三种转换器的耗时和内存峰值")
+    parser.add_argument('-o', '--output', default=None, help="结果JSON的保存路径")
+    parser.add_argument('--compare', default=None, help="与之前保存的结果JSON对比，列出明显变化")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="对比时视为明显变化的耗时比例（默认 0.1，即 10%%）")
+    parser.add_argument('-n', '--repeat', type=int, default=3, help="每项重复次数，取中位数（默认 3）")
+    parser.add_argument('--converter', action='append', choices=sorted(CONVERTERS),
+                        help="只测指定的转换器，可重复指定（默认全部）")
+    parser.add_argument('--no-samples', action='store_true', help="不测仓库自带的书签导出")
+    parser.add_argument('--no-synthetic', action='store_true', help="不测合成书签文件")
+    parser.add_argument('--generate', type=int, default=None, metavar='N',
+                        help="只生成含 N 个链接的合成书签文件（写到 --output 或标准输出），不执行测量")
+    parser.add_argument('--depth', type=int, default=3, help="合成文件的文件夹深度（配合 --generate）")
+    parser.add_argument('--fanout', type=int, default=5, help="合成文件每层子文件夹数（配合 --generate）")
+    parser.add_argument('--duplicates', type=float, default=0.1,
+                        help="合成文件中重复链接的比例（配合 --generate）")
+    parser.add_argument('--seed', type=int, default=0, help="合成文件的随机种子（配合 --generate）")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="只分析各命令行入口在新解释器中的启动与导入耗时（基于 -X importtime）")
+    args = parser.parse_args(argv)
+
+    if args.profile_startup:
+        report = profile_startup(repeat=max(args.repeat, 1))
+        print(format_startup_report(report))
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return
+
+    if args.generate is not None:
+        content = generate_bookmarks(args.generate, args.depth, args.fanout, args.duplicates, args.seed)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(content)
+        else:
+            sys.stdout.write(content)
+        return
+
+    results = run_benchmarks(samples=not args.no_samples, synthetic=not args.no_synthetic,
+                             repeat=args.repeat, converters=args.converter)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到：{args.output}")
+    problems = [line for case in results['cases'] for line in check_minify(case)]
+    if problems:
+        print("压缩空白检查未通过：\n" + '\n'.join(problems))
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        changes = compare_results(baseline, results, args.threshold)
+        print('\n'.join(changes) if changes else "与基准相比没有明显变化")
+
+
+if __name__ == "__main__":
+    main()
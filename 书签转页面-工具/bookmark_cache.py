@@ -0,0 +1,146 @@
+"""解析结果缓存：把解析好的文件夹/链接树序列化为紧凑的二进制，按源文件内容哈希保存，再次渲染时免去HTML解析"""
+import gc
+import marshal
+import os
+import sys
+
+from bookmark_manifest import file_sha256
+from bookmark_parser import BookmarkDocument, Folder, Link, parse_bookmark_file
+from bookmark_stats import current
+
+# 用户缓存目录（$XDG_CACHE_HOME、Windows 的 %LOCALAPPDATA% 或 ~/.cache）下的子目录名
+CACHE_DIR_NAME = 'bookmark-tools'
+
+# 序列化格式或解析器行为变化时递增，使旧缓存全部失效
+CACHE_FORMAT = 1
+
+# marshal 的格式随 Python 版本变化，缓存只在同一版本下使用
+_PYTHON_TAG = f"py{sys.version_info[0]}{sys.version_info[1]}"
+
+# 缓存目录最多保留的条目数，超出时删除最久未使用的（所有源文件共用一个目录）
+MAX_ENTRIES = 256
+
+
+def dump_document(document):
+    """把文档序列化为字节串
+
+    节点按先序展开为扁平列表：文件夹为 (标题, 子节点数)，链接为 (文字, 网址, 属性或 None)。
+    marshal 对同一个字符串对象只写一次，解析时驻留的网址、图标在缓存中同样只占一份。
+    """
+    records = []
+    for node in document.walk():
+        if isinstance(node, Folder):
+            records.append((node.title, len(node.children)))
+        else:
+            records.append((node.title, node.href, dict(node.attrs) if node.attrs else None))
+    return marshal.dumps((CACHE_FORMAT, _PYTHON_TAG, document.title, len(document.root.children), records))
+
+
+def load_document(data):
+    """由 dump_document 的结果重建文档；格式不符时抛出 ValueError"""
+    # 重建期间新建的大量对象都不是垃圾，暂停分代回收可省去约三分之一的耗时
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _load_document(data)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _load_document(data):
+    try:
+        cache_format, python_tag, title, root_count, records = marshal.loads(data)
+    except (EOFError, TypeError, ValueError) as e:
+        raise ValueError(f"无法读取解析缓存：{e}") from None
+    if cache_format != CACHE_FORMAT or python_tag != _PYTHON_TAG:
+        raise ValueError("解析缓存格式已过期")
+
+    document = BookmarkDocument()
+    document.title = title
+    stack = [[document.root, root_count]]  # [文件夹, 尚未读取的子节点数]
+    for record in records:
+        while not stack[-1][1]:
+            stack.pop()
+        entry = stack[-1]
+        entry[1] -= 1
+        parent = entry[0]
+        if len(record) == 2:
+            folder = Folder(record[0], parent)
+            parent.children.append(folder)
+            stack.append([folder, record[1]])
+        else:
+            parent.children.append(Link(*record))
+    return document
+
+
+def default_cache_dir():
+    """默认缓存目录：用户缓存目录下的 bookmark-tools，不在源文件旁留下文件
+
+    缓存按内容哈希命名，所有源文件（以及各转换脚本）共用同一个目录。
+    """
+    base = os.environ.get('XDG_CACHE_HOME')
+    if not base and os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA')
+    if not base:
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, CACHE_DIR_NAME)
+
+
+def parse_bookmark_file_cached(input_file, sha256=None, cache_dir=None):
+    """解析书签文件，优先读取按内容哈希保存的缓存；未命中时解析并写入缓存
+
+    sha256 为调用方已计算好的源文件哈希（如增量构建清单），省去再次读取文件。
+    缓存目录不可写时照常解析，只是不保存缓存。
+    哈希与解析各自读取文件：其间文件被改写时解析结果与哈希不对应，这次不写入缓存。
+    """
+    verify = sha256 is not None  # 调用方的哈希可能早于本次解析，解析后需重新核对
+    stamp = _file_stamp(input_file)
+    sha256 = sha256 or file_sha256(input_file)
+    cache_dir = cache_dir or default_cache_dir()
+    cache_path = os.path.join(cache_dir, f"{sha256}.tree")
+    stats = current()
+    try:
+        with stats.stage('cache_load'):
+            with open(cache_path, 'rb') as f:
+                document = load_document(f.read())
+        os.utime(cache_path)  # 记录最近使用时间，供清理时参考
+        stats.count('cache_hits')
+        return document
+    except (OSError, ValueError):
+        stats.count('cache_misses')
+
+    with stats.stage('html_parse'):
+        document = parse_bookmark_file(input_file)
+    if _file_stamp(input_file) != stamp or (verify and file_sha256(input_file) != sha256):
+        stats.count('cache_skipped')
+        return document
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(dump_document(document))
+        os.replace(tmp_path, cache_path)
+        prune_cache(cache_dir)
+    except OSError:
+        pass
+    return document
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def prune_cache(cache_dir, max_entries=MAX_ENTRIES):
+    """只保留最近使用的 max_entries 个缓存条目"""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.tree'):
+            entries.append((entry.stat().st_mtime, entry.path))
+    entries.sort(reverse=True)
+    for _, path in entries[max_entries:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
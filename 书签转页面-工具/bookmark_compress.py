@@ -0,0 +1,136 @@
+"""静态托管优化：压缩输出的HTML/CSS/JS空白，并生成预压缩的 .gz/.br 文件"""
+import os
+import re
+
+# 整行注释：HTML注释、CSS块注释、JS单行注释
+_COMMENT_LINE_RE = re.compile(r'^(<!--.*-->|/\*.*\*/|//.*)$')
+_COMMENT_STARTS = ('<!--', '/*', '//')
+
+# CSS 压缩分两遍，引号内的字符串都原样保留：先删除注释，再删除标点两侧与冒号后的空白，其余连续空白合并为一个空格
+# 冒号前的空白不删除（".a :hover" 与 ".a:hover" 含义不同），"(" 前的空白同样保留（如 @media 的 "and ("）
+_CSS_STRING = r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')'
+_CSS_COMMENT_RE = re.compile(_CSS_STRING + r'|/\*.*?\*/', re.S)
+_CSS_SPACE_RE = re.compile(_CSS_STRING + r'|[\s;]*(})\s*|\s*([{;,>])\s*|(:)\s+|\s+')
+
+SIDECAR_SUFFIXES = ('.gz', '.br')
+
+
+def minify_line(line):
+    """去掉行首尾空白；空行与整行注释返回空字符串
+
+    只删除缩进而保留换行，不会改变HTML行内元素间距和JS自动分号插入的语义。
+    """
+    line = line.strip()
+    if line.startswith(_COMMENT_STARTS) and _COMMENT_LINE_RE.match(line):
+        return ''
+    return line
+
+
+def _css_token(match):
+    kept = [group for group in match.groups() if group]
+    return kept[0] if kept else ' '
+
+
+def minify_css(text):
+    """压缩CSS：删除注释与缩进，规则之间不再换行，去掉块内最后一条声明的分号"""
+    text = _CSS_COMMENT_RE.sub(lambda match: match.group(1) or '', text)
+    return _CSS_SPACE_RE.sub(_css_token, text).strip()
+
+
+def minify_text(text, ext=None):
+    """压缩一段完整的文本：ext 为 css 时整体压缩为一行，否则（HTML/JS）按行去掉缩进、空行与整行注释"""
+    if ext == 'css':
+        return minify_css(text)
+    return '\n'.join(line for line in map(minify_line, text.split('\n')) if line)
+
+
+class MinifyWriter:
+    """包装已打开的文件句柄：按行压缩后再写入，可直接传给各转换器的 write_* 函数
+
+    单独成行的 <style> 与 </style> 之间的内容收集起来按CSS整体压缩（见 minify_css）。
+    """
+
+    def __init__(self, f):
+        self._f = f
+        self._pending = []  # 尚未遇到换行的内容块，整行结束时才拼接，避免每次写入都重新拼接、切分
+        self._first = True
+        self._style = None  # 正在收集的 <style> 块内容行
+        self.bytes_in = 0
+
+    def write(self, text):
+        self.bytes_in += len(text.encode('utf-8'))
+        if '\n' not in text:
+            self._pending.append(text)
+            return
+        lines = text.split('\n')
+        self._pending.append(lines[0])
+        lines[0] = ''.join(self._pending)
+        self._pending = [lines.pop()]
+        self._emit(lines)
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+
+    def finish(self):
+        """写出最后一行（调用方负责关闭底层文件）"""
+        self._emit([''.join(self._pending)])
+        self._pending = []
+        if self._style is not None:  # <style> 未闭合时原样写出已收集的内容
+            style, self._style = self._style, None
+            self._emit(style)
+
+    def _emit(self, lines):
+        """压缩若干完整的行，合并为一次写入"""
+        out = []
+        for line in lines:
+            line = minify_line(line)
+            if self._style is not None:
+                if line != '</style>':
+                    self._style.append(line)
+                    continue
+                line = minify_css('\n'.join(self._style)) + '</style>'
+                self._style = None
+            elif line == '<style>':
+                self._style = []
+            if line:
+                out.append(line)
+        if out:
+            self._f.write(('' if self._first else '\n') + '\n'.join(out))
+            self._first = False
+
+
+def write_sidecars(path):
+    """在输出文件旁写出 .gz（以及可用时的 .br），返回各文件体积（字节）"""
+    import gzip
+
+    try:
+        import brotli
+    except ImportError:  # brotli 为可选依赖，未安装时只生成 .gz
+        brotli = None
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    sizes = {'raw': len(data)}
+
+    # mtime 固定为 0，内容不变时压缩结果也不变
+    with open(path + '.gz', 'wb') as raw, gzip.GzipFile(filename='', mode='wb', fileobj=raw,
+                                                        compresslevel=9, mtime=0) as f:
+        f.write(data)
+    sizes['gz'] = os.path.getsize(path + '.gz')
+
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        with open(path + '.br', 'wb') as f:
+            f.write(compressed)
+        sizes['br'] = len(compressed)
+    elif os.path.exists(path + '.br'):
+        os.remove(path + '.br')
+    return sizes
+
+
+def remove_sidecars(path):
+    """删除输出文件旁可能过期的预压缩文件"""
+    for suffix in SIDECAR_SUFFIXES:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
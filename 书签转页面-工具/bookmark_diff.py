@@ -0,0 +1,247 @@
+"""比较同一书签文件的两个导出版本：按文件夹路径与规范化URL对齐，列出新增、删除、移动、改名的链接与文件夹"""
+import argparse
+import json
+import sys
+import time
+
+from bookmark_cache import parse_bookmark_file_cached
+from bookmark_md import build_categories, iter_category_lines
+from bookmark_merge import _folder_key, normalize_url
+from bookmark_parser import Folder
+
+
+def snapshot(document):
+    """提取比较所需的信息，返回 (文件夹表, 链接表)
+
+    文件夹表：路径 -> {'title', 'display', 'links'}，路径为从根开始的文件夹键元组
+    （浏览器顶层文件夹统一为空串），按文档顺序（先序）排列；links 为直接包含的链接数。
+    链接表：规范化URL -> (所在文件夹路径, 链接文字, 原始网址)，同一网址出现多次时取第一次。
+    """
+    folders = {}
+    links = {}
+    stack = [(iter(document.root.children), (), ())]
+    while stack:
+        nodes, path, titles = stack[-1]
+        node = next(nodes, None)
+        if node is None:
+            stack.pop()
+        elif isinstance(node, Folder):
+            key = _folder_key(node.title)
+            child_path = path + (key,)
+            child_titles = titles + (node.title,) if key else titles
+            if child_path not in folders:
+                folders[child_path] = {'title': node.title, 'display': ' / '.join(child_titles), 'links': 0}
+            stack.append((iter(node.children), child_path, child_titles))
+        else:
+            url_key = normalize_url(node.href)
+            if url_key not in links:
+                links[url_key] = (path, node.title, node.href)
+                if path:
+                    folders[path]['links'] += 1
+    return folders, links
+
+
+def match_folders(old_folders, new_folders, old_links, new_links):
+    """找出改名或移动的文件夹，返回 {旧路径: 新路径}
+
+    只在旧版本中存在的文件夹，若其直接包含的链接有一半以上出现在同一个只在新版本中存在的文件夹里，
+    视为同一个文件夹；父文件夹已对应上时，同名的子文件夹直接跟随，不再单独统计。
+    每个链接只查字典一次，耗时与链接数、文件夹数成线性关系。
+    """
+    votes = {}  # 旧路径 -> {新路径: 共同链接数}
+    for url_key, (old_path, _, _) in old_links.items():
+        entry = new_links.get(url_key)
+        if entry is None or old_path in new_folders or entry[0] in old_folders:
+            continue
+        counts = votes.setdefault(old_path, {})
+        counts[entry[0]] = counts.get(entry[0], 0) + 1
+
+    mapping = {}
+    taken = set()
+    for path, info in old_folders.items():  # 先序：父文件夹总在子文件夹之前
+        if path in new_folders:
+            continue
+        parent = mapping.get(path[:-1])
+        if parent is not None and parent + path[-1:] in new_folders and parent + path[-1:] not in old_folders:
+            target = parent + path[-1:]
+        else:
+            counts = votes.get(path)
+            if not counts:
+                continue
+            target, shared = max(counts.items(), key=lambda item: item[1])
+            if shared * 2 < info['links']:
+                continue
+        if target not in taken:
+            mapping[path] = target
+            taken.add(target)
+    return mapping
+
+
+def diff_documents(old, new, old_categories=None, new_categories=None):
+    """比较两个 BookmarkDocument，返回可直接序列化为JSON的变更报告
+
+    调用方已有两个版本的分类表（bookmark_md.build_categories）时可传入，避免重复构建。
+    """
+    old_folders, old_links = snapshot(old)
+    new_folders, new_links = snapshot(new)
+    mapping = match_folders(old_folders, new_folders, old_links, new_links)
+    targets = set(mapping.values())
+
+    folders = {'added': [], 'removed': [], 'renamed': [], 'moved': []}
+    for path, info in old_folders.items():
+        if path in mapping:
+            target = mapping[path]
+            same_parent = mapping.get(path[:-1], path[:-1]) == target[:-1]
+            if same_parent and path[-1] == target[-1]:
+                continue  # 随父文件夹一起改名或移动
+            change = {'from': info['display'], 'to': new_folders[target]['display']}
+            folders['renamed' if same_parent else 'moved'].append(change)
+        elif path not in new_folders:
+            folders['removed'].append(info['display'])
+    folders['added'] = [info['display'] for path, info in new_folders.items()
+                        if path not in old_folders and path not in targets]
+
+    links = {'added': [], 'removed': [], 'moved': [], 'renamed': []}
+    for url_key, (old_path, old_title, old_href) in old_links.items():
+        entry = new_links.get(url_key)
+        if entry is None:
+            links['removed'].append({'title': old_title, 'href': old_href,
+                                     'folder': _display(old_folders, old_path)})
+            continue
+        new_path, new_title, new_href = entry
+        if mapping.get(old_path, old_path) != new_path:
+            links['moved'].append({'title': new_title, 'href': new_href,
+                                   'from': _display(old_folders, old_path), 'to': _display(new_folders, new_path)})
+        if old_title != new_title:
+            links['renamed'].append({'href': new_href, 'from': old_title, 'to': new_title,
+                                     'folder': _display(new_folders, new_path)})
+    for url_key, (path, title, href) in new_links.items():
+        if url_key not in old_links:
+            links['added'].append({'title': title, 'href': href, 'folder': _display(new_folders, path)})
+
+    if old_categories is None:
+        old_categories = build_categories(old)
+    if new_categories is None:
+        new_categories = build_categories(new)
+    changed, removed = changed_categories(old_categories, new_categories)
+    return {
+        'summary': {
+            'links': {kind: len(items) for kind, items in links.items()},
+            'folders': {kind: len(items) for kind, items in folders.items()},
+            'categories': {'changed': len(changed), 'removed': len(removed)},
+        },
+        'links': links,
+        'folders': folders,
+        'categories': {'changed': [cat['anchor'] for cat in changed], 'removed': [cat['anchor'] for cat in removed]},
+    }
+
+
+def _display(folders, path):
+    return folders[path]['display'] if path else ''
+
+
+def changed_categories(old_categories, new_categories):
+    """按 unique_id 对齐两个分类表（见 bookmark_md.build_categories），返回 (新版本中有变化的分类, 被删除的分类)
+
+    分类标题或链接列表（文字、网址与顺序）不同即视为变化，新增的分类也算在内。
+    """
+    changed = []
+    for cat in new_categories:
+        old = old_categories.get(cat['unique_id'])
+        if old is None or old['title'] != cat['title'] or _link_pairs(old) != _link_pairs(cat):
+            changed.append(cat)
+    removed = [cat for cat in old_categories if cat['unique_id'] not in new_categories]
+    return changed, removed
+
+
+def _link_pairs(cat):
+    # 分类中保存的是文档中的链接节点，按 (文字, 网址) 比较
+    return [(link.title, link.href) for link in cat['links']]
+
+
+def iter_changed_sections(document, changed):
+    """只产出有变化的分类段落（Markdown，格式与 bookmark_md 的输出相同），供下游只更新这些部分"""
+    yield f"# {document.title or '书签导航'}\n"
+    for cat in changed:
+        for line in iter_category_lines(cat):
+            yield '\n' + line
+
+
+def iter_changelog(report, old_name, new_name):
+    """把变更报告渲染为Markdown更新日志"""
+    summary = report['summary']
+    yield f"# 书签变更：{old_name} → {new_name}\n\n"
+    yield (f"链接：新增 {summary['links']['added']}，删除 {summary['links']['removed']}，"
+           f"移动 {summary['links']['moved']}，改名 {summary['links']['renamed']}；"
+           f"文件夹：新增 {summary['folders']['added']}，删除 {summary['folders']['removed']}，"
+           f"移动 {summary['folders']['moved']}，改名 {summary['folders']['renamed']}\n")
+
+    folders = report['folders']
+    if any(folders.values()):
+        yield "\n## 文件夹\n\n"
+        for path in folders['added']:
+            yield f"- 新增：{path}\n"
+        for path in folders['removed']:
+            yield f"- 删除：{path}\n"
+        for change in folders['renamed']:
+            yield f"- 改名：{change['from']} → {change['to']}\n"
+        for change in folders['moved']:
+            yield f"- 移动：{change['from']} → {change['to']}\n"
+
+    links = report['links']
+    sections = (('added', '新增链接'), ('removed', '删除链接'), ('moved', '移动的链接'), ('renamed', '改名的链接'))
+    for kind, heading in sections:
+        if not links[kind]:
+            continue
+        yield f"\n## {heading}\n\n"
+        for item in links[kind]:
+            if kind == 'moved':
+                yield f"- [{item['title']}]({item['href']})：{item['from']} → {item['to']}\n"
+            elif kind == 'renamed':
+                yield f"- [{item['to']}]({item['href']})：原名“{item['from']}”（{item['folder']}）\n"
+            else:
+                yield f"- [{item['title']}]({item['href']})（{item['folder']}）\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="比较书签文件的新旧两个导出版本，输出变更报告")
+    parser.add_argument('old', help="旧版本的书签HTML文件")
+    parser.add_argument('new', help="新版本的书签HTML文件")
+    parser.add_argument('--format', choices=('md', 'json'), default='md', help="变更报告格式（默认 md）")
+    parser.add_argument('-o', '--output', default=None, help="变更报告输出文件（默认输出到终端）")
+    parser.add_argument('--sections', default=None, metavar='FILE',
+                        help="另把新版本中有变化的分类段落写成 Markdown 文件，只包含这些分类")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    old = parse_bookmark_file_cached(args.old)
+    new = parse_bookmark_file_cached(args.new)
+    new_categories = build_categories(new)
+    report = diff_documents(old, new, new_categories=new_categories)
+    report = dict({'old': args.old, 'new': args.new}, **report)
+
+    if args.format == 'json':
+        chunks = [json.dumps(report, ensure_ascii=False, indent=2), '\n']
+    else:
+        chunks = iter_changelog(report, args.old, args.new)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.writelines(chunks)
+    else:
+        sys.stdout.writelines(chunks)
+
+    if args.sections:
+        anchors = set(report['categories']['changed'])
+        changed = [cat for cat in new_categories if cat['anchor'] in anchors]
+        with open(args.sections, 'w', encoding='utf-8') as f:
+            f.writelines(iter_changed_sections(new, changed))
+
+    summary = report['summary']
+    print(f"比较完成！链接新增 {summary['links']['added']} 个、删除 {summary['links']['removed']} 个、"
+          f"移动 {summary['links']['moved']} 个、改名 {summary['links']['renamed']} 个，"
+          f"有变化的分类 {summary['categories']['changed']} 个，耗时 {time.perf_counter() - start:.2f} 秒",
+          file=sys.stderr if not args.output else sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""书签图标：提取 <A ICON="data:..."> 中内嵌的网站图标，按内容哈希去重后以CSS类引用"""
+import base64
+import binascii
+import hashlib
+from urllib.parse import unquote_to_bytes
+
+from bookmark_parser import Folder
+
+# 所有图标共用的样式，具体图片由各自的 .ico-<哈希> 类提供
+ICON_CSS = ('.ico { display: inline-block; width: 16px; height: 16px; margin-right: 6px; '
+            'vertical-align: -3px; background: no-repeat center / 16px 16px; }')
+
+# 支持的图片类型及写成资源文件时的扩展名
+IMAGE_TYPES = {
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/jpeg': 'jpg',
+    'image/webp': 'webp',
+    'image/svg+xml': 'svg',
+    'image/x-icon': 'ico',
+    'image/vnd.microsoft.icon': 'ico',
+}
+
+
+def decode_data_uri(uri):
+    """解析图片 data URI，返回 (MIME类型, 字节内容)；格式不对或不是图片时返回 None"""
+    if not uri.startswith('data:'):
+        return None
+    header, sep, payload = uri[5:].partition(',')
+    if not sep:
+        return None
+    params = header.split(';')
+    mime = params[0].strip().lower()
+    if mime not in IMAGE_TYPES:
+        return None
+    try:
+        if 'base64' in params[1:]:
+            data = base64.b64decode(payload)
+        else:
+            data = unquote_to_bytes(payload)
+    except (binascii.Error, ValueError):
+        return None
+    return (mime, data) if data else None
+
+
+class IconSet:
+    """一个页面用到的图标：内容相同的图标只保留一份，对应同一个CSS类"""
+
+    def __init__(self):
+        self._classes = {}  # data URI -> CSS类（无效图标为 None），避免重复解码相同的字符串
+        self._icons = {}    # CSS类 -> (MIME类型, 字节内容)
+
+    def add(self, uri):
+        """登记一个图标并返回其CSS类名"""
+        if uri in self._classes:
+            return self._classes[uri]
+        decoded = decode_data_uri(uri)
+        css_class = None
+        if decoded is not None:
+            css_class = f"ico-{hashlib.sha256(decoded[1]).hexdigest()[:12]}"
+            self._icons.setdefault(css_class, decoded)
+        self._classes[uri] = css_class
+        return css_class
+
+    def __len__(self):
+        return len(self._icons)
+
+    def css(self, asset_link=None, classes=None):
+        """图标样式表
+
+        asset_link 不为空时图片写成按内容哈希命名的共享文件（各页面共用、浏览器可缓存），
+        样式只引用其地址；否则以 data URI 内联，每种图标在页面中只出现一次。
+        classes 不为空时只输出其中的图标（分页输出时每页只包含本页用到的图标）。
+        """
+        rules = [ICON_CSS]
+        for css_class, (mime, data) in self._icons.items():
+            if classes is not None and css_class not in classes:
+                continue
+            if asset_link:
+                url = asset_link(data, IMAGE_TYPES[mime])
+            else:
+                url = f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+            rules.append(f'.{css_class} {{ background-image: url("{url}"); }}')
+        return '\n'.join(rules)
+
+
+def collect_icons(document):
+    """遍历文档中的链接，返回 (IconSet, {(链接文字, 网址): CSS类})，同一链接以先出现的图标为准"""
+    icons = IconSet()
+    icon_of = {}
+    for node in document.walk():
+        if not isinstance(node, Folder):
+            uri = node.attrs.get('icon')
+            if uri:
+                css_class = icons.add(uri)
+                if css_class:
+                    icon_of.setdefault((node.title, node.href), css_class)
+    return icons, icon_of
@@ -0,0 +1,257 @@
+"""导入浏览器的 JSON 书签：Chrome/Edge 配置目录中的 Bookmarks 文件与 Firefox 的 .json/.jsonlz4 备份
+
+边读边解析，不把整个文件读入内存，直接构建与 HTML 解析相同的文件夹/链接树，
+md、top、tree 等转换器无需任何改动即可渲染。
+"""
+import os
+import re
+import sys
+from json.decoder import scanstring
+
+from bookmark_parser import BookmarkDocument, Folder, Link
+
+# 可能是书签文件的文件名（HTML 导出、Chrome 的 Bookmarks、Firefox 备份）
+BOOKMARK_FILE_PATTERNS = ('*.html', '*.json', '*.jsonlz4', 'Bookmarks')
+
+MOZLZ4_MAGIC = b'mozLz40\0'
+
+# Chrome 的时间为 1601-01-01 起的微秒数，与 Unix 纪元相差的秒数
+_WEBKIT_EPOCH_OFFSET = 11644473600
+
+# Firefox 根文件夹：新版备份中标题为 menu、toolbar 等内部名称，换成浏览器中显示的名称
+FIREFOX_ROOT_TITLES = {
+    'bookmarksMenuFolder': '书签菜单',
+    'toolbarFolder': '书签栏',
+    'unfiledBookmarksFolder': '其他书签',
+    'mobileFolder': '移动设备书签',
+}
+_FIREFOX_INTERNAL_TITLES = {'', 'menu', 'toolbar', 'unfiled', 'mobile'}
+
+# 书签节点中需要保存的字段，其余字段（guid、同步信息等）读过即丢弃，不占内存
+_NODE_FIELDS = {'name', 'title', 'type', 'url', 'uri', 'date_added', 'dateAdded', 'iconUri', 'root'}
+
+_FOLDER_TYPES = {'folder', 'text/x-moz-place-container'}
+
+_SEPARATORS_RE = re.compile(r'[\s,:]*')
+_STRING_BODY_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*')
+_SCALAR_RE = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null')
+_SCALAR_END_RE = re.compile(r'[\s,\]}]')
+_SCALARS = {'true': True, 'false': False, 'null': None}
+
+
+def has_bookmark_file_name(path):
+    """按文件名判断是否可能是书签文件（不读取内容）"""
+    name = os.path.basename(path)
+    return name.lower().endswith(('.html', '.json', '.jsonlz4')) or name == 'Bookmarks'
+
+
+def is_json_bookmark_file(path):
+    """判断是否为 Chrome/Edge 的 Bookmarks 或 Firefox 的书签备份（只读取文件开头）"""
+    if not has_bookmark_file_name(path) or path.lower().endswith('.html'):
+        return False
+    with open(path, 'rb') as f:
+        head = f.read(4096)
+    if head.startswith(MOZLZ4_MAGIC):
+        return True
+    return b'"roots"' in head or b'"placesRoot"' in head
+
+
+class _JsonBookmarkReader:
+    """逐块读取 JSON 文本的简易扫描器，同时按书签结构建树
+
+    不需要的字符串（如 Chrome 的同步数据）只跳过不解码，缓冲区只保留尚未处理的部分，
+    内存占用取决于书签树本身而不是文件大小。
+    """
+
+    def __init__(self, f, chunk_size):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self.document = BookmarkDocument()
+        self.document.title = 'Bookmarks'
+
+    def _fill(self, size=None):
+        """读入更多文本，已处理的部分从缓冲区丢弃；文件已读完时返回 False"""
+        if self._eof:
+            return False
+        data = self._f.read(size or self._chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """跳过空白、逗号与冒号，返回下一个字符；文件结束时返回空串"""
+        while True:
+            self._pos = _SEPARATORS_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def _read_string(self):
+        while True:
+            try:
+                value, self._pos = scanstring(self._buf, self._pos + 1)
+                return value
+            except ValueError:
+                # 字符串被块边界截断：读入更多（每次至少翻倍，避免超长字符串反复重扫）
+                if not self._fill(max(self._chunk_size, len(self._buf) - self._pos)):
+                    raise
+
+    def _skip_string(self):
+        while True:
+            end = _STRING_BODY_RE.match(self._buf, self._pos + 1).end()
+            if end < len(self._buf) and self._buf[end] == '"':
+                self._pos = end + 1
+                return
+            # 未找到结束引号：丢弃已扫描的内容，只保留可能被截断的转义符
+            self._buf = '"' + self._buf[end:]
+            self._pos = 0
+            if not self._fill():
+                raise ValueError("JSON 字符串未结束")
+
+    def _read_scalar(self):
+        # 数字可能被块边界截断（如 2 与 .5），先读到其后的分隔符再匹配
+        while not _SCALAR_END_RE.search(self._buf, self._pos) and self._fill():
+            pass
+        match = _SCALAR_RE.match(self._buf, self._pos)
+        if not match:
+            raise ValueError(f"无法解析的 JSON 内容：{self._buf[self._pos:self._pos + 20]!r}")
+        self._pos = match.end()
+        text = match.group()
+        if text in _SCALARS:
+            return _SCALARS[text]
+        return float(text) if '.' in text or 'e' in text.lower() else int(text)
+
+    def parse(self):
+        """读完整个文件，返回 BookmarkDocument"""
+        # 每层容器一帧：[是否对象, 当前键, 书签节点或 None, 子节点所属文件夹或 None]
+        # 子节点所属文件夹不为空时，该容器中的对象都是书签节点（children 数组、Chrome 的 roots 对象）
+        frames = []
+        while True:
+            c = self._peek()
+            if not c:
+                if frames:
+                    raise ValueError("JSON 文件不完整")
+                break
+            top = frames[-1] if frames else None
+            if c in '}]':
+                self._pos += 1
+                frames.pop()
+                if top[2] is not None:
+                    self._finish_node(top[2])
+                if frames and frames[-1][0]:
+                    frames[-1][1] = None
+                if not frames:
+                    break
+                continue
+            if top and top[0] and top[1] is None:
+                if c != '"':
+                    raise ValueError(f"JSON 对象的键应为字符串，实际为 {c!r}")
+                top[1] = self._read_string()
+                continue
+
+            key = top[1] if top else None
+            node = top[2] if top else None
+            if c == '{':
+                self._pos += 1
+                if top is None:
+                    frames.append([True, None, {'top': True}, None])
+                elif top[3] is not None:
+                    frames.append([True, None, {'parent': top[3]}, None])
+                elif node is not None and node.get('top') and key == 'roots':
+                    frames.append([True, None, None, self.document.root])  # Chrome：roots 下各根文件夹
+                else:
+                    frames.append([True, None, None, None])
+            elif c == '[':
+                self._pos += 1
+                folder = self._start_folder(node) if node is not None and key == 'children' else None
+                frames.append([False, None, None, folder])
+            else:
+                if c == '"':
+                    if node is not None and key in _NODE_FIELDS:
+                        node[key] = self._read_string()
+                    else:
+                        self._skip_string()
+                else:
+                    value = self._read_scalar()
+                    if node is not None and key in _NODE_FIELDS:
+                        node[key] = value
+                if top and top[0]:
+                    top[1] = None
+
+        root = self.document.root
+        root.children = [child for child in root.children if not isinstance(child, Folder) or child.children]
+        return self.document
+
+    def _start_folder(self, node):
+        """读到节点的 children 时建立文件夹，先于其子节点加入父文件夹以保持原有顺序"""
+        if node.get('top'):
+            node['folder'] = self.document.root  # Firefox：最外层是不显示的根容器
+        else:
+            node['folder'] = Folder(None, node['parent'])
+            node['parent'].children.append(node['folder'])
+        return node['folder']
+
+    def _finish_node(self, node):
+        if node.get('top'):
+            return
+        parent = node['parent']
+        title = node.get('name', node.get('title')) or ''
+        if 'folder' in node or node.get('type') in _FOLDER_TYPES:
+            folder = node.get('folder')
+            if folder is None:
+                folder = Folder(None, parent)
+                parent.children.append(folder)
+            if node.get('root') == 'tagsFolder':
+                parent.children.remove(folder)  # 标签不是书签，浏览器导出 HTML 时同样不包含
+                return
+            if node.get('root') in FIREFOX_ROOT_TITLES and title in _FIREFOX_INTERNAL_TITLES:
+                title = FIREFOX_ROOT_TITLES[node['root']]
+            folder.title = sys.intern(title.strip())
+            return
+
+        href = node.get('url', node.get('uri'))
+        if not href or href.startswith('place:'):
+            return  # 分隔线与 Firefox 的智能书签（place: 查询）
+        attrs = {}
+        if node.get('date_added'):
+            attrs['add_date'] = str(int(node['date_added']) // 1000000 - _WEBKIT_EPOCH_OFFSET)
+        elif node.get('dateAdded'):
+            attrs['add_date'] = str(int(node['dateAdded']) // 1000000)
+        if node.get('iconUri'):
+            attrs['icon_uri'] = sys.intern(node['iconUri'])
+        parent.children.append(Link(title.strip(), sys.intern(href), attrs))
+
+
+def parse_json_bookmarks(f, chunk_size=1 << 16):
+    """从已打开的文本文件（或 io.StringIO）流式解析 JSON 书签，返回 BookmarkDocument"""
+    return _JsonBookmarkReader(f, chunk_size).parse()
+
+
+def parse_json_bookmark_file(path, chunk_size=1 << 16):
+    """解析 Chrome/Edge 的 Bookmarks 文件或 Firefox 的 .json/.jsonlz4 备份
+
+    .jsonlz4 为 Firefox 的压缩格式，需要安装 lz4 模块；解压后的文本仍按块解析。
+    """
+    with open(path, 'rb') as f:
+        compressed = f.read(len(MOZLZ4_MAGIC)) == MOZLZ4_MAGIC
+    if compressed:
+        import io
+
+        try:
+            import lz4.block
+        except ImportError:
+            raise ValueError("读取 Firefox 的 .jsonlz4 备份需要安装 lz4（pip install lz4）") from None
+        with open(path, 'rb') as f:
+            f.seek(len(MOZLZ4_MAGIC))
+            data = lz4.block.decompress(f.read())
+        with io.TextIOWrapper(io.BytesIO(data), encoding='utf-8') as text:
+            return parse_json_bookmarks(text, chunk_size)
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return parse_json_bookmarks(f, chunk_size)
@@ -0,0 +1,300 @@
+"""链接健康检查：并发探测书签中的网址，结果按有效期缓存到磁盘，供转换器标记或删除失效链接"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import ssl
+import sys
+import time
+from urllib.parse import urljoin, urlsplit
+
+from bookmark_batch import find_bookmark_files
+from bookmark_cache import parse_bookmark_file_cached
+from bookmark_parser import Folder
+
+CACHE_NAME = '.bookmark-linkcheck.json'
+
+# 探测结果：ok 可访问；dead 确定失效（404/410、域名不存在、拒绝连接）；
+# unknown 无法判断（超时、5xx、403/429 等反爬限制），不作标记
+OK, DEAD, UNKNOWN = 'ok', 'dead', 'unknown'
+
+DEAD_STATUSES = {404, 410}
+
+# 部分服务器不支持 HEAD，遇到这些状态码时改用 GET 重试
+HEAD_UNSUPPORTED = {400, 403, 405, 501}
+
+MAX_REDIRECTS = 5
+
+USER_AGENT = 'Mozilla/5.0 (compatible; bookmark-linkcheck/1.0)'
+
+# 转换器标记失效链接时附加的样式
+DEAD_LINK_CSS = 'li.dead, li.dead a { color: #999; text-decoration: line-through; }'
+
+
+class ProtocolError(Exception):
+    """服务器的响应不是合法的 HTTP/1.x 响应"""
+
+
+def default_cache_path(input_files):
+    """默认缓存位置：所有输入文件所在目录的公共上级目录"""
+    return os.path.join(os.path.commonpath(
+        [os.path.dirname(os.path.abspath(path)) for path in input_files]), CACHE_NAME)
+
+
+class LinkCache:
+    """磁盘上的探测结果缓存，键为网址；超过有效期的条目视为过期，需要重新探测"""
+
+    def __init__(self, path, ttl=7 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('links', {})
+            except (OSError, ValueError):
+                self.entries = {}  # 缓存损坏时全部重新探测
+
+    def is_fresh(self, url, now=None):
+        entry = self.entries.get(url)
+        return entry is not None and (now or time.time()) - entry['checked'] < self.ttl
+
+    def record(self, url, result):
+        self.entries[url] = dict(result, checked=time.time())
+        self._dirty = True
+
+    def dead_links(self):
+        """缓存中确定失效的网址集合（不论是否过期，过期条目在下次检查时更新）"""
+        return {url for url, entry in self.entries.items() if entry['state'] == DEAD}
+
+    def save(self):
+        """有变化时原子写回缓存文件"""
+        if not self._dirty:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'links': self.entries}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+class LinkChecker:
+    """基于 asyncio 的 HTTP/1.1 探测器
+
+    全局与单个主机分别限制并发数，同一主机两次请求之间至少间隔 delay 秒；
+    HEAD 请求的连接在服务器允许时放回连接池复用。
+    """
+
+    def __init__(self, concurrency=20, per_host=2, timeout=10.0, delay=0.0):
+        self.timeout = timeout
+        self.delay = delay
+        self.per_host = per_host
+        self._global = asyncio.Semaphore(concurrency)
+        self._hosts = {}      # (协议, 主机, 端口) -> 信号量
+        self._last_request = {}
+        self._idle = {}       # (协议, 主机, 端口) -> 空闲连接列表
+        self._ssl = ssl.create_default_context()
+
+    async def check(self, url):
+        """探测一个网址，跟随重定向，返回 {'state', 'status', 'error'}"""
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                status, location = await self._probe(url, 'HEAD')
+                if status in HEAD_UNSUPPORTED:
+                    status, location = await self._probe(url, 'GET')
+                if 300 <= status < 400 and location:
+                    url = urljoin(url, location)
+                    continue
+                break
+        except asyncio.TimeoutError:
+            return {'state': UNKNOWN, 'status': None, 'error': f"超时（{self.timeout} 秒）"}
+        except socket.gaierror as e:
+            # 只有域名确实不存在才算失效，断网等临时的解析失败不作判断
+            state = DEAD if e.errno == socket.EAI_NONAME else UNKNOWN
+            return {'state': state, 'status': None, 'error': f"{type(e).__name__}: {e}"}
+        except ConnectionRefusedError as e:
+            return {'state': DEAD, 'status': None, 'error': f"{type(e).__name__}: {e}"}
+        except (OSError, ValueError, EOFError, ProtocolError, asyncio.LimitOverrunError) as e:
+            # 连接中断、响应格式错误、响应头超过 64 KB 等只影响这一个网址
+            return {'state': UNKNOWN, 'status': None, 'error': f"{type(e).__name__}: {e}"}
+        if status < 400:
+            state = OK
+        elif status in DEAD_STATUSES:
+            state = DEAD
+        else:
+            state = UNKNOWN
+        return {'state': state, 'status': status, 'error': None}
+
+    async def _probe(self, url, method):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"不支持的网址：{url}")
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        host_header = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+
+        semaphore = self._hosts.setdefault(key, asyncio.Semaphore(self.per_host))
+        async with self._global, semaphore:
+            if self.delay:
+                wait = self._last_request.get(key, 0) + self.delay - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last_request[key] = time.monotonic()
+            return await asyncio.wait_for(self._request(key, method, target, host_header), self.timeout)
+
+    async def _request(self, key, method, target, host_header, reuse=True):
+        idle = self._idle.get(key) if reuse else None
+        reused = bool(idle)
+        if reused:
+            reader, writer = idle.pop()
+        else:
+            scheme, host, port = key
+            reader, writer = await asyncio.open_connection(
+                host, port, ssl=self._ssl if scheme == 'https' else None,
+                server_hostname=host if scheme == 'https' else None)
+
+        request = (f"{method} {target} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: {USER_AGENT}\r\n"
+                   f"Accept: */*\r\nConnection: keep-alive\r\n\r\n")
+        pooled = False
+        try:
+            try:
+                writer.write(request.encode('latin-1', 'replace'))
+                await writer.drain()
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, ConnectionError):
+                if reused:
+                    # 空闲连接可能已被服务器关闭：只丢弃这一条（finally 中关闭），换新连接重试一次
+                    return await self._request(key, method, target, host_header, reuse=False)
+                raise
+            status, headers = parse_response_head(head)
+
+            # HEAD 响应没有正文，服务器未要求关闭时可复用连接；GET 只需状态码，不读正文直接关闭
+            if method == 'HEAD' and headers.get('connection', '').lower() != 'close':
+                self._idle.setdefault(key, []).append((reader, writer))
+                pooled = True
+            return status, headers.get('location')
+        finally:
+            # 出错、超时被取消（wait_for）时同样关闭，不留下半开的连接
+            if not pooled:
+                writer.close()
+
+    def close(self):
+        """关闭连接池中的空闲连接"""
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+def parse_response_head(head):
+    """解析响应的状态行与响应头，返回 (状态码, {小写的头名: 值})；格式不对时抛出 ProtocolError"""
+    lines = head.decode('latin-1').split('\r\n')
+    fields = lines[0].split(None, 2)
+    if len(fields) < 2 or not fields[0].startswith('HTTP/') or not (fields[1].isdigit() and len(fields[1]) == 3):
+        raise ProtocolError(f"无效的状态行：{lines[0][:100]!r}")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return int(fields[1]), headers
+
+
+async def check_links(urls, cache, checker, progress=None):
+    """探测缓存中缺失或过期的网址并写入缓存，返回本次探测的数量"""
+    now = time.time()
+    stale = [url for url in urls if not cache.is_fresh(url, now)]
+
+    async def check_one(url):
+        try:
+            result = await checker.check(url)
+        except Exception as e:
+            # 意外的错误只记在这个网址上，不能让 gather 取消其余的探测、丢掉已有结果
+            result = {'state': UNKNOWN, 'status': None, 'error': f"{type(e).__name__}: {e}"}
+        cache.record(url, result)
+        if progress:
+            progress(url, cache.entries[url])
+
+    try:
+        await asyncio.gather(*(check_one(url) for url in stale))
+    finally:
+        checker.close()
+    return len(stale)
+
+
+def collect_links(documents):
+    """按文档顺序收集 http(s) 链接：返回 [(网址, 链接文字)]，同一网址只保留一次"""
+    links = {}
+    for document in documents:
+        for node in document.walk():
+            if not isinstance(node, Folder) and node.href.startswith(('http://', 'https://')):
+                links.setdefault(node.href, node.title)
+    return list(links.items())
+
+
+def remove_dead_links(document, dead_links):
+    """原地删除文档中的失效链接，返回删除的数量"""
+    removed = 0
+    stack = [document.root]
+    while stack:
+        folder = stack.pop()
+        kept = []
+        for node in folder.children:
+            if isinstance(node, Folder):
+                stack.append(node)
+                kept.append(node)
+            elif node.href in dead_links:
+                removed += 1
+            else:
+                kept.append(node)
+        folder.children = kept
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="检查书签中的链接是否失效，结果缓存供 bookmark_batch.py --dead-links 使用")
+    parser.add_argument('paths', nargs='+', help="书签HTML文件、目录或通配符（如 '*-大礼包'）")
+    parser.add_argument('--cache', default=None,
+                        help=f"缓存文件路径（默认为输入文件公共上级目录下的 {CACHE_NAME}）")
+    parser.add_argument('--ttl-hours', type=float, default=24 * 7, help="结果有效期（小时，默认 168）")
+    parser.add_argument('--concurrency', type=int, default=20, help="同时探测的链接数（默认 20）")
+    parser.add_argument('--per-host', type=int, default=2, help="同一主机同时探测的链接数（默认 2）")
+    parser.add_argument('--delay', type=float, default=0.0, help="同一主机两次请求的最小间隔（秒）")
+    parser.add_argument('--timeout', type=float, default=10.0, help="单次请求超时（秒，默认 10）")
+    parser.add_argument('-f', '--force', action='store_true', help="忽略缓存，重新探测全部链接")
+    args = parser.parse_args(argv)
+
+    input_files = find_bookmark_files(args.paths)
+    if not input_files:
+        print("错误：未找到书签HTML文件。")
+        sys.exit(1)
+
+    cache = LinkCache(args.cache or default_cache_path(input_files), 0 if args.force else args.ttl_hours * 3600)
+    links = collect_links(parse_bookmark_file_cached(path) for path in input_files)
+    titles = dict(links)
+
+    def progress(url, entry):
+        if entry['state'] == DEAD:
+            print(f"失效：{titles[url]}  {url}  ({entry['status'] or entry['error']})")
+
+    start = time.perf_counter()
+    checker = LinkChecker(args.concurrency, args.per_host, args.timeout, args.delay)
+    try:
+        checked = asyncio.run(check_links([url for url, _ in links], cache, checker, progress))
+    finally:
+        cache.save()
+
+    states = {}
+    for url, _ in links:
+        state = cache.entries[url]['state']
+        states[state] = states.get(state, 0) + 1
+    print(f"检查完成！共 {len(links)} 个链接，本次探测 {checked} 个，其余使用缓存；"
+          f"可访问 {states.get(OK, 0)} 个，失效 {states.get(DEAD, 0)} 个，无法判断 {states.get(UNKNOWN, 0)} 个，"
+          f"耗时 {time.perf_counter() - start:.2f} 秒")
+    print(f"结果已缓存到：{cache.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""增量构建清单：记录每个书签HTML的内容哈希、转换器版本与选项，未变化的文件跳过转换"""
+import hashlib
+import json
+import os
+
+# 转换器输出格式发生变化时递增，使旧清单全部失效
+CONVERTER_VERSION = '5'
+
+MANIFEST_NAME = '.bookmark-manifest.json'
+
+
+def file_sha256(path):
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """单个输出目录下的清单文件，键为源文件名"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.entries = {}
+        self._dirty = False
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('files', {})
+            except (OSError, ValueError):
+                self.entries = {}  # 清单损坏时视为全部需要重建
+
+    def is_fresh(self, input_file, options):
+        """源文件内容、转换器版本、选项均未变化且上次生成的文件齐全时返回 True
+
+        生成的文件包括各输出、分页、分页搜索索引、预压缩文件、共享资源与离线文件，任何一个被删除都需要重建。
+        """
+        entry = self.entries.get(os.path.basename(input_file))
+        if not entry or 'files' not in entry:
+            return False
+        if entry.get('version') != CONVERTER_VERSION or entry.get('options') != options:
+            return False
+        if not all(os.path.exists(os.path.join(self.directory, path)) for path in entry['files']):
+            return False
+        stat = os.stat(input_file)
+        # 大小与修改时间都没变时直接信任已记录的哈希，避免重复读取文件
+        if entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime_ns:
+            return True
+        if entry.get('sha256') != file_sha256(input_file):
+            return False
+        entry['mtime'] = stat.st_mtime_ns
+        self._dirty = True
+        return True
+
+    def record(self, input_file, options, sha256, files):
+        """记录一次成功的转换，sha256 为转换时读取到的内容哈希，files 为生成的全部文件
+
+        文件路径以相对于清单所在目录的形式保存（共享资源可能在上级目录），输出目录整体移动后仍然有效。
+        """
+        stat = os.stat(input_file)
+        self.entries[os.path.basename(input_file)] = {
+            'sha256': sha256,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'version': CONVERTER_VERSION,
+            'options': options,
+            'files': sorted({os.path.relpath(path, self.directory).replace(os.sep, '/') for path in files}),
+        }
+        self._dirty = True
+
+    def save(self):
+        """有变化时原子写回清单文件"""
+        if not self._dirty:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CONVERTER_VERSION, 'files': self.entries}, f,
+                      ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
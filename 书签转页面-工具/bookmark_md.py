@@ -1,43 +1,50 @@
 
 """解析书签HTML文件并转换为Markdown格式"""
-from bs4 import BeautifulSoup
 import re
 import os
 import sys
 
+from bookmark_parser import UNCATEGORIZED_TITLE, CategoryRegistry, Folder, parse_bookmarks
+from bookmark_stats import current, timed
+
 def parse_bookmark_html_to_markdown(html_content):
     """解析书签HTML文件并转换为Markdown格式"""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    result_md = []
-    
-    # 从原始HTML中提取标题
-    original_title = soup.title.string if soup.title else "书签导航"
-    result_md.append(f"# {original_title}\n")
-    
-    all_dt_tags = soup.find_all('dt')
+    return render_markdown(parse_bookmarks(html_content))
+
+
+def render_markdown(document, dead_links=None):
+    """将已解析的书签文档渲染为Markdown"""
+    return ''.join(iter_markdown(document, dead_links=dead_links))
+
+
+def write_markdown(document, f, dead_links=None):
+    """将Markdown逐块写入已打开的文件句柄，不在内存中拼接整篇文档"""
+    f.writelines(iter_markdown(document, dead_links=dead_links))
 
-    categories = []
-    current_category = None
+
+@timed('categories')
+def build_categories(document):
+    """按文档顺序构建分类表，链接归入所在文件夹对应的分类
+
+    跳过的收藏夹标题、重复的分类沿用上级或先出现的同名分类；
+    不属于任何分类的链接归入“未分类”，该分类在第一个这样的链接处建立。
+    """
+    categories = CategoryRegistry()
+    category_of = {}  # 文件夹 -> 其中链接所属的分类
+    duplicates = 0
     current_parent_category = ""  # 初始化为空字符串
     
-    for dt_tag in all_dt_tags:
-        h3_tag = dt_tag.find('h3')
-        a_tag = dt_tag.find('a')
-        
-        if h3_tag:
-            title = h3_tag.get_text().strip()
+    for parent, node in document.walk_with_parent():
+        if isinstance(node, Folder):
+            title = node.title
             
             if title.lower() in ["bookmarks", "收藏夹", "收藏栏", "书签栏"]:
+                category_of[node] = category_of.get(parent)
                 continue
             
-            parent_dl = h3_tag.find_parent('dl')
-            is_main_category = False
-            if parent_dl and parent_dl.find_parent('dl') is None:
-                is_main_category = True
+            is_main_category = node.depth == 0
+            if is_main_category:
                 current_parent_category = title
-            else:
-                pass
 
             # 修正 unique_id 的生成逻辑，避免 None
             if is_main_category:
@@ -51,47 +58,68 @@ def parse_bookmark_html_to_markdown(html_content):
             # 修正：将所有非字母数字下划线和中文的字符替换为连字符，并处理连续连字符和首尾连字符
             anchor_id = re.sub(r'[^a-zA-Z0-9_\u4e00-\u9fff]+', '-', unique_id).strip('-').lower()
             
-            if any(cat['unique_id'] == unique_id for cat in categories):
-                continue
+            category = categories.add(unique_id, title, 'h2' if is_main_category else 'h3', anchor_id)
+            if category is None:
+                duplicates += 1
+                category = categories.get(unique_id)
+            category_of[node] = category
 
-            current_category = {
-                'title': title,
-                'unique_id': unique_id,
-                'tag_type': 'h2' if is_main_category else 'h3',
-                'links': [],
-                'anchor': anchor_id
-            }
-            categories.append(current_category)
+        elif node.href and node.title:
+            category = category_of.get(parent)
+            if category is None:
+                category = categories.get(()) or categories.add((), UNCATEGORIZED_TITLE, 'h2', 'uncategorized')
+            category['links'].append(node)
+
+    current().count('md.duplicate_categories', duplicates)
+    return categories
 
-            
-        elif a_tag and current_category:
-            href = a_tag.get('href', '')
-            text = a_tag.get_text().strip()
-            if href and text:
-                current_category['links'].append((text, href))
+
+def iter_markdown(document, dead_links=None):
+    """逐块产出Markdown文本，各行之间以换行分隔
+
+    dead_links 为失效网址集合（见 bookmark_linkcheck），其中的链接加删除线。
+    """
+    lines = _iter_markdown_lines(document, dead_links or ())
+    yield next(lines)
+    for line in lines:
+        yield '\n' + line
+
+
+def _iter_markdown_lines(document, dead_links):
+    # 从原始HTML中提取标题
+    original_title = document.title or "书签导航"
+    yield f"# {original_title}\n"
+
+    categories = build_categories(document)
 
     # 生成目录
-    result_md.append("## 目录\n")
+    yield "## 目录\n"
     for cat in categories:
         if cat['tag_type'] == 'h2':
-            result_md.append(f"- [{cat['title']}](#{cat['anchor']})")
+            yield f"- [{cat['title']}](#{cat['anchor']})"
         else:
-            result_md.append(f"  - [{cat['title']}](#{cat['anchor']})")
-    result_md.append("\n")
+            yield f"  - [{cat['title']}](#{cat['anchor']})"
+    yield "\n"
     
     # 生成内容
     for cat in categories:
-        if cat['tag_type'] == 'h2':
-            result_md.append(f"## {cat['title']}\n")
-        else:
-            result_md.append(f"### {cat['title']}\n")
-        
-        if cat['links']:
-            for link_text, link_url in cat['links']:
-                result_md.append(f"- [{link_text}]({link_url})")
-            result_md.append("\n")
-    
-    return '\n'.join(result_md)
+        yield from iter_category_lines(cat, dead_links)
+
+
+def iter_category_lines(cat, dead_links=()):
+    """产出一个分类的标题与链接列表（各行不含换行符），供整篇输出与只输出变更分类（bookmark_diff）共用"""
+    if cat['tag_type'] == 'h2':
+        yield f"## {cat['title']}\n"
+    else:
+        yield f"### {cat['title']}\n"
+
+    if cat['links']:
+        for link in cat['links']:
+            if link.href in dead_links:
+                yield f"- ~~[{link.title}]({link.href})~~（已失效）"
+            else:
+                yield f"- [{link.title}]({link.href})"
+        yield "\n"
 
 
 def main():
@@ -102,21 +130,22 @@ def main():
             print(f"错误：文件不存在：{input_file}")
             sys.exit(1)
         
-        if not input_file.lower().endswith('.html'):
-            print("错误：文件类型不是HTML文件。")
+        from bookmark_import import has_bookmark_file_name
+
+        if not has_bookmark_file_name(input_file):
+            print("错误：文件类型不是书签HTML或JSON文件。")
             sys.exit(1)
 
         output_dir = os.path.dirname(input_file)
         input_filename_without_ext = os.path.splitext(os.path.basename(input_file))[0]
         output_file = os.path.join(output_dir, f"{input_filename_without_ext}.md")
         
-        with open(input_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        converted_md = parse_bookmark_html_to_markdown(html_content)
+        from bookmark_cache import parse_bookmark_file_cached
+
+        document = parse_bookmark_file_cached(input_file)
         
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(converted_md)
+            write_markdown(document, f)
         
         print(f"转换完成！输出文件已保存到：{output_file}")
     
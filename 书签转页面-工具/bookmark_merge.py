@@ -0,0 +1,198 @@
+"""合并多个书签导出：按文件夹路径合并目录树，按规范化URL全局去重，输出一份合并后的页面"""
+import argparse
+import os
+import re
+import sys
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from bookmark_batch import OUTPUTS, PAGED_OUTPUTS, find_bookmark_files
+from bookmark_cache import parse_bookmark_file_cached
+from bookmark_parser import BookmarkDocument, Folder, Link
+from bookmark_shard import remove_stale_pages
+
+# 浏览器自带的顶层文件夹，不同导出中名称不同，合并时视为同一个文件夹
+TOOLBAR_TITLES = {"bookmarks", "收藏夹", "收藏栏", "书签栏"}
+
+# 不影响页面内容的跟踪参数（utm_ 前缀另行判断）
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', 'spm'}
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# 常见的 http(s)://主机/路径?参数#片段 形式，用一次正则匹配代替 urlsplit（主机含用户信息或IPv6时仍走 urlsplit）
+_SIMPLE_URL_RE = re.compile(r'(?i)(https?)://([^/?#@\[\]]*)(?=[/?#]|$)([^?#]*)(?:\?([^#]*))?')
+
+
+def normalize_url(href):
+    """返回用于判断重复的规范化URL
+
+    协议与主机名转小写，http 与 https 视为相同，去掉默认端口、路径末尾的斜杠、
+    utm_* 等跟踪参数以及 # 片段；无法解析的地址原样返回。
+    """
+    match = _SIMPLE_URL_RE.match(href.strip())
+    if match:
+        scheme, host, path, query = match.groups()
+        host = host.lower()
+        default_port = ':443' if scheme.lower() == 'https' else ':80'
+        if host.endswith(default_port):
+            host = host[:-len(default_port)]
+        host = host.rstrip('.')
+        if query:
+            query = _strip_tracking(query)
+        return f"https://{host}{path.rstrip('/')}{'?' + query if query else ''}"
+
+    try:
+        parts = urlsplit(href.strip())
+        port = parts.port
+    except ValueError:
+        return href
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS:
+        return href.strip()  # javascript:、data: 等只去掉首尾空白
+
+    host = (parts.hostname or '').rstrip('.')
+    if ':' in host:
+        host = f"[{host}]"  # IPv6
+    if port is not None and port != _DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    query = _strip_tracking(parts.query) if parts.query else ''
+    return urlunsplit(('https', host, parts.path.rstrip('/'), query, ''))
+
+
+def _strip_tracking(query):
+    """直接按原始字符串过滤跟踪参数，保留其余参数的原有顺序与编码"""
+    kept = []
+    for pair in query.split('&'):
+        key = pair.partition('=')[0].lower()
+        if not key.startswith('utm_') and key not in TRACKING_PARAMS:
+            kept.append(pair)
+    return '&'.join(kept)
+
+
+def _folder_key(title):
+    return '' if title.lower() in TOOLBAR_TITLES else title
+
+
+def merge_documents(documents):
+    """合并多个 BookmarkDocument，返回 (合并后的文档, 去掉的重复链接数)
+
+    文件夹按从根开始的标题路径合并，链接按 normalize_url 全局去重（先出现者优先）；
+    网址为空的链接无法判断是否重复，全部保留。
+    每个节点只访问一次，查找均为字典操作，耗时与链接总数成线性关系。
+    """
+    merged = BookmarkDocument()
+    children = {}  # (id(目标文件夹), 文件夹键) -> 目标子文件夹
+    seen = set()
+    duplicates = 0
+
+    for document in documents:
+        if merged.title is None:
+            merged.title = document.title
+        # 按文档顺序（先序）遍历，保证重复链接保留的是最先出现的那一个
+        stack = [(iter(document.root.children), merged.root)]
+        while stack:
+            nodes, target = stack[-1]
+            node = next(nodes, None)
+            if node is None:
+                stack.pop()
+            elif isinstance(node, Folder):
+                key = (id(target), _folder_key(node.title))
+                folder = children.get(key)
+                if folder is None:
+                    folder = Folder(node.title, target)
+                    target.children.append(folder)
+                    children[key] = folder
+                stack.append((iter(node.children), folder))
+            else:
+                url_key = normalize_url(node.href)
+                if url_key:
+                    if url_key in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(url_key)
+                target.children.append(Link(node.title, node.href, node.attrs))
+
+    _prune_empty(merged.root)
+    return merged, duplicates
+
+
+def _prune_empty(root):
+    """删除去重后不再包含任何链接的文件夹（后序遍历）"""
+    order = [root]
+    for node in root.walk():
+        if isinstance(node, Folder):
+            order.append(node)
+    for folder in reversed(order):
+        folder.children = [child for child in folder.children
+                           if not isinstance(child, Folder) or child.children]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="合并多个书签HTML，全局去重后生成一份 .md、_top.html、_tree.html")
+    parser.add_argument('paths', nargs='+', help="书签HTML文件、目录或通配符（如 '*-大礼包'）")
+    parser.add_argument('-o', '--output', default='merged',
+                        help="输出文件路径前缀（默认 merged，生成 merged.md、merged_top.html、merged_tree.html）")
+    parser.add_argument('--title', default=None, help="合并后页面的标题（默认沿用第一个文件的标题）")
+    parser.add_argument('--lazy-tree', action='store_true',
+                        help="_tree.html 内容区改为嵌入JSON并按可视范围懒加载渲染")
+    parser.add_argument('--no-search-index', action='store_true',
+                        help="_tree.html 不嵌入全文搜索索引")
+    parser.add_argument('--icons', action='store_true',
+                        help="在链接前显示书签自带的网站图标，相同图标只内联一份")
+    parser.add_argument('--pages', type=int, default=None, metavar='KB',
+                        help="_top.html/_tree.html 分页输出，每页约 KB 千字节（0 为每个顶层分类一页）")
+    parser.add_argument('--offline', action='store_true',
+                        help="为 _tree.html 生成 service worker 与离线清单，重复打开时从浏览器缓存加载")
+    args = parser.parse_args(argv)
+
+    input_files = find_bookmark_files(args.paths)
+    if not input_files:
+        print("错误：未找到书签HTML文件。")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    documents = [parse_bookmark_file_cached(path) for path in input_files]
+    total = sum(1 for document in documents for node in document.walk() if not isinstance(node, Folder))
+    merged, duplicates = merge_documents(documents)
+    if args.title:
+        merged.title = args.title
+
+    options = {'lazy': args.lazy_tree, 'search_index': not args.no_search_index, 'asset_link': None,
+               'icons': args.icons, 'dead_links': None, 'offline': args.offline}
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(output_dir, exist_ok=True)
+    for suffix, write, option_names in OUTPUTS:
+        output_file = f"{args.output}{suffix}"
+        kwargs = {name: options[name] for name in option_names}
+        if args.pages is not None and suffix in PAGED_OUTPUTS:
+            del kwargs['asset_link']
+            written = []
+            for path, chunks in PAGED_OUTPUTS[suffix](merged, output_file, args.pages, **kwargs):
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.writelines(chunks)
+                written.append(path)
+            # 与 bookmark_batch 相同：删除上次输出中本次不再生成的分页
+            remove_stale_pages(output_file, keep=written)
+            print(f"已生成：{output_file}（索引页，共 {len(written)} 个文件）")
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                write(merged, f, **kwargs)
+            if suffix in PAGED_OUTPUTS:
+                remove_stale_pages(output_file)
+            print(f"已生成：{output_file}")
+        if 'offline' in option_names:
+            from bookmark_offline import offline_paths, remove_offline_files, write_offline_files
+
+            if args.offline:
+                manifest = write_offline_files(output_file)
+                print(f"已生成：{offline_paths(output_file)[0]}（离线清单 {len(manifest['files'])} 个文件，"
+                      f"版本 {manifest['version']}）")
+            else:
+                remove_offline_files(output_file)
+
+    print(f"合并完成！{len(input_files)} 个文件共 {total} 个链接，去掉重复 {duplicates} 个，"
+          f"保留 {total - duplicates} 个，耗时 {time.perf_counter() - start:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""离线访问：为 _tree.html 生成 service worker 与带版本号的缓存清单，重复打开时直接从浏览器缓存加载
+
+每个页面有自己的 <名称>_tree.sw.js 与 <名称>_tree.offline.json，作用范围为以 <名称>_tree 开头的地址，
+同一目录下的多个书签集合（以及 bookmark_merge 的输出）互不影响。
+清单列出页面、各分页、分页搜索索引及其引用的共享资源的内容哈希，版本号为全部哈希的摘要；
+service worker 在打开页面时后台检查清单，版本变化时只下载内容变化的文件，全部校验通过后才替换旧缓存。
+service worker 只能在 http(s) 下使用，本地测试可在输出目录运行 python -m http.server 后访问 http://localhost:8000/。
+"""
+import hashlib
+import json
+import os
+import re
+
+from bookmark_shard import existing_page_files
+
+# 页面中引用的共享资源（见 bookmark_assets.AssetStore），地址相对于页面所在目录
+_ASSET_RE = re.compile(r'"([^"\s]*\bbookmarks\.[0-9a-f]{12}\.[a-z0-9]+)"')
+
+# 清单中内容哈希的长度（十六进制位数），service worker 按同样长度校验下载的文件
+HASH_LENGTH = 16
+
+# 页面中注册 service worker 的脚本：由地址推出同名的 .sw.js（分页 <名称>.3.html 同样对应 <名称>.sw.js）
+OFFLINE_SCRIPT = """
+(function() {
+    if (!("serviceWorker" in navigator) || !/^https?:$/.test(location.protocol)) {
+        return; // 直接打开本地文件时不支持离线缓存
+    }
+    const base = location.pathname.replace(/(\\.\\d+)?\\.html$/, "");
+    navigator.serviceWorker.register(base + ".sw.js", { scope: base }).catch(function() {});
+    navigator.serviceWorker.addEventListener("message", function(event) {
+        if (!event.data || event.data.type !== "bookmarks-updated" || document.getElementById("offline-update")) {
+            return;
+        }
+        const button = document.createElement("button");
+        button.id = "offline-update";
+        button.textContent = "🔄 书签已更新，点击刷新";
+        button.style.cssText = "position: fixed; left: 50%; bottom: 30px; transform: translateX(-50%); z-index: 100;"
+            + "border: none; border-radius: 10px; padding: 10px 20px; background-color: #007bff; color: white;"
+            + "cursor: pointer; box-shadow: 0 2px 10px rgba(0,0,0,0.2);";
+        button.addEventListener("click", function() {
+            location.reload();
+        });
+        document.body.appendChild(button);
+    });
+})();
+"""
+
+SERVICE_WORKER_SCRIPT = """// 由 bookmark_offline.py 生成：书签页面缓存优先，后台检查离线清单，版本变化时更新缓存
+const MANIFEST_URL = self.location.href.replace(/\\.sw\\.js(\\?.*)?$/, ".offline.json");
+const CACHE_PREFIX = "bookmarks-offline " + MANIFEST_URL + " ";
+const CHECK_INTERVAL = 10 * 1000; // 连续翻页时不重复检查
+let active = null;
+let checking = null;
+let lastCheck = 0;
+
+async function sha256(buffer) {
+    const digest = await crypto.subtle.digest("SHA-256", buffer);
+    return Array.from(new Uint8Array(digest), function(byte) {
+        return byte.toString(16).padStart(2, "0");
+    }).join("");
+}
+
+async function findCache() {
+    // 清单最后写入，带清单的缓存才是完整的；新缓存在后，从后往前找
+    for (const name of (await caches.keys()).reverse()) {
+        if (!name.startsWith(CACHE_PREFIX)) {
+            continue;
+        }
+        const cache = await caches.open(name);
+        const stored = await cache.match(MANIFEST_URL);
+        if (stored) {
+            return { name: name, cache: cache, manifest: await stored.json() };
+        }
+    }
+    return null;
+}
+
+function currentCache() {
+    if (!active) {
+        active = findCache();
+    }
+    return active;
+}
+
+async function deleteCaches(keep) {
+    for (const name of await caches.keys()) {
+        if (name.startsWith(CACHE_PREFIX) && name !== keep) {
+            await caches.delete(name);
+        }
+    }
+}
+
+async function install(manifest, current) {
+    const name = CACHE_PREFIX + manifest.version;
+    const cache = await caches.open(name);
+    try {
+        await Promise.all(Object.entries(manifest.files).map(async function([path, hash]) {
+            const url = new URL(path, MANIFEST_URL).href;
+            if (current && current.manifest.files[path] === hash) {
+                const cached = await current.cache.match(url);
+                if (cached) {
+                    return cache.put(url, cached);
+                }
+            }
+            const response = await fetch(url, { cache: "no-cache" });
+            const body = await response.clone().arrayBuffer();
+            // 下载期间文件又被重新生成时内容与清单不符，放弃本次更新，下次检查时重试
+            if (!response.ok || (await sha256(body)).slice(0, hash.length) !== hash) {
+                throw new Error("文件内容与离线清单不符：" + path);
+            }
+            return cache.put(url, response);
+        }));
+        await cache.put(MANIFEST_URL, new Response(JSON.stringify(manifest),
+                                                   { headers: { "Content-Type": "application/json" } }));
+    } catch (error) {
+        await caches.delete(name);
+        throw error;
+    }
+    active = Promise.resolve({ name: name, cache: cache, manifest: manifest });
+    await deleteCaches(name);
+}
+
+async function update() {
+    const response = await fetch(MANIFEST_URL, { cache: "no-store" });
+    if (response.status === 404 || response.status === 410) {
+        // 清单已删除（重新生成时关闭了离线模式）：清空缓存并注销，之后直接从服务器加载
+        active = null;
+        await deleteCaches(null);
+        await self.registration.unregister();
+        return;
+    }
+    if (!response.ok) {
+        throw new Error("离线清单下载失败：" + response.status);
+    }
+    const manifest = await response.json();
+    const current = await currentCache();
+    if (current && current.manifest.version === manifest.version) {
+        return;
+    }
+    await install(manifest, current);
+    if (current) {
+        for (const client of await self.clients.matchAll({ type: "window" })) {
+            client.postMessage({ type: "bookmarks-updated", version: manifest.version });
+        }
+    }
+}
+
+function checkForUpdate(force) {
+    if (checking) {
+        return checking;
+    }
+    if (!force && Date.now() - lastCheck < CHECK_INTERVAL) {
+        return Promise.resolve();
+    }
+    lastCheck = Date.now();
+    checking = update().finally(function() {
+        checking = null;
+    });
+    return checking;
+}
+
+self.addEventListener("install", function(event) {
+    event.waitUntil(checkForUpdate(true).then(function() {
+        return self.skipWaiting();
+    }));
+});
+
+self.addEventListener("activate", function(event) {
+    event.waitUntil(self.clients.claim());
+});
+
+self.addEventListener("fetch", function(event) {
+    const request = event.request;
+    if (request.method !== "GET" || new URL(request.url).origin !== self.location.origin) {
+        return;
+    }
+    const navigate = request.mode === "navigate";
+    event.respondWith(currentCache().then(function(current) {
+        return current && current.cache.match(request, { ignoreSearch: navigate });
+    }).then(function(cached) {
+        return cached || fetch(request);
+    }));
+    if (navigate) {
+        // 离线或服务器不可用时继续使用缓存
+        event.waitUntil(checkForUpdate(false).catch(function() {}));
+    }
+});
+"""
+
+
+def offline_paths(page_file):
+    """页面对应的 service worker 与离线清单路径：<名称>_tree.sw.js、<名称>_tree.offline.json"""
+    base = os.path.splitext(page_file)[0]
+    return f"{base}.sw.js", f"{base}.offline.json"
+
+
+def _content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def build_offline_manifest(page_file):
+    """按磁盘上已写出的文件生成离线清单：{'version': 版本号, 'files': {相对地址: 内容哈希}}
+
+    包括页面本身、分页输出的各分页与搜索索引，以及这些页面引用的共享资源。
+    """
+    directory = os.path.dirname(os.path.abspath(page_file))
+    pages = [page_file] + sorted({page for path, page in existing_page_files(page_file) if path == page})
+    files = {}
+    assets = set()
+    for path in pages:
+        with open(path, 'rb') as f:
+            data = f.read()
+        files[os.path.basename(path)] = _content_hash(data)
+        if path.endswith('.html'):
+            assets.update(_ASSET_RE.findall(data.decode('utf-8', 'replace')))
+    for url in sorted(assets):
+        path = os.path.join(directory, *url.split('/'))
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                files[url] = _content_hash(f.read())
+    version = _content_hash(json.dumps(files, sort_keys=True).encode('utf-8'))
+    return {'version': version, 'files': files}
+
+
+def write_offline_files(page_file):
+    """在页面写出后生成（或更新）其 service worker 与离线清单，返回清单"""
+    worker_file, manifest_file = offline_paths(page_file)
+    manifest = build_offline_manifest(page_file)
+    _write_if_changed(worker_file, SERVICE_WORKER_SCRIPT)
+    _write_if_changed(manifest_file, json.dumps(manifest, ensure_ascii=False, indent=2) + '\n')
+    return manifest
+
+
+def _write_if_changed(path, text):
+    """内容不变时不重写；否则先写临时文件再原子替换，服务器不会发出写了一半的文件"""
+    data = text.encode('utf-8')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def remove_offline_files(page_file):
+    """关闭离线模式时删除离线清单与 service worker，已安装的 service worker 下次检查时自行注销"""
+    for path in offline_paths(page_file):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,199 @@
+"""书签HTML（Netscape Bookmark File）单遍解析器"""
+import sys
+from html.parser import HTMLParser
+from types import MappingProxyType
+
+# 没有其余属性的链接共用的只读空映射，不为每个链接单独分配字典
+_NO_ATTRS = MappingProxyType({})
+
+# 在大量链接间重复出现的属性值，解析时驻留为同一个字符串对象（如同一网站的图标 data URI）
+_INTERNED_ATTRS = {'icon', 'icon_uri'}
+
+# 不在任何分类中的链接（直接放在书签栏或文档根部）所归入的分类标题
+UNCATEGORIZED_TITLE = '未分类'
+
+
+class Link:
+    """书签链接；各转换器共用的中间表示，使用 __slots__ 省去每个实例的属性字典"""
+
+    __slots__ = ('title', 'href', 'attrs')
+
+    def __init__(self, title, href, attrs=None):
+        self.title = title
+        self.href = href
+        self.attrs = attrs or _NO_ATTRS  # 其余原始属性，如 ADD_DATE、ICON（只读）
+
+
+class Folder:
+    """书签文件夹，children 按原始顺序保存子文件夹与链接"""
+
+    __slots__ = ('title', 'parent', 'children', 'depth')
+
+    def __init__(self, title, parent=None):
+        self.title = title
+        self.parent = parent
+        self.children = []
+        self.depth = parent.depth + 1 if parent is not None else -1
+
+    def walk(self):
+        """按文档顺序（先序）遍历所有子孙节点"""
+        stack = [iter(self.children)]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                continue
+            yield node
+            if isinstance(node, Folder):
+                stack.append(iter(node.children))
+
+    def walk_with_parent(self):
+        """与 walk 顺序相同，产出 (所在文件夹, 节点)；链接不保存父节点，归类时需要由此得到"""
+        stack = [(self, iter(self.children))]
+        while stack:
+            folder, nodes = stack[-1]
+            node = next(nodes, None)
+            if node is None:
+                stack.pop()
+                continue
+            yield folder, node
+            if isinstance(node, Folder):
+                stack.append((node, iter(node.children)))
+
+
+class BookmarkDocument:
+    """解析结果：页面标题 + 虚拟根文件夹（对应最外层 DL）"""
+
+    __slots__ = ('title', 'root')
+
+    def __init__(self):
+        self.title = None
+        self.root = Folder(None)
+
+    def walk(self):
+        return self.root.walk()
+
+    def walk_with_parent(self):
+        return self.root.walk_with_parent()
+
+
+class _BookmarkHTMLParser(HTMLParser):
+    """事件驱动解析 <DL>/<DT>/<H3>/<A>，一次前向扫描直接构建文件夹/链接树
+
+    文件夹标题、网址、属性名与图标等重复率高的字符串经 sys.intern 驻留，
+    合并导出中相同的网址、同一网站的图标在内存中只保存一份。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.document = BookmarkDocument()
+        self._dl_stack = []       # 每个打开的 DL 对应的文件夹
+        self._pending = None      # 刚读完 H3、等待其 DL 的文件夹
+        self._text = None         # 当前正在收集文本的 H3/A/TITLE
+        self._text_tag = None
+        self._link_attrs = None
+
+    def _current(self):
+        return self._dl_stack[-1] if self._dl_stack else self.document.root
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'dl':
+            self._dl_stack.append(self._pending or self._current())
+            self._pending = None
+        elif tag == 'dt':
+            self._pending = None
+        elif tag in ('h3', 'a', 'title'):
+            self._text = []
+            self._text_tag = tag
+            if tag == 'a':
+                intern = sys.intern
+                self._link_attrs = {intern(k): intern(v) if k in _INTERNED_ATTRS else v
+                                    for k, v in attrs if v is not None}
+
+    def handle_endtag(self, tag):
+        if tag == 'dl':
+            if self._dl_stack:
+                self._dl_stack.pop()
+            self._pending = None
+        elif tag == self._text_tag:
+            text = ''.join(self._text)
+            self._text = None
+            self._text_tag = None
+            if tag == 'title':
+                if self.document.title is None:
+                    self.document.title = text
+            elif tag == 'h3':
+                parent = self._current()
+                folder = Folder(sys.intern(text.strip()), parent)
+                parent.children.append(folder)
+                self._pending = folder
+            else:
+                attrs = self._link_attrs
+                href = sys.intern(attrs.pop('href', ''))
+                self._current().children.append(Link(text.strip(), href, attrs))
+                self._link_attrs = None
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+
+def parse_bookmarks(html_content):
+    """解析书签HTML字符串，返回 BookmarkDocument"""
+    parser = _BookmarkHTMLParser()
+    parser.feed(html_content)
+    parser.close()
+    return parser.document
+
+
+def parse_bookmark_file(path, chunk_size=1 << 16):
+    """分块读取并解析书签文件，不需要一次性读入整个文件
+
+    Chrome/Edge 的 Bookmarks 与 Firefox 的 JSON 备份交给 bookmark_import 解析，结果结构相同。
+    """
+    with open(path, 'rb') as f:
+        head = f.read(64).lstrip(b'\xef\xbb\xbf \t\r\n')
+    if head.startswith((b'{', b'mozLz40')):
+        from bookmark_import import parse_json_bookmark_file
+
+        return parse_json_bookmark_file(path, chunk_size)
+
+    parser = _BookmarkHTMLParser()
+    with open(path, 'r', encoding='utf-8') as f:
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            parser.feed(chunk)
+    parser.close()
+    return parser.document
+
+
+class CategoryRegistry:
+    """按 unique_id 索引的分类表：保持插入顺序，重复时先到者优先，插入与查找均为 O(1)"""
+
+    def __init__(self):
+        self._categories = {}
+
+    def add(self, unique_id, title, tag_type, anchor):
+        """新增分类并返回；unique_id 已存在时返回 None"""
+        if unique_id in self._categories:
+            return None
+        category = {
+            'title': title,
+            'unique_id': unique_id,  # 用于判断重复的唯一标识
+            'tag_type': tag_type,
+            'links': [],  # 直接引用文档中的 Link 节点，不复制文字与网址
+            'anchor': anchor
+        }
+        self._categories[unique_id] = category
+        return category
+
+    def get(self, unique_id):
+        return self._categories.get(unique_id)
+
+    def __contains__(self, unique_id):
+        return unique_id in self._categories
+
+    def __len__(self):
+        return len(self._categories)
+
+    def __iter__(self):
+        return iter(self._categories.values())
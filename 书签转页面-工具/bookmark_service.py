@@ -0,0 +1,261 @@
+"""常驻转换服务：通过本地HTTP（或Unix套接字）接收书签HTML，返回 md/top/tree 输出，结果按内容哈希缓存"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from bookmark_md import render_markdown
+from bookmark_parser import parse_bookmarks
+from bookmark_top import render_top_html
+from bookmark_tree import render_tree_html
+
+# 输出格式 -> (Content-Type, 渲染函数, 支持的查询参数)
+FORMATS = {
+    'md': ('text/markdown; charset=utf-8', render_markdown, ()),
+    'top': ('text/html; charset=utf-8', render_top_html, ('icons',)),
+    'tree': ('text/html; charset=utf-8', render_tree_html, ('lazy', 'search_index', 'icons')),
+}
+
+# 查询参数的默认值，与 render_top_html / render_tree_html 的默认参数一致
+DEFAULT_OPTIONS = {'lazy': False, 'search_index': True, 'icons': False}
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               411: 'Length Required', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+               500: 'Internal Server Error'}
+
+# 单个请求最多接受的请求头行数；每行长度由 StreamReader 的缓冲区上限（默认 64 KB）限制
+MAX_HEADER_LINES = 100
+
+
+def convert(data, fmt, options):
+    """在工作进程中执行：解码上传内容、解析并渲染，返回UTF-8编码的输出"""
+    _, render, _ = FORMATS[fmt]
+    text = data.decode('utf-8-sig')
+    if text.lstrip().startswith('{'):
+        import io
+
+        from bookmark_import import parse_json_bookmarks
+
+        document = parse_json_bookmarks(io.StringIO(text))  # Chrome/Firefox 的 JSON 书签
+    else:
+        document = parse_bookmarks(text)
+    return render(document, **options).encode('utf-8')
+
+
+class ResultCache:
+    """按总字节数淘汰的LRU缓存，键为 (内容哈希, 格式, 选项)"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """加入缓存并淘汰最久未使用的条目；单个结果超过容量时不缓存"""
+        if len(value) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'bytes': self.size, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+
+def _parse_bool(values, default):
+    if not values:
+        return default
+    return values[-1].lower() in ('1', 'true', 'yes', 'on')
+
+
+class ConversionService:
+    """事件循环负责收发请求，解析与渲染交给进程池；相同内容的并发请求只转换一次"""
+
+    def __init__(self, cache_bytes, workers=None, max_upload=None):
+        self.cache = ResultCache(cache_bytes)
+        self.max_upload = max_upload
+        # 工作进程在首个请求时才创建，fork 出来的子进程会继承当时的连接套接字，
+        # 导致父进程关闭连接后客户端仍收不到 EOF；改用 forkserver/spawn 启动
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self._inflight = {}  # 正在转换的键 -> Future
+
+    async def convert(self, data, fmt, options):
+        """返回 (输出字节, 是否命中缓存)"""
+        key = (hashlib.sha256(data).hexdigest(), fmt, tuple(sorted(options.items())))
+        if key in self._inflight:
+            self.cache.hits += 1
+            return await asyncio.shield(self._inflight[key]), True
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, True
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, convert, data, fmt, options)
+        self._inflight[key] = future
+        try:
+            body = await future
+        finally:
+            del self._inflight[key]
+        self.cache.put(key, body)
+        return body, False
+
+    async def handle(self, reader, writer):
+        """处理一个连接上的一次请求（响应后关闭连接）"""
+        try:
+            status, body, content_type, headers = await self._dispatch(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            status, body, content_type, headers = _error(500, f"转换过程中发生错误：{e}")
+
+        head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}",
+                "Connection: close"]
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _dispatch(self, reader):
+        request_line = await _read_line(reader)
+        if request_line is None:
+            return _error(400, "请求行过长")
+        request_line = request_line.split()
+        if len(request_line) != 3:
+            return _error(400, "请求行格式错误")
+        method, target, _ = request_line
+        headers = {}
+        header_lines = 0
+        while True:
+            line = await _read_line(reader)
+            if line is None:
+                return _error(431, "请求头过长")
+            line = line.strip()
+            if not line:
+                break
+            header_lines += 1
+            if header_lines > MAX_HEADER_LINES:
+                return _error(431, f"请求头超过 {MAX_HEADER_LINES} 行")
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        url = urlsplit(target)
+        if url.path == '/health':
+            return 200, b'ok', 'text/plain; charset=utf-8', {}
+        if url.path == '/stats':
+            body = json.dumps(self.cache.stats()).encode('utf-8')
+            return 200, body, 'application/json', {}
+        if url.path != '/convert':
+            return _error(404, "未知路径，请使用 POST /convert?format=md|top|tree")
+        if method != 'POST':
+            return _error(405, "只支持 POST")
+
+        query = parse_qs(url.query)
+        fmt = (query.get('format') or ['tree'])[-1]
+        if fmt not in FORMATS:
+            return _error(400, f"不支持的格式：{fmt}（可选 {', '.join(FORMATS)}）")
+        content_type, _, option_names = FORMATS[fmt]
+        options = {name: _parse_bool(query.get(name), DEFAULT_OPTIONS[name]) for name in option_names}
+
+        if 'content-length' not in headers:
+            return _error(411, "缺少 Content-Length")
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            return _error(400, "Content-Length 无效")
+        if length < 0:
+            return _error(400, "Content-Length 不能为负数")
+        if self.max_upload is not None and length > self.max_upload:
+            return _error(413, f"上传内容超过 {self.max_upload} 字节")
+        data = await reader.readexactly(length)
+
+        try:
+            body, hit = await self.convert(data, fmt, options)
+        except UnicodeDecodeError:
+            return _error(400, "上传内容不是UTF-8编码的书签HTML")
+        return 200, body, content_type, {'X-Cache': 'HIT' if hit else 'MISS'}
+
+    def close(self):
+        self.executor.shutdown()
+
+
+async def _read_line(reader):
+    """读取一行并解码；超过 StreamReader 的长度上限时返回 None"""
+    try:
+        return (await reader.readline()).decode('latin-1')
+    except (asyncio.LimitOverrunError, ValueError):  # readline 把 LimitOverrunError 转换为 ValueError
+        return None
+
+
+def _error(status, message):
+    return status, message.encode('utf-8'), 'text/plain; charset=utf-8', {}
+
+
+async def serve(service, host='127.0.0.1', port=8765, unix_path=None):
+    """启动服务并一直运行"""
+    if unix_path:
+        server = await asyncio.start_unix_server(service.handle, path=unix_path)
+        address = unix_path
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+        address = f"http://{host}:{port}"
+    print(f"书签转换服务已启动：{address}（POST /convert?format=md|top|tree，GET /stats 查看缓存）",
+          flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="常驻的书签转换服务，避免每次转换都重新启动解释器")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址（默认 127.0.0.1）")
+    parser.add_argument('--port', type=int, default=8765, help="监听端口（默认 8765）")
+    parser.add_argument('--unix', default=None, metavar='PATH', help="改为监听Unix套接字")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="转换进程数（默认使用全部CPU核心）")
+    parser.add_argument('--cache-mb', type=float, default=256, help="结果缓存容量（MB，默认 256）")
+    parser.add_argument('--max-upload-mb', type=float, default=64, help="单次上传大小上限（MB，默认 64）")
+    args = parser.parse_args(argv)
+
+    service = ConversionService(int(args.cache_mb * 1024 * 1024), args.workers,
+                                int(args.max_upload_mb * 1024 * 1024))
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("服务已停止")
+    finally:
+        service.close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+
+if __name__ == "__main__":
+    main()
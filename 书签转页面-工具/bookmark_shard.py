@@ -0,0 +1,90 @@
+"""分页输出：把很大的书签集合按顶层分类拆成多个互相链接的页面，浏览器只加载正在浏览的那一页"""
+import glob
+import os
+
+
+def split_units(parents):
+    """拆分单元：通常是顶层分类；与导航的初始展开方式一致，某一层只有一个分类时改用它的下一层
+
+    parents 为各分类的父分类序号（顶层为 -1），返回作为拆分单元的分类序号集合。
+    """
+    children = [[] for _ in parents]
+    level = []
+    for index, parent in enumerate(parents):
+        (children[parent] if parent >= 0 else level).append(index)
+    while len(level) == 1 and children[level[0]]:
+        level = children[level[0]]
+    return set(level)
+
+
+def group_categories(parents):
+    """把分类分组，每组为一个拆分单元及其全部子孙分类，返回各组的分类序号列表
+
+    分类表按文档顺序（先序）排列，只起包装作用的上层分类归入第一组。
+    """
+    units = split_units(parents)
+    unit_of = []
+    groups = {}
+    for index, parent in enumerate(parents):
+        unit = index if index in units else (unit_of[parent] if parent >= 0 else -1)
+        unit_of.append(unit)
+        groups.setdefault(unit, []).append(index)
+    wrappers = groups.pop(-1, [])
+    ordered = list(groups.values())
+    if ordered:
+        ordered[0] = wrappers + ordered[0]
+    elif wrappers:
+        ordered = [wrappers]
+    return ordered
+
+
+def estimate_bytes(cat):
+    """估算一个分类在页面中占用的字节数（中文按 UTF-8 三字节计，网址在链接中出现两次）"""
+    links = sum(3 * len(link.title) + 2 * len(link.href) + 50 for link in cat['links'])
+    return 3 * len(cat['title']) + 40 + links
+
+
+def plan_pages(categories, parents, page_kb=0):
+    """返回每个分类所在的页码（从 1 开始，0 留给索引页）
+
+    page_kb 为 0 时每个拆分单元（见 group_categories）单独一页；否则按估算体积依次装入页面，
+    一页放不下时另起一页，单个拆分单元超出预算时独占一页，不再拆开。
+    """
+    page_of = [0] * len(categories)
+    page = 0
+    used = 0
+    budget = page_kb * 1024
+    for group in group_categories(parents):
+        size = sum(estimate_bytes(categories[index]) for index in group)
+        if not page or not budget or used + size > budget:
+            page += 1
+            used = 0
+        used += size
+        for index in group:
+            page_of[index] = page
+    return page_of
+
+
+def page_files(output_file, count):
+    """索引页与各分页的文件名：<名称>_tree.html、<名称>_tree.1.html、<名称>_tree.2.html……"""
+    base, ext = os.path.splitext(os.path.basename(output_file))
+    return [f"{base}{ext}"] + [f"{base}.{number}{ext}" for number in range(1, count + 1)]
+
+
+def existing_page_files(output_file):
+    """磁盘上已有的分页与搜索索引文件（包括其预压缩文件），产出 (文件路径, 对应的分页或搜索索引路径)"""
+    base, ext = os.path.splitext(output_file)
+    for path in glob.glob(f"{glob.escape(base)}.*"):
+        part, _, rest = path[len(base) + 1:].partition('.')
+        if part.isdigit() and (rest == ext[1:] or rest.startswith(ext[1:] + '.')):
+            yield path, f"{base}.{part}{ext}"
+        elif part == 'search' and (rest == 'js' or rest.startswith('js.')):
+            yield path, f"{base}.search.js"
+
+
+def remove_stale_pages(output_file, keep=()):
+    """删除上次分页输出留下、本次不再生成的分页与搜索索引文件（包括其预压缩文件）"""
+    keep = {os.path.abspath(path) for path in keep}
+    for path, page in existing_page_files(output_file):
+        if os.path.abspath(page) not in keep:
+            os.remove(path)
@@ -0,0 +1,277 @@
+"""导出到 SQLite：把各书签集合的文件夹与链接批量写入数据库，建立 FTS5 全文索引，按相关度跨集合搜索"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from urllib.parse import urlsplit
+
+from bookmark_batch import find_bookmark_files
+from bookmark_cache import parse_bookmark_file_cached
+from bookmark_manifest import file_sha256
+from bookmark_merge import TOOLBAR_TITLES
+from bookmark_parser import Folder
+
+# 表结构变化时递增，旧数据库整体重建
+SCHEMA_VERSION = 1
+
+# 每个事务写入的行数：过小时提交开销占主导，过大时回滚日志占用内存
+BATCH_SIZE = 10000
+
+# trigram 分词至少需要三个字符，更短的词改用 LIKE 匹配
+TRIGRAM_MIN = 3
+
+# 相关度计算中标题、网址、文件夹路径的权重
+BM25_WEIGHTS = (10.0, 3.0, 1.0)
+
+SCHEMA = f"""
+CREATE TABLE collections (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,       -- 源文件的绝对路径
+    name TEXT NOT NULL,              -- 源文件名（不含扩展名），如 在线工具-大礼包
+    sha256 TEXT,                     -- 导入完成后才写入，未完成的导入下次会重做
+    link_count INTEGER NOT NULL DEFAULT 0,
+    indexed_at REAL
+);
+CREATE TABLE folders (
+    id INTEGER PRIMARY KEY,
+    collection_id INTEGER NOT NULL REFERENCES collections(id),
+    parent_id INTEGER REFERENCES folders(id),
+    title TEXT NOT NULL,
+    path TEXT NOT NULL               -- 从根开始的标题路径，以 " / " 分隔，不含浏览器顶层文件夹
+);
+CREATE TABLE hosts (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL UNIQUE
+);
+CREATE TABLE links (
+    id INTEGER PRIMARY KEY,
+    collection_id INTEGER NOT NULL REFERENCES collections(id),
+    folder_id INTEGER REFERENCES folders(id),
+    host_id INTEGER REFERENCES hosts(id),
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    add_date INTEGER
+);
+CREATE INDEX folders_collection ON folders(collection_id);
+CREATE INDEX links_collection ON links(collection_id);
+CREATE INDEX links_host ON links(host_id);
+-- 全文索引的内容取自视图，不重复保存标题与网址
+CREATE VIEW link_text AS
+    SELECT links.id, links.title, links.url, coalesce(folders.path, '') AS folder
+    FROM links LEFT JOIN folders ON folders.id = links.folder_id;
+CREATE VIRTUAL TABLE links_fts USING fts5(title, url, folder, content='link_text', content_rowid='id',
+                                          tokenize='trigram');
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+
+
+def connect(db_path):
+    """打开数据库，表结构版本不符时清空重建"""
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        for kind, name in conn.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'view') "
+                                       "AND name NOT LIKE 'sqlite_%' AND name NOT LIKE 'links_fts_%'").fetchall():
+            conn.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+        conn.executescript(SCHEMA)
+    return conn
+
+
+def _next_id(conn, table):
+    return conn.execute(f'SELECT coalesce(max(id), 0) + 1 FROM {table}').fetchone()[0]
+
+
+def _host(href):
+    try:
+        return (urlsplit(href).hostname or '').rstrip('.')
+    except ValueError:
+        return ''
+
+
+def index_document(conn, path, document, sha256=None):
+    """把一个书签集合写入数据库，先删除该集合之前的数据；返回写入的链接数
+
+    文件夹、链接的主键在内存中预先分配，按 BATCH_SIZE 行一批用 executemany 写入并提交。
+    """
+    path = os.path.abspath(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    row = conn.execute('SELECT id FROM collections WHERE path = ?', (path,)).fetchone()
+    with conn:
+        if row:
+            collection_id = row[0]
+            # 外部内容表的索引须用 delete 命令按原内容删除
+            conn.execute("INSERT INTO links_fts (links_fts, rowid, title, url, folder) "
+                         "SELECT 'delete', link_text.id, link_text.title, link_text.url, link_text.folder "
+                         "FROM link_text JOIN links ON links.id = link_text.id WHERE links.collection_id = ?",
+                         (collection_id,))
+            conn.execute('DELETE FROM links WHERE collection_id = ?', (collection_id,))
+            conn.execute('DELETE FROM folders WHERE collection_id = ?', (collection_id,))
+            conn.execute('UPDATE collections SET sha256 = NULL, link_count = 0 WHERE id = ?', (collection_id,))
+        else:
+            collection_id = conn.execute('INSERT INTO collections (path, name) VALUES (?, ?)', (path, name)).lastrowid
+
+    hosts = dict(conn.execute('SELECT host, id FROM hosts'))
+    folder_id = _next_id(conn, 'folders')
+    link_id = _next_id(conn, 'links')
+    host_id = _next_id(conn, 'hosts')
+    folder_rows, host_rows, link_rows, fts_rows = [], [], [], []
+    count = 0
+
+    def flush():
+        with conn:
+            conn.executemany('INSERT INTO folders VALUES (?, ?, ?, ?, ?)', folder_rows)
+            conn.executemany('INSERT INTO hosts VALUES (?, ?)', host_rows)
+            conn.executemany('INSERT INTO links VALUES (?, ?, ?, ?, ?, ?, ?)', link_rows)
+            conn.executemany('INSERT INTO links_fts (rowid, title, url, folder) VALUES (?, ?, ?, ?)', fts_rows)
+        for rows in (folder_rows, host_rows, link_rows, fts_rows):
+            rows.clear()
+
+    # 栈中每项：(子节点迭代器, 文件夹主键, 文件夹路径)
+    stack = [(iter(document.root.children), None, '')]
+    while stack:
+        nodes, parent_id, parent_path = stack[-1]
+        node = next(nodes, None)
+        if node is None:
+            stack.pop()
+            continue
+        if isinstance(node, Folder):
+            if node.title.lower() in TOOLBAR_TITLES:
+                folder_path = parent_path
+            else:
+                folder_path = f"{parent_path} / {node.title}" if parent_path else node.title
+            folder_rows.append((folder_id, collection_id, parent_id, node.title, folder_path))
+            stack.append((iter(node.children), folder_id, folder_path))
+            folder_id += 1
+            continue
+
+        host = _host(node.href)
+        if host not in hosts:
+            hosts[host] = host_id
+            host_rows.append((host_id, host))
+            host_id += 1
+        add_date = node.attrs.get('add_date')
+        link_rows.append((link_id, collection_id, parent_id, hosts[host], node.title, node.href,
+                          int(add_date) if add_date and add_date.isdigit() else None))
+        fts_rows.append((link_id, node.title, node.href, parent_path))
+        link_id += 1
+        count += 1
+        if len(link_rows) >= BATCH_SIZE:
+            flush()
+    flush()
+
+    with conn:
+        conn.execute('UPDATE collections SET sha256 = ?, link_count = ?, indexed_at = ? WHERE id = ?',
+                     (sha256, count, time.time(), collection_id))
+    return count
+
+
+def index_files(db_path, input_files, force=False):
+    """把书签文件写入数据库，内容未变化（按哈希判断）的集合跳过；返回 [(文件, 链接数或 None)]，None 表示跳过"""
+    conn = connect(db_path)
+    try:
+        indexed = dict(conn.execute('SELECT path, sha256 FROM collections'))
+        results = []
+        for input_file in input_files:
+            sha256 = file_sha256(input_file)
+            if not force and indexed.get(os.path.abspath(input_file)) == sha256:
+                results.append((input_file, None))
+                continue
+            document = parse_bookmark_file_cached(input_file, sha256)
+            results.append((input_file, index_document(conn, input_file, document, sha256)))
+        if any(count is not None for _, count in results):
+            conn.execute("INSERT INTO links_fts(links_fts) VALUES ('optimize')")
+            conn.commit()
+        return results
+    finally:
+        conn.close()
+
+
+def _like_pattern(term):
+    return '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def search(conn, query, limit=20, collection=None):
+    """按相关度返回匹配的链接：[(标题, 网址, 集合名, 文件夹路径)]
+
+    以空白分隔的各个词都要出现在标题、网址或文件夹路径中；三个字符及以上的词走 FTS5 trigram 索引，
+    按 bm25 排序（标题权重最高），更短的词（如两个汉字）用 LIKE 在链接表与文件夹表中过滤。
+    """
+    terms = query.split()
+    if not terms:
+        return []
+    long_terms = [term for term in terms if len(term) >= TRIGRAM_MIN]
+    joins = ''
+    conditions = []
+    params = []
+    if long_terms:
+        joins = 'JOIN links_fts ON links_fts.rowid = links.id '
+        conditions.append('links_fts MATCH ?')
+        params.append(' '.join('"' + term.replace('"', '""') + '"' for term in long_terms))
+    for term in terms:
+        if len(term) < TRIGRAM_MIN:
+            conditions.append("(links.title LIKE ? ESCAPE '\\' OR links.url LIKE ? ESCAPE '\\' OR links.folder_id IN "
+                              "(SELECT id FROM folders WHERE path LIKE ? ESCAPE '\\'))")
+            params.extend([_like_pattern(term)] * 3)
+    if collection:
+        conditions.append("collections.name LIKE ? ESCAPE '\\'")
+        params.append(_like_pattern(collection))
+    if long_terms:
+        order = 'bm25(links_fts, {}, {}, {})'.format(*BM25_WEIGHTS)
+    else:
+        # 没有可用于 bm25 的词时：标题命中优先，其次标题越短越相关
+        order = "links.title NOT LIKE ? ESCAPE '\\', length(links.title)"
+        params.append(_like_pattern(terms[0]))
+    sql = (f"SELECT links.title, links.url, collections.name, coalesce(folders.path, '') FROM links {joins}"
+           f"JOIN collections ON collections.id = links.collection_id LEFT JOIN folders ON folders.id = links.folder_id "
+           f"WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT ?")
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把书签导出到 SQLite 数据库并全文搜索")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    index_parser = subparsers.add_parser('index', help="把书签文件写入数据库（内容未变化的跳过）")
+    index_parser.add_argument('db', help="数据库文件，如 bookmarks.db")
+    index_parser.add_argument('paths', nargs='+', help="书签HTML文件、目录或通配符（如 '*-大礼包'）")
+    index_parser.add_argument('-f', '--force', action='store_true', help="忽略哈希，重新写入全部集合")
+    search_parser = subparsers.add_parser('search', help="全文搜索，按相关度输出")
+    search_parser.add_argument('db', help="数据库文件")
+    search_parser.add_argument('query', nargs='+', help="搜索词，多个词须同时出现")
+    search_parser.add_argument('-n', '--limit', type=int, default=20, help="最多输出的结果数（默认 20）")
+    search_parser.add_argument('-c', '--collection', default=None, help="只在名称包含该文字的集合中搜索")
+    args = parser.parse_args(argv)
+
+    if args.command == 'index':
+        input_files = find_bookmark_files(args.paths)
+        if not input_files:
+            print("错误：未找到书签HTML文件。")
+            sys.exit(1)
+        start = time.perf_counter()
+        results = index_files(args.db, input_files, args.force)
+        for input_file, count in results:
+            print(f"{'未变化，跳过' if count is None else f'写入 {count} 个链接'}  {input_file}")
+        written = [count for _, count in results if count is not None]
+        print(f"索引完成！写入 {len(written)} 个集合共 {sum(written)} 个链接，跳过 {len(results) - len(written)} 个，"
+              f"耗时 {time.perf_counter() - start:.2f} 秒：{args.db}")
+        return
+
+    if not os.path.exists(args.db):
+        print(f"错误：数据库不存在：{args.db}，请先运行 index 子命令。")
+        sys.exit(1)
+    conn = connect(args.db)
+    try:
+        start = time.perf_counter()
+        hits = search(conn, ' '.join(args.query), args.limit, args.collection)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+    for rank, (title, url, name, folder) in enumerate(hits, 1):
+        print(f"{rank:3}. {title}\n     {url}\n     {name}{' / ' + folder if folder else ''}")
+    print(f"共 {len(hits)} 条结果，耗时 {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""转换过程的分阶段统计：各阶段耗时、计数器与（可选）内存峰值，输出为文字摘要或JSON，并可交给外部回调收集
+
+未开启统计时 current() 返回空实现，各阶段计时只多一次函数调用，不影响转换速度。
+"""
+import functools
+import time
+
+_hooks = []
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _NullStats:
+    """未开启统计时使用：所有操作都不做任何事"""
+
+    enabled = False
+    trace_memory = False
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def count(self, name, n=1):
+        pass
+
+
+NULL_STATS = _NullStats()
+_current = NULL_STATS
+
+
+class _Stage:
+    __slots__ = ('stats', 'name', 'key', 'start')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        stats = self.stats
+        stats._path.append(self.name)
+        self.key = '/'.join(stats._path)
+        stats.stages.setdefault(self.key, 0.0)  # 按进入顺序排列，外层阶段在内层之前
+        if stats.trace_memory and hasattr(stats._tracemalloc, 'reset_peak'):  # Python 3.9+
+            stats._tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stats = self.stats
+        key = self.key
+        stats._path.pop()
+        stats.stages[key] = stats.stages.get(key, 0.0) + elapsed
+        if stats.trace_memory:
+            peak = stats._tracemalloc.get_traced_memory()[1]
+            stats.memory[key] = max(stats.memory.get(key, 0), peak)
+            # 外层阶段的峰值至少不低于内层
+            for depth in range(1, len(stats._path) + 1):
+                outer = '/'.join(stats._path[:depth])
+                stats.memory[outer] = max(stats.memory.get(outer, 0), peak)
+        return False
+
+
+class Stats:
+    """一次转换的统计结果
+
+    stages 为各阶段累计耗时（秒），嵌套阶段以 "外层/内层" 命名；counters 为计数器；
+    trace_memory 为 True 时用 tracemalloc 记录各阶段的内存峰值（字节，会明显拖慢转换，仅用于排查）。
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory=False):
+        self.stages = {}
+        self.counters = {}
+        self.memory = {}
+        self.trace_memory = trace_memory
+        self._path = []
+        if trace_memory:
+            import tracemalloc
+
+            self._tracemalloc = tracemalloc
+
+    def stage(self, name):
+        """计时的上下文管理器：with stats.stage('parse'): ..."""
+        return _Stage(self, name)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def as_dict(self):
+        result = {'stages': self.stages, 'counters': self.counters}
+        if self.trace_memory:
+            result['memory'] = self.memory
+        return result
+
+
+def current():
+    """当前正在收集的统计；未开启时为 NULL_STATS"""
+    return _current
+
+
+def collect(stats):
+    """在 with 块内把 stats 设为当前统计，各模块通过 current() 记录阶段与计数"""
+    return _Collecting(stats)
+
+
+class _Collecting:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        global _current
+        self._previous = _current
+        _current = self.stats
+        self._started = self.stats.trace_memory and not self.stats._tracemalloc.is_tracing()
+        if self._started:
+            self.stats._tracemalloc.start()
+        return self.stats
+
+    def __exit__(self, *exc):
+        global _current
+        _current = self._previous
+        if self._started:
+            self.stats._tracemalloc.stop()
+        return False
+
+
+def timed(name):
+    """装饰器：开启统计时把函数的执行计为一个阶段"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stats = _current
+            if not stats.enabled:
+                return func(*args, **kwargs)
+            with stats.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def merge(total, record):
+    """把一条统计记录（as_dict 的结果）累加到汇总中，内存峰值取最大值"""
+    for key in ('stages', 'counters'):
+        target = total.setdefault(key, {})
+        for name, value in record.get(key, {}).items():
+            target[name] = target.get(name, 0) + value
+    if 'memory' in record:
+        target = total.setdefault('memory', {})
+        for name, value in record['memory'].items():
+            target[name] = max(target.get(name, 0), value)
+    return total
+
+
+def format_stats(record):
+    """文字摘要：各阶段耗时（嵌套阶段缩进）、内存峰值与计数器"""
+    lines = ["阶段耗时："]
+    for name, seconds in record.get('stages', {}).items():
+        depth = name.count('/')
+        peak = record.get('memory', {}).get(name)
+        line = f"  {'  ' * depth}{name.rsplit('/', 1)[-1]:<{24 - 2 * depth}} {seconds * 1000:10.1f} ms"
+        if peak is not None:
+            line += f"  峰值 {peak / 1024 / 1024:8.1f} MB"
+        lines.append(line)
+    counters = record.get('counters', {})
+    if counters:
+        lines.append("计数：")
+        for name, value in counters.items():
+            lines.append(f"  {name:<26} {value:>12,}")
+    return '\n'.join(lines)
+
+
+def add_hook(hook):
+    """注册回调，每个文件转换完成后以 (输入文件, 统计记录) 调用，供任务调度器收集"""
+    _hooks.append(hook)
+
+
+def load_hook(spec):
+    """按 "模块:函数" 导入回调并注册，如 --stats-hook myjobs.metrics:collect；写法不对或无法导入时抛出 ValueError"""
+    import importlib
+
+    module_name, _, attr = spec.partition(':')
+    if not module_name or not attr:
+        raise ValueError(f"回调应写成 模块:函数 的形式：{spec}")
+    try:
+        module = importlib.import_module(module_name)
+    except Exception as e:
+        # 模块不存在，或导入时自身出错
+        raise ValueError(f"无法导入回调模块 {module_name}：{type(e).__name__}: {e}") from e
+    hook = getattr(module, attr, None)
+    if not callable(hook):
+        raise ValueError(f"模块 {module_name} 中没有可调用的 {attr}")
+    add_hook(hook)
+    return hook
+
+
+def emit(input_file, record):
+    for hook in _hooks:
+        hook(input_file, record)
@@ -1,128 +1,271 @@
 """解析书签HTML文件并转换为指定格式"""
+from bookmark_parser import UNCATEGORIZED_TITLE, CategoryRegistry, Folder, parse_bookmarks
+from bookmark_stats import current, timed
+
+# 页面样式，每条规则占一行
+TOP_CSS_RULES = [
+    'body { font-family: Arial, sans-serif; margin: 20px; }',
+    '.toc { background: #f5f5f5; padding: 15px; margin-bottom: 20px; border-radius: 5px; }',
+    '.toc h2 { margin-top: 0; }',
+    '.toc a { text-decoration: none; color: #0066cc; display: inline-block; margin: 5px 0; }',
+    '.toc a:hover { text-decoration: underline; }',
+    '.toc-h3 { padding-left: 20px; }',  # 子分类缩进
+    'h2 { color: #333; border-bottom: 2px solid #0066cc; padding-bottom: 5px; }',
+    'h3 { color: #666; margin-top: 25px; }',
+    'ol { margin-bottom: 20px; }',
+    'li { margin-bottom: 5px; }',
+]
+
+# 分页输出时附加的翻页栏样式
+PAGER_CSS_RULES = [
+    '.pager { margin-bottom: 20px; color: #666; }',
+    '.pager a { color: #0066cc; text-decoration: none; margin-right: 15px; }',
+]
+
+
 def parse_bookmark_html(html_content):
     """解析书签HTML文件并转换为指定格式"""
-    from bs4 import BeautifulSoup
-    import re
-    import os
-    import sys
+    return render_top_html(parse_bookmarks(html_content))
+
+
+def render_top_html(document, asset_link=None, icons=False, dead_links=None):
+    """将已解析的书签文档渲染为带顶部目录的HTML"""
+    return ''.join(iter_top_html(document, asset_link=asset_link, icons=icons, dead_links=dead_links))
+
+
+def write_top_html(document, f, asset_link=None, icons=False, dead_links=None):
+    """将HTML逐块写入已打开的文件句柄，不在内存中拼接整篇文档"""
+    f.writelines(iter_top_html(document, asset_link=asset_link, icons=icons, dead_links=dead_links))
 
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    result_html = []
-    result_html.append('<!DOCTYPE html>')
-    result_html.append('<html lang="zh-CN">')
-    result_html.append('<head>')
-    result_html.append('<meta charset="UTF-8">')
-    result_html.append('<meta name="viewport" content="width=device-width, initial-scale=1.0">')
-    
-    # 从原始HTML中提取标题
-    original_title = soup.title.string if soup.title else "书签导航"
-    result_html.append(f'<title>{original_title}</title>')
-    
-    result_html.append('<style>')
-    result_html.append('body { font-family: Arial, sans-serif; margin: 20px; }')
-    result_html.append('.toc { background: #f5f5f5; padding: 15px; margin-bottom: 20px; border-radius: 5px; }')
-    result_html.append('.toc h2 { margin-top: 0; }')
-    result_html.append('.toc a { text-decoration: none; color: #0066cc; display: inline-block; margin: 5px 0; }')
-    result_html.append('.toc a:hover { text-decoration: underline; }')
-    result_html.append('.toc-h3 { padding-left: 20px; }')  # 子分类缩进
-    result_html.append('h2 { color: #333; border-bottom: 2px solid #0066cc; padding-bottom: 5px; }')
-    result_html.append('h3 { color: #666; margin-top: 25px; }')
-    result_html.append('ol { margin-bottom: 20px; }')
-    result_html.append('li { margin-bottom: 5px; }')
-    result_html.append('</style>')
-
-    result_html.append('</head>')
-    result_html.append('<body>')
-    
-    # 找到所有的DT元素
-    all_dt_tags = soup.find_all('dt')
 
-    categories = []
-    current_category = None
+def top_css(paged=False):
+    """页面使用的完整CSS，拆分资源模式下写入共享的 bookmarks.<hash>.css"""
+    return '\n'.join(TOP_CSS_RULES + (PAGER_CSS_RULES if paged else [])) + '\n'
+
+
+@timed('categories')
+def build_categories(document):
+    """按文档顺序构建分类表，链接归入所在文件夹对应的分类
+
+    跳过的收藏夹标题、重复的分类沿用上级或先出现的同名分类；
+    不属于任何分类的链接归入“未分类”，该分类在第一个这样的链接处建立。
+    """
+    import re
+
+    categories = CategoryRegistry()
+    category_of = {}  # 文件夹 -> 其中链接所属的分类
+    duplicates = 0
     current_parent_category = None  # 记录当前父分类
     
-    # 遍历所有DT标签
-    for dt_tag in all_dt_tags:
-        h3_tag = dt_tag.find('h3')
-        a_tag = dt_tag.find('a')
-        
-        if h3_tag:
+    # 按文档顺序遍历所有文件夹与链接
+    for parent, node in document.walk_with_parent():
+        if isinstance(node, Folder):
             # 这是一个分类标题
-            title = h3_tag.get_text().strip()
+            title = node.title
             
-            # 跳过顶层无意义的收藏夹标题
+            # 跳过顶层无意义的收藏夹标题，其中的链接归入上级分类
             if title.lower() in ["bookmarks", "收藏夹", "收藏栏", "书签栏"]:
+                category_of[node] = category_of.get(parent)
                 continue
             
-            # 判断层级：通过检查H3的父DL的层级来判断
-            parent_dl = h3_tag.find_parent('dl')
-            is_main_category = False
-            if parent_dl and parent_dl.find_parent('dl') is None:  # 顶层DL下的分类
-                is_main_category = True
+            # 判断层级：顶层DL下的分类为主分类
+            is_main_category = node.depth == 0
+            if is_main_category:
                 current_parent_category = title  # 更新当前父分类
-            else:
-                # 子分类，使用父分类+子分类作为唯一标识
-                pass
 
             # 生成唯一标识：主分类-子分类（如果是子分类）
             unique_id = title if is_main_category else f"{current_parent_category}-{title}"
             
-            # 检查是否重复（通过唯一标识判断）
-            if any(cat['unique_id'] == unique_id for cat in categories):
-                continue
+            # 检查是否重复（通过唯一标识判断），锚点ID基于唯一标识生成
+            anchor_id = re.sub(r'[^\w\u4e00-\u9fff]', '', unique_id)
+            category = categories.add(unique_id, title, 'h2' if is_main_category else 'h3', anchor_id)
+            if category is None:
+                duplicates += 1
+                category = categories.get(unique_id)
+            category_of[node] = category
 
-            current_category = {
-                'title': title,
-                'unique_id': unique_id,  # 用于判断重复的唯一标识
-                'tag_type': 'h2' if is_main_category else 'h3',
-                'links': [],
-                'anchor': re.sub(r'[^\w\u4e00-\u9fff]', '', unique_id)  # 基于唯一标识生成锚点ID
-            }
-            categories.append(current_category)
+        elif node.href and node.title:
+            # 这是一个链接，添加到所在文件夹的分类下
+            category = category_of.get(parent)
+            if category is None:
+                category = categories.get(()) or categories.add((), UNCATEGORIZED_TITLE, 'h2', 'uncategorized')
+            category['links'].append(node)
 
-            
-        elif a_tag and current_category:
-            # 这是一个链接，添加到当前分类下
-            href = a_tag.get('href', '')
-            text = a_tag.get_text().strip()
-            if href and text:
-                current_category['links'].append((text, href))
-
-    # 生成目录 - 遍历所有分类
-    result_html.append('<div class="toc">')
-    result_html.append('<h2>目录</h2>')
-    result_html.append('<div class="toc-content">')  # 目录内容容器
+    current().count('top.duplicate_categories', duplicates)
+    return categories
+
+
+def iter_top_html(document, asset_link=None, icons=False, dead_links=None, pages=None):
+    """逐块产出HTML文本，各行之间以换行分隔
+
+    asset_link(content, ext) 不为空时样式不再内联，而是引用其返回的共享CSS地址。
+    icons 为 True 时在链接前显示书签自带的网站图标（见 bookmark_icons）。
+    dead_links 为失效网址集合（见 bookmark_linkcheck），其中的链接以删除线标记。
+    pages 由 iter_top_pages 传入，表示分页输出中的一页。
+    """
+    lines = _iter_top_html_lines(document, asset_link, icons, dead_links, pages)
+    yield next(lines)
+    for line in lines:
+        yield '\n' + line
+
+
+def _iter_top_html_lines(document, asset_link, icons, dead_links, pages=None):
+    yield '<!DOCTYPE html>'
+    yield '<html lang="zh-CN">'
+    yield '<head>'
+    yield '<meta charset="UTF-8">'
+    yield '<meta name="viewport" content="width=device-width, initial-scale=1.0">'
+    
+    # 从原始HTML中提取标题
+    original_title = document.title or "书签导航"
+    yield f'<title>{original_title}</title>'
+    
+    if pages:
+        categories = pages['categories']
+        page_categories = [cat for index, cat in enumerate(categories)
+                           if pages['page_of'][index] == pages['current']]
+    else:
+        categories = page_categories = build_categories(document)
+
+    if asset_link:
+        css_href = asset_link(top_css(paged=bool(pages)), 'css')
+        yield f'<link rel="stylesheet" href="{css_href}">'
+    else:
+        yield '<style>'
+        yield from TOP_CSS_RULES
+        if pages:
+            yield from PAGER_CSS_RULES
+        yield '</style>'
+
+    icon_of = {}
+    if icons:
+        from bookmark_icons import collect_icons
+
+        if pages:
+            # 各分页共用整个文档的图标表，但只输出本页链接用到的图标
+            icon_set, icon_of = pages['icons']
+            used = {icon_of.get((link.title, link.href)) for cat in page_categories for link in cat['links']}
+            used.discard(None)
+            css = icon_set.css(asset_link, used) if used else None
+        else:
+            icon_set, icon_of = collect_icons(document)
+            css = icon_set.css(asset_link) if icon_set else None
+        if css:
+            yield '<style>'
+            yield css
+            yield '</style>'
+
+    if dead_links:
+        from bookmark_linkcheck import DEAD_LINK_CSS
+
+        yield f'<style>{DEAD_LINK_CSS}</style>'
+    else:
+        dead_links = ()
+
+    yield '</head>'
+    yield '<body>'
+
+    if pages:
+        yield from _iter_pager(pages)
+
+    # 生成目录 - 遍历所有分类（分页输出时索引页与各分页都列出全部分类，其他页的分类链接到所在分页）
+    yield '<div class="toc">'
+    yield '<h2>目录</h2>'
+    yield '<div class="toc-content">'  # 目录内容容器
     
     # 遍历所有分类，包括h2和h3
-    for cat in categories:
+    for index, cat in enumerate(categories):
+        href = f'#{cat["anchor"]}'
+        if pages and pages['page_of'][index] != pages['current']:
+            href = pages['files'][pages['page_of'][index]] + href
         if cat['tag_type'] == 'h2':
             # 顶级分类
-            result_html.append(f'<a href="#{cat["anchor"]}">{cat["title"]}</a>')
+            yield f'<a href="{href}">{cat["title"]}</a>'
         else:
             # 子分类，添加缩进样式
-            result_html.append(f'<a href="#{cat["anchor"]}" class="toc-h3">{cat["title"]}</a>')
+            yield f'<a href="{href}" class="toc-h3">{cat["title"]}</a>'
     
-    result_html.append('</div>')  # 关闭目录内容容器
-    result_html.append('</div>')  # 关闭toc
+    yield '</div>'  # 关闭目录内容容器
+    yield '</div>'  # 关闭toc
     
     # 生成内容
-    for cat in categories:
+    for cat in page_categories:
         if cat['tag_type'] == 'h2':
-            result_html.append(f'<h2 id="{cat["anchor"]}">{cat["title"]}</h2>')
+            yield f'<h2 id="{cat["anchor"]}">{cat["title"]}</h2>'
         else:
-            result_html.append(f'<h3 id="{cat["anchor"]}">{cat["title"]}</h3>')
+            yield f'<h3 id="{cat["anchor"]}">{cat["title"]}</h3>'
         
         if cat['links']:
-            result_html.append('<ol>')
-            for link_text, link_url in cat['links']:
-                result_html.append(f'<li>{link_text}：<a href="{link_url}" target="_blank">{link_url}</a></li>')
-            result_html.append('</ol>')
+            yield '<ol>'
+            for link in cat['links']:
+                icon_class = icon_of.get((link.title, link.href))
+                icon = f'<i class="ico {icon_class}"></i>' if icon_class else ''
+                item = '<li class="dead">' if link.href in dead_links else '<li>'
+                yield f'{item}{icon}{link.title}：<a href="{link.href}" target="_blank">{link.href}</a></li>'
+            yield '</ol>'
     
-    result_html.append('</body>')
-    result_html.append('</html>')
-    
-    return '\n'.join(result_html)
+    yield '</body>'
+    yield '</html>'
+
+
+def _iter_pager(pages):
+    """分页输出的翻页栏：返回索引页、上一页、下一页"""
+    files = pages['files']
+    current = pages['current']
+    if not current:
+        return
+    links = [f'<a href="{files[0]}">分页目录</a>']
+    if current > 1:
+        links.append(f'<a href="{files[current - 1]}">上一页</a>')
+    if current < len(files) - 1:
+        links.append(f'<a href="{files[current + 1]}">下一页</a>')
+    yield f'<div class="pager">{"".join(links)}第 {current} / {len(files) - 1} 页</div>'
+
+
+def iter_top_pages(document, output_file, page_kb=0, asset_linker=None, icons=False, dead_links=None):
+    """分页输出：依次产出 (文件路径, 内容块迭代器)
+
+    output_file 为只含目录的索引页，目录中的分类链接到所在分页的锚点；
+    各分页写在同一目录下的 <名称>.1.html、<名称>.2.html……，拆分方式见 bookmark_shard.plan_pages。
+    asset_linker(页面路径) 不为空时返回该页使用的 asset_link。
+    """
+    import os
+
+    from bookmark_shard import page_files, plan_pages
+
+    categories = list(build_categories(document))
+    # 子分类（h3）归属于它前面最近的主分类（h2）
+    parents = []
+    main_index = -1
+    for index, cat in enumerate(categories):
+        if cat['tag_type'] == 'h2':
+            main_index = index
+        parents.append(-1 if cat['tag_type'] == 'h2' else main_index)
+    page_of = plan_pages(categories, parents, page_kb)
+    files = page_files(output_file, max(page_of, default=0))
+    directory = os.path.dirname(output_file)
+    icon_tables = None
+    if icons:
+        from bookmark_icons import collect_icons
+
+        icon_tables = collect_icons(document)
+
+    for current, name in enumerate(files):
+        pages = {'categories': categories, 'page_of': page_of, 'files': files, 'current': current,
+                 'icons': icon_tables}
+        path = os.path.join(directory, name)
+        yield path, iter_top_html(document, asset_link=asset_linker(path) if asset_linker else None,
+                                  icons=icons, dead_links=dead_links, pages=pages)
+
+
+def write_top_pages(document, output_file, page_kb=0, **options):
+    """分页写出全部页面，返回写出的文件路径列表"""
+    paths = []
+    for path, chunks in iter_top_pages(document, output_file, page_kb, **options):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(chunks)
+        paths.append(path)
+    return paths
 
 
 def main():
@@ -138,8 +281,10 @@ def main():
             sys.exit(1)
         
         # 检查文件是否为HTML
-        if not input_file.lower().endswith('.html'):
-            print("错误：文件类型不是HTML文件。")
+        from bookmark_import import has_bookmark_file_name
+
+        if not has_bookmark_file_name(input_file):
+            print("错误：文件类型不是书签HTML或JSON文件。")
             sys.exit(1)
 
         # 确定输出文件路径
@@ -148,13 +293,12 @@ def main():
         output_file = os.path.join(output_dir, f"{input_filename_without_ext}_top.html")
         
         # 读取、转换和写入文件
-        with open(input_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        converted_html = parse_bookmark_html(html_content)
+        from bookmark_cache import parse_bookmark_file_cached
+
+        document = parse_bookmark_file_cached(input_file)
         
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(converted_html)
+            write_top_html(document, f)
         
         print(f"转换完成！输出文件已保存到：{output_file}")
     
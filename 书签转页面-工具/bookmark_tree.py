@@ -1,93 +1,22 @@
 
-def parse_bookmark_html(html_content):
-    """解析书签HTML文件并转换为指定格式"""
-    from bs4 import BeautifulSoup
-    import re
-
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # 从原始HTML中提取标题
-    original_title = soup.title.string if soup.title else "书签导航"
-
-    # 找到所有的DT元素
-    all_dt_tags = soup.find_all('dt')
+from bookmark_parser import UNCATEGORIZED_TITLE, CategoryRegistry, Folder, parse_bookmarks
+from bookmark_stats import current, timed
 
-    categories = []
-    processed_links = set() # 用于存储已处理的链接，格式为 (text, href)
-    processed_category_titles = set() # 用于存储已处理的分类标题
-
-    # 遍历所有DT标签
-    for dt_tag in all_dt_tags:
-        h3_tag = dt_tag.find('h3')
-        a_tag = dt_tag.find('a')
-        
-        if h3_tag:
-            title = h3_tag.get_text().strip()
-            
-            # 跳过顶层无意义的收藏夹标题
-            if title.lower() in ["bookmarks", "收藏夹", "收藏栏", "书签栏"]:
-                continue
-            
-            # 检查分类是否重复
-            if title not in processed_category_titles:
-                # 简化逻辑：所有H3都视为一级分类
-                current_category = {
-                    'title': title,
-                    'links': []
-                }
-                categories.append(current_category)
-                processed_category_titles.add(title)
-                
-        elif a_tag:
-            href = a_tag.get('href', '')
-            text = a_tag.get_text().strip()
-            if href and text:
-                link_tuple = (text, href)
-                if link_tuple not in processed_links:
-                    if categories: # 确保有分类可以添加链接
-                        categories[-1]['links'].append(link_tuple)
-                        processed_links.add(link_tuple)
-
-    # 生成导航HTML
-    nav_html = '<ul>'
-    for cat in categories:
-        anchor_id = re.sub(r'[^\w\u4e00-\u9fff]', '', cat["title"])
-        nav_html += f'<li><a href="#{anchor_id}">{cat["title"]}</a></li>'
-    nav_html += '</ul>'
-    
-    # 生成内容HTML
-    content_html = ''
-    for cat in categories:
-        anchor_id = re.sub(r'[^\w\u4e00-\u9fff]', '', cat["title"])
-        content_html += f'<h2 id="{anchor_id}">{cat["title"]}</h2>'
-        if cat['links']:
-            content_html += '<ol>'
-            for link_text, link_url in cat['links']:
-                content_html += f'<li>{link_text}：<a href="{link_url}" target="_blank">{link_url}</a></li>'
-            content_html += '</ol>'
-
-    # 构建完整的HTML
-    html_template = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{original_title}</title>
-    <style>
-        * {{
+# 页面基础样式
+TREE_CSS = """        * {
             box-sizing: border-box;
-        }}
-        body {{
+        }
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
             margin: 0;
             padding: 0;
             background-color: #ffffff;
             height: 100vh;
             overflow: hidden;
-        }}
+        }
         
         /* 固定头部样式 */
-        .header {{
+        .header {
             position: fixed;
             top: 0;
             left: 0;
@@ -100,29 +29,29 @@ def parse_bookmark_html(html_content):
             padding: 0 20px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
             z-index: 1000;
-        }}
+        }
         
-        .header h1 {{
+        .header h1 {
             margin: 0;
             font-size: 20px;
             font-weight: 600;
             display: flex;
             align-items: center;
-        }}
+        }
         
-        .header .icon {{
+        .header .icon {
             margin-right: 12px;
             font-size: 24px;
-        }}
+        }
         
-        .container {{
+        .container {
             display: flex;
             width: 100%;
             height: 100vh;
             padding-top: 60px; /* 为固定头部留出空间 */
-        }}
+        }
         
-        .navigation-panel {{
+        .navigation-panel {
             width: 300px;
             flex-shrink: 0;
             background: #f8f9fa;
@@ -132,9 +61,9 @@ def parse_bookmark_html(html_content):
             border-right: 1px solid #e9ecef;
             box-shadow: 2px 0 4px rgba(0,0,0,0.1);
             height: calc(100vh - 60px);
-        }}
+        }
         
-        .navigation-panel h2 {{
+        .navigation-panel h2 {
             margin-top: 0;
             color: #212529;
             border-bottom: 2px solid #007bff;
@@ -142,9 +71,9 @@ def parse_bookmark_html(html_content):
             margin-bottom: 20px;
             font-size: 18px;
             font-weight: 600;
-        }}
+        }
         
-        #nav-search {{
+        #nav-search {
             width: 100%;
             padding: 10px 12px;
             margin-bottom: 20px;
@@ -153,25 +82,25 @@ def parse_bookmark_html(html_content):
             box-sizing: border-box;
             font-size: 14px;
             transition: border-color 0.15s ease-in-out, box-shadow 0.15s ease-in-out;
-        }}
+        }
         
-        #nav-search:focus {{
+        #nav-search:focus {
             outline: none;
             border-color: #007bff;
             box-shadow: 0 0 0 0.2rem rgba(0, 123, 255, 0.25);
-        }}
+        }
         
-        .nav-tree ul {{
+        .nav-tree ul {
             list-style: none;
             padding-left: 0;
             margin: 0;
-        }}
+        }
         
-        .nav-tree li {{
+        .nav-tree li {
             margin: 3px 0;
-        }}
+        }
         
-        .nav-tree li a {{
+        .nav-tree li a {
             text-decoration: none;
             color: #495057;
             display: block;
@@ -182,61 +111,82 @@ def parse_bookmark_html(html_content):
             text-overflow: ellipsis;
             font-size: 14px;
             transition: all 0.2s ease;
-        }}
+        }
         
-        .nav-tree li a:hover {{
+        .nav-tree li a:hover {
             background-color: #e9ecef;
             color: #007bff;
             text-decoration: none;
-        }}
+        }
         
-        .nav-tree li.hidden {{
+        .nav-tree li.hidden {
             display: none;
-        }}
+        }
         
-        .content-panel {{
+        .nav-tree ul ul {
+            padding-left: 16px;
+        }
+        
+        /* 有子分类时在左侧显示展开/收起按钮 */
+        .nav-toggle {
+            float: left;
+            width: 24px;
+            padding: 8px 0;
+            border: none;
+            background: none;
+            color: #6c757d;
+            font-size: 12px;
+            line-height: 1.4;
+            cursor: pointer;
+        }
+        
+        .nav-tree li > a:first-child {
+            margin-left: 24px;
+        }
+        
+        .content-panel {
             flex-grow: 1;
             padding: 30px;
             box-sizing: border-box;
             overflow-y: auto;
             background-color: #ffffff;
             height: calc(100vh - 60px);
-        }}
+        }
         
-        .content-panel h2, .content-panel h3, .content-panel h4, .content-panel h5, .content-panel h6 {{
+        .content-panel h2, .content-panel h3, .content-panel h4, .content-panel h5, .content-panel h6 {
             color: #212529;
             border-bottom: 2px solid #007bff;
             padding-bottom: 8px;
             margin-top: 40px;
             margin-bottom: 20px;
             font-weight: 600;
-        }}
+        }
         
-        .content-panel h2:first-child {{
+        .content-panel h2:first-child {
             margin-top: 0;
-        }}
+        }
         
-        .content-panel ol {{
+        .content-panel ol {
             margin-bottom: 25px;
             padding-left: 20px;
-        }}
+        }
         
-        .content-panel li {{
+        .content-panel li {
             margin-bottom: 8px;
             line-height: 1.6;
-        }}
+        }
         
-        .content-panel li a {{
+        .content-panel li a {
             color: #007bff;
             text-decoration: none;
             word-break: break-all;
-        }}
+        }
         
-        .content-panel li a:hover {{
+        .content-panel li a:hover {
             text-decoration: underline;
-        }}
+        }
         
-        #scrollToTopBtn {{
+        #scrollToTopBtn {
             display: none;
             position: fixed;
             bottom: 30px;
@@ -252,66 +202,795 @@ def parse_bookmark_html(html_content):
             font-size: 18px;
             box-shadow: 0 4px 8px rgba(0,0,0,0.2);
             transition: background-color 0.3s, transform 0.3s;
-        }}
+        }
         
-        #scrollToTopBtn:hover {{
+        #scrollToTopBtn:hover {
             background-color: #0056b3;
             transform: translateY(-2px);
-        }}
+        }
 
-        @media (max-width: 768px) {{
-            .header h1 {{
+        @media (max-width: 768px) {
+            .header h1 {
                 font-size: 16px;
-            }}
+            }
             
-            .header .icon {{
+            .header .icon {
                 font-size: 20px;
                 margin-right: 8px;
-            }}
+            }
             
-            .container {{
+            .container {
                 flex-direction: column;
-            }}
+            }
             
-            .navigation-panel {{
+            .navigation-panel {
                 width: 100%;
                 height: auto;
                 max-height: 40vh; /* Limit height on mobile */
                 border-right: none;
                 border-bottom: 1px solid #e9ecef;
-            }}
+            }
             
-            .content-panel {{
+            .content-panel {
                 padding: 20px;
                 height: auto;
-            }}
+            }
             
-            #scrollToTopBtn {{
+            #scrollToTopBtn {
                 bottom: 20px;
                 right: 20px;
                 padding: 12px;
                 font-size: 16px;
-            }}
-        }}
+            }
+        }
         
-        .navigation-panel::-webkit-scrollbar, .content-panel::-webkit-scrollbar {{
+        .navigation-panel::-webkit-scrollbar, .content-panel::-webkit-scrollbar {
             width: 6px;
-        }}
+        }
         
-        .navigation-panel::-webkit-scrollbar-track, .content-panel::-webkit-scrollbar-track {{
+        .navigation-panel::-webkit-scrollbar-track, .content-panel::-webkit-scrollbar-track {
             background: #f1f1f1;
-        }}
+        }
         
-        .navigation-panel::-webkit-scrollbar-thumb, .content-panel::-webkit-scrollbar-thumb {{
+        .navigation-panel::-webkit-scrollbar-thumb, .content-panel::-webkit-scrollbar-thumb {
             background: #c1c1c1;
             border-radius: 3px;
-        }}
+        }
         
-        .navigation-panel::-webkit-scrollbar-thumb:hover, .content-panel::-webkit-scrollbar-thumb:hover {{
+        .navigation-panel::-webkit-scrollbar-thumb:hover, .content-panel::-webkit-scrollbar-thumb:hover {
             background: #a8a8a8;
-        }}
-    </style>
-</head>
+        }
+"""
+
+# 页面主脚本：层级导航（子分类展开时才生成）、导航搜索（未启用搜索索引时）、平滑滚动、回到顶部、快捷键
+TREE_SCRIPT_HEAD = """        document.addEventListener("DOMContentLoaded", function() {
+            const navSearch = document.getElementById("nav-search");
+            const navTree = document.querySelector(".nav-tree");
+            const contentPanel = document.querySelector(".content-panel");
+            const scrollToTopBtn = document.getElementById("scrollToTopBtn");
+
+            // 分类数据：[锚点, 标题, 父分类编号（顶层为 -1）]，按文档顺序排列
+            const navData = JSON.parse(document.getElementById("nav-data").textContent);
+            const childrenOf = navData.map(function() { return []; });
+            const topLevel = [];
+            navData.forEach(function(cat, index) {
+                (cat[2] < 0 ? topLevel : childrenOf[cat[2]]).push(index);
+            });
+
+            // 分页输出时分类数据追加第四项页码，位于其他页面的分类链接到对应分页
+            const navPages = document.getElementById("nav-pages");
+            const pages = navPages ? JSON.parse(navPages.textContent) : null;
+
+            function categoryHref(cat) {
+                const page = pages && navData[cat][3];
+                return (pages && page !== pages.current ? pages.files[page] : "") + "#" + navData[cat][0];
+            }
+
+            function createNavItem(cat) {
+                const item = document.createElement("li");
+                item.dataset.cat = cat;
+                if (childrenOf[cat].length) {
+                    const toggle = document.createElement("button");
+                    toggle.className = "nav-toggle";
+                    toggle.setAttribute("aria-expanded", "false");
+                    toggle.textContent = "▸";
+                    item.appendChild(toggle);
+                }
+                const link = document.createElement("a");
+                link.href = categoryHref(cat);
+                link.textContent = navData[cat][1];
+                item.appendChild(link);
+                return item;
+            }
+
+            // only 不为空时只生成其中包含的分类
+            function createNavList(cats, only) {
+                const list = document.createElement("ul");
+                cats.forEach(function(cat) {
+                    if (!only || only.has(cat)) {
+                        list.appendChild(createNavItem(cat));
+                    }
+                });
+                return list;
+            }
+
+            function isExpanded(item) {
+                return item.lastElementChild.tagName === "UL";
+            }
+
+            // 展开时才生成子分类的DOM，收起时移除，折叠的分支不占用DOM节点
+            function expand(item, only) {
+                const toggle = item.querySelector(".nav-toggle");
+                if (!toggle || isExpanded(item)) {
+                    return null;
+                }
+                const list = createNavList(childrenOf[item.dataset.cat], only);
+                item.appendChild(list);
+                toggle.setAttribute("aria-expanded", "true");
+                toggle.textContent = "▾";
+                return list;
+            }
+
+            function collapse(item) {
+                const toggle = item.querySelector(".nav-toggle");
+                if (toggle && isExpanded(item)) {
+                    item.removeChild(item.lastElementChild);
+                    toggle.setAttribute("aria-expanded", "false");
+                    toggle.textContent = "▸";
+                }
+            }
+
+            function expandMatching(list, only) {
+                Array.from(list.children).forEach(function(item) {
+                    if (childrenOf[item.dataset.cat].some(function(cat) { return only.has(cat); })) {
+                        expandMatching(expand(item, only), only);
+                    }
+                });
+            }
+
+            // 初始状态：只显示顶层分类，某一层只有一个分类时自动展开（与页面中预先输出的导航一致）
+            function createInitialNav() {
+                const root = createNavList(topLevel);
+                let list = root;
+                while (list && list.children.length === 1) {
+                    list = expand(list.firstElementChild);
+                }
+                return root;
+            }
+
+            // 只显示指定分类及其祖先并展开；visible 为 null 时恢复初始状态
+            function filterNav(visible) {
+                let list;
+                if (visible) {
+                    const only = new Set();
+                    visible.forEach(function(cat) {
+                        for (let c = cat; c >= 0 && !only.has(c); c = navData[c][2]) {
+                            only.add(c);
+                        }
+                    });
+                    list = createNavList(topLevel, only);
+                    expandMatching(list, only);
+                } else {
+                    list = createInitialNav();
+                }
+                navTree.replaceChild(list, navTree.querySelector("ul"));
+            }
+
+            // 逐级展开祖先分类，返回该分类的导航链接
+            function revealCategory(cat) {
+                const chain = [];
+                for (let c = cat; c >= 0; c = navData[c][2]) {
+                    chain.unshift(c);
+                }
+                let item = null;
+                for (const c of chain) {
+                    if (item) {
+                        expand(item);
+                    }
+                    item = navTree.querySelector('li[data-cat="' + c + '"]');
+                    if (!item) {
+                        return null;
+                    }
+                }
+                return item.querySelector("a");
+            }
+
+            window.bookmarkNav = {
+                data: navData,
+                href: categoryHref,
+                filter: filterNav,
+                open: function(cat) {
+                    const link = revealCategory(cat);
+                    if (link) {
+                        link.click();
+                    }
+                }
+            };
+
+"""
+
+LEGACY_SEARCH_SCRIPT = """            // 搜索功能：按分类标题过滤导航
+            navSearch.addEventListener("input", function() {
+                const searchTerm = navSearch.value.toLowerCase().trim();
+                if (searchTerm === "") {
+                    filterNav(null);
+                    return;
+                }
+                const visible = [];
+                navData.forEach(function(cat, index) {
+                    if (cat[1].toLowerCase().includes(searchTerm)) {
+                        visible.push(index);
+                    }
+                });
+                filterNav(visible);
+            });
+
+"""
+
+TREE_SCRIPT_TAIL = """            // 展开/收起子分类，点击分类时平滑滚动定位
+            navTree.addEventListener("click", function(e) {
+                const toggle = e.target.closest(".nav-toggle");
+                if (toggle) {
+                    const item = toggle.parentElement;
+                    if (isExpanded(item)) {
+                        collapse(item);
+                    } else {
+                        expand(item);
+                    }
+                    return;
+                }
+                const link = e.target.closest("a");
+                if (!link || link.getAttribute("href").charAt(0) !== "#") {
+                    return; // 位于其他分页的分类交给浏览器跳转
+                }
+                e.preventDefault();
+                const targetId = link.getAttribute("href").substring(1);
+                const targetElement = document.getElementById(targetId);
+                if (targetElement) {
+                    contentPanel.scrollTo({
+                        top: targetElement.offsetTop - contentPanel.offsetTop, 
+                        behavior: "smooth"
+                    });
+                    
+                    // 高亮当前选中的导航项
+                    navTree.querySelectorAll("a").forEach(l => {
+                        l.style.backgroundColor = "";
+                        l.style.color = "";
+                    });
+                    link.style.backgroundColor = "#007bff";
+                    link.style.color = "#ffffff";
+                    
+                    // 3秒后恢复原样
+                    setTimeout(() => {
+                        link.style.backgroundColor = "";
+                        link.style.color = "";
+                    }, 3000);
+                }
+            });
+
+            // Scroll to Top button logic
+            contentPanel.addEventListener("scroll", function() {
+                if (contentPanel.scrollTop > 20) {
+                    scrollToTopBtn.style.display = "block";
+                } else {
+                    scrollToTopBtn.style.display = "none";
+                }
+            });
+
+            window.scrollToTop = function() {
+                contentPanel.scrollTo({
+                    top: 0, 
+                    behavior: "smooth" 
+                });
+            };
+
+            // 键盘快捷键支持
+            document.addEventListener("keydown", function(e) {
+                if (e.ctrlKey && e.key === "f") {
+                    e.preventDefault();
+                    navSearch.focus();
+                }
+            });
+        });
+"""
+
+# 搜索结果列表样式
+SEARCH_CSS = """
+        #search-results {
+            list-style: none;
+            padding: 0;
+            margin: 0 0 20px 0;
+        }
+        
+        #search-results li {
+            margin-bottom: 8px;
+            font-size: 13px;
+            line-height: 1.5;
+        }
+        
+        #search-results li a {
+            color: #007bff;
+            text-decoration: none;
+            word-break: break-all;
+        }
+        
+        #search-results .result-category {
+            display: block;
+            color: #6c757d;
+            font-size: 12px;
+        }
+        
+        #search-results .result-summary {
+            color: #6c757d;
+        }
+"""
+
+# 基于预构建倒排索引的搜索脚本：防抖查询，同时搜索链接文字、网址主机名与分类标题
+SEARCH_SCRIPT = r"""
+(function() {
+    // 分页输出时索引由共享的 .search.js 提供（见 SEARCH_LOADER_SCRIPT）
+    const index = window.bookmarkSearchIndex || JSON.parse(document.getElementById("search-index").textContent);
+    const keys = index.keys.split(" ");
+    const postings = index.postings.split(" ");
+    const navSearch = document.getElementById("nav-search");
+    const contentPanel = document.querySelector(".content-panel");
+    const linkCount = index.counts.reduce(function(a, b) { return a + b; }, 0);
+    const MAX_RESULTS = 100;
+    const CJK_CHAR = /[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]/;
+    const SEGMENT = /[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+|[^\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+/g;
+
+    const results = document.createElement("ul");
+    results.id = "search-results";
+    navSearch.insertAdjacentElement("afterend", results);
+
+    let categoryOf = null;    // 链接编号 -> 分类编号
+    let categoryStart = null; // 分类编号 -> 第一个链接编号
+    let linkItems = null;     // 非懒加载模式下内容区的 <li>
+
+    function init() {
+        categoryOf = new Uint32Array(linkCount);
+        categoryStart = [];
+        let offset = 0;
+        index.counts.forEach(function(count, cat) {
+            categoryStart.push(offset);
+            categoryOf.fill(cat, offset, offset + count);
+            offset += count;
+        });
+        if (!window.bookmarkData) {
+            linkItems = contentPanel.querySelectorAll("li");
+        }
+    }
+
+    // 与构建时一致的查询切分：[索引词, 是否按前缀匹配]
+    function queryTerms(query) {
+        const terms = [];
+        const runs = query.normalize("NFKC").toLowerCase().match(/[\p{L}\p{N}]+/gu) || [];
+        runs.forEach(function(run) {
+            run.match(SEGMENT).forEach(function(segment) {
+                if (!CJK_CHAR.test(segment[0]) || segment.length === 1) {
+                    terms.push([segment, true]);
+                    return;
+                }
+                for (let i = 0; i < segment.length - 1; i++) {
+                    terms.push([segment.substr(i, 2), false]);
+                }
+            });
+        });
+        return terms;
+    }
+
+    function lowerBound(key) {
+        let lo = 0;
+        let hi = keys.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (keys[mid] < key) {
+                lo = mid + 1;
+            } else {
+                hi = mid;
+            }
+        }
+        return lo;
+    }
+
+    // 查询单个词：返回命中的链接编号与分类编号
+    function lookup(term, prefix) {
+        const hit = { links: new Set(), cats: new Set() };
+        for (let i = lowerBound(term); i < keys.length; i++) {
+            if (prefix ? !keys[i].startsWith(term) : keys[i] !== term) {
+                break;
+            }
+            let doc = 0;
+            postings[i].split(",").forEach(function(delta) {
+                doc += parseInt(delta, 36);
+                if (doc < linkCount) {
+                    hit.links.add(doc);
+                } else {
+                    hit.cats.add(doc - linkCount);
+                }
+            });
+        }
+        return hit;
+    }
+
+    // 所有词都要命中；命中分类标题等同于命中该分类下的全部链接
+    function search(query) {
+        const terms = queryTerms(query);
+        if (!terms.length) {
+            return null;
+        }
+        const hits = terms.map(function(term) { return lookup(term[0], term[1]); });
+        const candidates = new Set(hits[0].links);
+        hits[0].cats.forEach(function(cat) {
+            for (let doc = categoryStart[cat]; doc < categoryStart[cat] + index.counts[cat]; doc++) {
+                candidates.add(doc);
+            }
+        });
+        const links = Array.from(candidates).filter(function(doc) {
+            return hits.every(function(hit) { return hit.links.has(doc) || hit.cats.has(categoryOf[doc]); });
+        }).sort(function(a, b) { return a - b; });
+        const cats = Array.from(hits[0].cats).filter(function(cat) {
+            return hits.every(function(hit) { return hit.cats.has(cat); });
+        });
+        return { links: links, cats: cats };
+    }
+
+    function linkInfo(doc) {
+        const cat = categoryOf[doc];
+        if (index.links) {
+            return index.links[doc];
+        }
+        if (window.bookmarkData) {
+            return window.bookmarkData[cat][2][doc - categoryStart[cat]];
+        }
+        const item = linkItems[doc];
+        const anchor = item.querySelector("a");
+        const text = item.textContent;
+        return [text.slice(0, text.length - anchor.textContent.length - 1), anchor.getAttribute("href")];
+    }
+
+    function showResults(matched) {
+        const visible = new Set(matched.cats);
+        const fragment = document.createDocumentFragment();
+        matched.links.forEach(function(doc, position) {
+            const cat = categoryOf[doc];
+            visible.add(cat);
+            if (position >= MAX_RESULTS) {
+                return;
+            }
+            const link = linkInfo(doc);
+            const item = document.createElement("li");
+            const anchor = document.createElement("a");
+            anchor.href = link[1];
+            anchor.target = "_blank";
+            anchor.title = link[1];
+            anchor.textContent = link[0];
+            const category = document.createElement("a");
+            category.className = "result-category";
+            category.href = window.bookmarkNav.href(cat);
+            category.dataset.category = cat;
+            category.textContent = window.bookmarkNav.data[cat][1];
+            item.append(anchor, category);
+            fragment.appendChild(item);
+        });
+        const summary = document.createElement("li");
+        summary.className = "result-summary";
+        summary.textContent = matched.links.length > MAX_RESULTS
+            ? "共 " + matched.links.length + " 条链接，显示前 " + MAX_RESULTS + " 条"
+            : "共 " + matched.links.length + " 条链接";
+        results.textContent = "";
+        results.append(summary, fragment);
+        window.bookmarkNav.filter(Array.from(visible));
+    }
+
+    function clearResults() {
+        results.textContent = "";
+        window.bookmarkNav.filter(null);
+    }
+
+    let timer = null;
+    navSearch.addEventListener("input", function() {
+        clearTimeout(timer);
+        timer = setTimeout(function() {
+            if (categoryOf === null) {
+                init();
+            }
+            const matched = search(navSearch.value);
+            if (matched === null) {
+                clearResults();
+            } else {
+                showResults(matched);
+            }
+        }, 150);
+    });
+
+    // 点击结果中的分类时复用导航的定位逻辑
+    results.addEventListener("click", function(e) {
+        const category = e.target.closest(".result-category");
+        if (category) {
+            e.preventDefault();
+            window.bookmarkNav.open(Number(category.dataset.category));
+        }
+    });
+})();
+"""
+
+LAZY_CSS = '#lazy-content section + section > :first-child { margin-top: 40px; }'
+
+# 懒加载模式下的内容区脚本：按分类生成占位区块，进入可视范围附近时才创建DOM，远离后释放
+LAZY_CONTENT_SCRIPT = """
+(function() {
+    const data = JSON.parse(document.getElementById("bookmark-data").textContent);
+    window.bookmarkData = data;
+    const container = document.getElementById("lazy-content");
+    const contentPanel = container.closest(".content-panel");
+
+    // 先用估算高度的空区块占位，保证滚动条与锚点位置大致正确
+    const sections = data.map(function(cat, index) {
+        const section = document.createElement("section");
+        section.id = cat[0];
+        section.dataset.index = index;
+        section.style.height = (80 + 34 * cat[2].length) + "px";
+        container.appendChild(section);
+        return section;
+    });
+
+    function renderSection(section) {
+        const cat = data[section.dataset.index];
+        const heading = document.createElement("h" + Math.min(2 + cat[3], 6));
+        heading.textContent = cat[1];
+        section.appendChild(heading);
+        if (cat[2].length) {
+            const list = document.createElement("ol");
+            cat[2].forEach(function(link) {
+                const item = document.createElement("li");
+                if (link[3]) {
+                    item.className = "dead";
+                }
+                if (link[2]) {
+                    const icon = document.createElement("i");
+                    icon.className = "ico " + link[2];
+                    item.appendChild(icon);
+                }
+                const anchor = document.createElement("a");
+                anchor.href = link[1];
+                anchor.target = "_blank";
+                anchor.textContent = link[1];
+                item.append(link[0] + "：", anchor);
+                list.appendChild(item);
+            });
+            section.appendChild(list);
+        }
+        section.style.height = "";
+        section.dataset.rendered = "1";
+    }
+
+    function releaseSection(section) {
+        section.style.height = section.offsetHeight + "px";
+        section.textContent = "";
+        delete section.dataset.rendered;
+    }
+
+    const observer = new IntersectionObserver(function(entries) {
+        entries.forEach(function(entry) {
+            const section = entry.target;
+            if (entry.isIntersecting) {
+                if (!section.dataset.rendered) {
+                    renderSection(section);
+                }
+            } else if (section.dataset.rendered) {
+                releaseSection(section);
+            }
+        });
+    }, { root: contentPanel, rootMargin: "1500px 0px" });
+    sections.forEach(function(section) {
+        observer.observe(section);
+    });
+
+    // 点击导航时先生成目标分类，再交给平滑滚动逻辑定位（子分类的导航项是动态生成的，因此在容器上监听）
+    document.querySelector(".nav-tree").addEventListener("click", function(e) {
+        const link = e.target.closest("a");
+        const section = link && document.getElementById(link.getAttribute("href").substring(1));
+        if (section && !section.dataset.rendered) {
+            renderSection(section);
+        }
+    });
+})();
+"""
+
+# 分页输出：页首的翻页栏与索引页的分页列表
+PAGER_CSS = """
+        .pager {
+            display: flex;
+            gap: 16px;
+            align-items: center;
+            margin-bottom: 20px;
+            color: #6c757d;
+            font-size: 14px;
+        }
+        
+        .pager a, .page-index a {
+            color: #007bff;
+            text-decoration: none;
+        }
+        
+        .page-index li {
+            margin-bottom: 10px;
+            line-height: 1.6;
+        }
+"""
+
+# 分页输出时的搜索：索引与搜索脚本写在各分页共用的 .search.js 中，首次聚焦搜索框时才加载
+SEARCH_LOADER_SCRIPT = """
+(function() {
+    const navSearch = document.getElementById("nav-search");
+    const pages = JSON.parse(document.getElementById("nav-pages").textContent);
+    navSearch.addEventListener("focus", function() {
+        const script = document.createElement("script");
+        script.src = pages.search;
+        document.body.appendChild(script);
+    }, { once: true });
+})();
+"""
+
+
+def parse_bookmark_html(html_content):
+    """解析书签HTML文件并转换为指定格式"""
+    return render_tree_html(parse_bookmarks(html_content))
+
+
+def render_tree_html(document, lazy=False, search_index=True, asset_link=None, icons=False, dead_links=None,
+                     offline=False):
+    """将已解析的书签文档渲染为左侧导航+搜索的HTML"""
+    return ''.join(iter_tree_html(document, lazy=lazy, search_index=search_index, asset_link=asset_link,
+                                  icons=icons, dead_links=dead_links, offline=offline))
+
+
+def write_tree_html(document, f, lazy=False, search_index=True, asset_link=None, icons=False, dead_links=None,
+                    offline=False):
+    """将HTML逐块写入已打开的文件句柄，不在内存中拼接整篇文档"""
+    f.writelines(iter_tree_html(document, lazy=lazy, search_index=search_index, asset_link=asset_link,
+                                icons=icons, dead_links=dead_links, offline=offline))
+
+
+@timed('categories')
+def build_categories(document):
+    """按文档顺序构建分类表，保留文件夹层级，链接全局去重
+
+    分类以从顶层开始的标题路径为唯一标识，不同父文件夹下的同名子文件夹是不同分类；
+    每个分类额外记录 depth（顶层为 0）与 parent（父分类在表中的序号，顶层为 -1）。
+    不属于任何分类的链接（直接放在书签栏或文档根部）归入顶层的“未分类”，
+    该分类在第一个这样的链接处建立，以空路径为唯一标识，不会与同名文件夹冲突。
+    """
+    import re
+
+    categories = CategoryRegistry() # 以标题路径为唯一标识
+    anchors = set()
+    seen_titles = {} # 已处理的链接：网址 → 第一次出现时的标题
+    more_titles = {} # 同一网址还以其他标题出现过时，其余标题的集合（少见）
+    duplicates = 0
+
+    def add_category(path, title, depth, parent):
+        # 锚点重复时追加序号，保证每个分类都能单独定位
+        anchor_id = base_anchor = re.sub(r'[^\w\u4e00-\u9fff]', '', title)
+        suffix = 2
+        while anchor_id in anchors:
+            anchor_id = f"{base_anchor}-{suffix}"
+            suffix += 1
+        anchors.add(anchor_id)
+        index = len(categories)
+        category = categories.add(path, title, f'h{min(depth + 2, 6)}', anchor_id)
+        category['index'] = index
+        category['depth'] = depth
+        category['parent'] = parent['index'] if parent else -1
+        return category
+
+    # 栈中保存 (子节点迭代器, 所属分类, 标题路径)，按文档顺序（先序）遍历
+    stack = [(iter(document.root.children), None, ())]
+    while stack:
+        nodes, category, path = stack[-1]
+        node = next(nodes, None)
+        if node is None:
+            stack.pop()
+        elif isinstance(node, Folder):
+            title = node.title
+
+            # 跳过顶层无意义的收藏夹标题，其子文件夹视为顶层分类
+            if not path and title.lower() in ["bookmarks", "收藏夹", "收藏栏", "书签栏"]:
+                stack.append((iter(node.children), None, ()))
+                continue
+
+            child_path = path + (title,)
+            child = categories.get(child_path)
+            if child is None:
+                child = add_category(child_path, title, len(path), category)
+            stack.append((iter(node.children), child, child_path))
+        else:
+            href = node.href
+            text = node.title
+            if href and text:
+                if category is None:
+                    category = categories.get(()) or add_category((), UNCATEGORIZED_TITLE, 0, None)
+                # 标题与网址都相同才算重复；分类中直接引用文档中的链接节点，不另外复制
+                first = seen_titles.get(href)
+                if first is None:
+                    seen_titles[href] = text
+                elif first == text or text in more_titles.get(href, ()):
+                    duplicates += 1
+                    continue
+                else:
+                    more_titles.setdefault(href, set()).add(text)
+                category['links'].append(node)
+
+    current().count('tree.duplicate_links', duplicates)
+    return categories
+
+
+def iter_tree_html(document, lazy=False, search_index=True, asset_link=None, icons=False, dead_links=None,
+                   pages=None, offline=False):
+    """逐块产出HTML文本：页面头部、导航、内容、页面尾部依次输出
+
+    lazy 为 True 时内容区不直接输出链接列表，而是嵌入紧凑的JSON数据，
+    由浏览器按可视范围虚拟化渲染，适合链接数量很大的书签文件。
+    search_index 为 True 时嵌入预构建的倒排索引，搜索框可检索全部链接；
+    为 False 时保留仅按分类标题过滤导航的旧搜索方式。
+    asset_link(content, ext) 不为空时CSS/JS不再内联，而是交给它写成共享资源文件，
+    页面只引用其返回的地址（见 bookmark_assets.AssetStore）。
+    icons 为 True 时在链接前显示书签自带的网站图标（见 bookmark_icons）。
+    dead_links 为失效网址集合（见 bookmark_linkcheck），其中的链接以删除线标记。
+    pages 由 iter_tree_pages 传入，表示分页输出中的一页，此时只输出属于该页的分类。
+    offline 为 True 时页面注册同名的 service worker，离线清单与 service worker 需另行生成（见 bookmark_offline）。
+    """
+    # 从原始HTML中提取标题
+    original_title = document.title or "书签导航"
+
+    if pages:
+        categories = pages['categories']
+        page_categories = [cat for cat in categories if pages['page_of'][cat['index']] == pages['current']]
+    else:
+        categories = page_categories = build_categories(document)
+
+    yield f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{original_title}</title>
+"""
+    if asset_link:
+        css_href = asset_link(tree_css(lazy, search_index, paged=bool(pages)), 'css')
+        yield f'    <link rel="stylesheet" href="{css_href}">\n'
+    else:
+        yield '    <style>\n'
+        yield TREE_CSS
+        if search_index:
+            yield SEARCH_CSS
+        if pages:
+            yield PAGER_CSS
+        yield '    </style>\n'
+
+    icon_of = {}
+    if icons:
+        from bookmark_icons import collect_icons
+
+        if pages:
+            # 各分页共用整个文档的图标表，但只输出本页链接用到的图标
+            icon_set, icon_of = pages['icons']
+            used = {icon_of.get((link.title, link.href)) for cat in page_categories for link in cat['links']}
+            used.discard(None)
+            if used:
+                yield f'    <style>\n{icon_set.css(asset_link, used)}\n    </style>\n'
+        else:
+            icon_set, icon_of = collect_icons(document)
+            if icon_set:
+                yield f'    <style>\n{icon_set.css(asset_link)}\n    </style>\n'
+    if dead_links:
+        from bookmark_linkcheck import DEAD_LINK_CSS
+
+        yield f'    <style>{DEAD_LINK_CSS}</style>\n'
+    else:
+        dead_links = ()
+    yield f"""</head>
 <body>
     <!-- 固定头部 -->
     <div class="header">
@@ -326,110 +1005,266 @@ def parse_bookmark_html(html_content):
             <h2>📚 目录导航</h2>
             <input type="text" id="nav-search" placeholder="🔍 搜索导航...">
             <div class="nav-tree">
-                {nav_html}
+                """
+
+    # 生成导航HTML：只输出顶层分类，子分类由脚本在展开时生成
+    yield from _iter_nav(categories, pages)
+
+    yield """
             </div>
         </div>
         <div class="content-panel">
-            {content_html}
+            """
+
+    # 生成内容HTML
+    if pages:
+        yield from _iter_pager(categories, pages)
+    if lazy:
+        yield from _iter_lazy_content(page_categories, inline=asset_link is None, icon_of=icon_of,
+                                      dead_links=dead_links)
+    else:
+        for cat in page_categories:
+            yield f'<{cat["tag_type"]} id="{cat["anchor"]}">{cat["title"]}</{cat["tag_type"]}>'
+            if cat['links']:
+                yield '<ol>'
+                for link in cat['links']:
+                    icon_class = icon_of.get((link.title, link.href))
+                    icon = f'<i class="ico {icon_class}"></i>' if icon_class else ''
+                    item = '<li class="dead">' if link.href in dead_links else '<li>'
+                    yield f'{item}{icon}{link.title}：<a href="{link.href}" target="_blank">{link.href}</a></li>'
+                yield '</ol>'
+
+    yield """
         </div>
     </div>
     <button onclick="scrollToTop()" id="scrollToTopBtn" title="回到顶部">⬆️</button>
 
-    <script>
-        document.addEventListener("DOMContentLoaded", function() {{
-            const navSearch = document.getElementById("nav-search");
-            const navTree = document.querySelector(".nav-tree");
-            const navLinks = navTree.querySelectorAll("a");
-            const contentPanel = document.querySelector(".content-panel");
-            const scrollToTopBtn = document.getElementById("scrollToTopBtn");
+"""
+    yield from _iter_nav_data(categories, pages)
+    if asset_link:
+        if search_index and not pages:
+            yield from _iter_search_index(categories)
+        js_href = asset_link(tree_script(lazy, search_index, paged=bool(pages), offline=offline), 'js')
+        yield f'    <script src="{js_href}"></script>\n'
+    else:
+        yield '    <script>\n'
+        yield _tree_main_script(search_index)
+        yield '    </script>\n'
+        if search_index and pages:
+            yield f'<script>{SEARCH_LOADER_SCRIPT}</script>'
+        elif search_index:
+            yield from _iter_search_index(categories)
+            yield f'<script>{SEARCH_SCRIPT}</script>'
+        if offline:
+            from bookmark_offline import OFFLINE_SCRIPT
 
-            // 搜索功能
-            navSearch.addEventListener("keyup", function() {{
-                const searchTerm = navSearch.value.toLowerCase().trim();
+            yield f'<script>{OFFLINE_SCRIPT}</script>'
+    yield """</body>
+</html>"""
 
-                // Show all if search term is empty
-                if (searchTerm === "") {{
-                    navTree.querySelectorAll("li").forEach(li => li.classList.remove("hidden"));
-                    return;
-                }}
-
-                // Hide all initially
-                navTree.querySelectorAll("li").forEach(li => li.classList.add("hidden"));
-
-                navLinks.forEach(link => {{
-                    const text = link.textContent.toLowerCase();
-                    const listItem = link.closest("li");
-
-                    if (text.includes(searchTerm)) {{
-                        listItem.classList.remove("hidden");
-                        // Show parent categories as well (not strictly needed with simplified menu, but good for robustness)
-                        let parent = listItem.parentElement.closest("li");
-                        while(parent) {{
-                            parent.classList.remove("hidden");
-                            parent = parent.parentElement.closest("li");
-                        }}
-                    }}
-                }});
-            }});
-
-            // 平滑滚动导航
-            navLinks.forEach(link => {{
-                link.addEventListener("click", function(e) {{
-                    e.preventDefault();
-                    const targetId = this.getAttribute("href").substring(1);
-                    const targetElement = document.getElementById(targetId);
-                    if (targetElement) {{
-                        contentPanel.scrollTo({{
-                            top: targetElement.offsetTop - contentPanel.offsetTop, 
-                            behavior: "smooth"
-                        }});
-                        
-                        // 高亮当前选中的导航项
-                        navLinks.forEach(l => {{
-                            l.style.backgroundColor = "";
-                            l.style.color = "";
-                        }});
-                        this.style.backgroundColor = "#007bff";
-                        this.style.color = "#ffffff";
-                        
-                        // 3秒后恢复原样
-                        setTimeout(() => {{
-                            this.style.backgroundColor = "";
-                            this.style.color = "";
-                        }}, 3000);
-                    }}
-                }});
-            }});
 
-            // Scroll to Top button logic
-            contentPanel.addEventListener("scroll", function() {{
-                if (contentPanel.scrollTop > 20) {{
-                    scrollToTopBtn.style.display = "block";
-                }} else {{
-                    scrollToTopBtn.style.display = "none";
-                }}
-            }});
+def tree_css(lazy=False, search_index=True, paged=False):
+    """页面使用的完整CSS，拆分资源模式下写入共享的 bookmarks.<hash>.css"""
+    return (TREE_CSS + (SEARCH_CSS if search_index else '') + (LAZY_CSS if lazy else '')
+            + (PAGER_CSS if paged else ''))
 
-            window.scrollToTop = function() {{
-                contentPanel.scrollTo({{
-                    top: 0, 
-                    behavior: "smooth" 
-                }});
-            }};
 
-            // 键盘快捷键支持
-            document.addEventListener("keydown", function(e) {{
-                if (e.ctrlKey && e.key === "f") {{
-                    e.preventDefault();
-                    navSearch.focus();
-                }}
-            }});
-        }});
-    </script>
-</body>
-</html>"""
+def tree_script(lazy=False, search_index=True, paged=False, offline=False):
+    """页面使用的完整JS，拆分资源模式下写入共享的 bookmarks.<hash>.js
+
+    懒加载脚本需在主脚本注册导航点击事件之前执行，搜索脚本需在搜索索引数据之后执行；
+    分页输出时搜索脚本随索引一起按需加载，这里只包含加载器。
+    """
+    search_script = (SEARCH_LOADER_SCRIPT if paged else SEARCH_SCRIPT) if search_index else ''
+    offline_script = ''
+    if offline:
+        from bookmark_offline import OFFLINE_SCRIPT
+
+        offline_script = OFFLINE_SCRIPT
+    return (LAZY_CONTENT_SCRIPT if lazy else '') + _tree_main_script(search_index) + search_script + offline_script
+
+
+def _tree_main_script(search_index):
+    return TREE_SCRIPT_HEAD + ('' if search_index else LEGACY_SEARCH_SCRIPT) + TREE_SCRIPT_TAIL
+
+
+def _category_href(cat, pages):
+    """分类的链接地址：分页输出时位于其他页的分类带上分页文件名"""
+    if pages and pages['page_of'][cat['index']] != pages['current']:
+        return f"{pages['files'][pages['page_of'][cat['index']]]}#{cat['anchor']}"
+    return f"#{cat['anchor']}"
+
+
+def _iter_nav(categories, pages=None):
+    """初始导航：顶层分类列表，某一层只有一个分类时直接展开到下一层"""
+    cats = list(categories)
+    children = [[] for _ in cats]
+    top_level = []
+    for cat in cats:
+        (children[cat['parent']] if cat['parent'] >= 0 else top_level).append(cat['index'])
+
+    level = top_level
+    closing = []
+    while True:
+        yield '<ul>'
+        expand = len(level) == 1 and children[level[0]]
+        for index in level:
+            cat = cats[index]
+            toggle = ''
+            if children[index]:
+                state = ('true', '▾') if expand else ('false', '▸')
+                toggle = f'<button class="nav-toggle" aria-expanded="{state[0]}">{state[1]}</button>'
+            yield f'<li data-cat="{index}">{toggle}<a href="{_category_href(cat, pages)}">{cat["title"]}</a>'
+            if not expand:
+                yield '</li>'
+        if not expand:
+            break
+        closing.append('</li></ul>')
+        level = children[level[0]]
+    yield '</ul>'
+    yield ''.join(reversed(closing))
+
+
+def _iter_nav_data(categories, pages=None):
+    """导航数据：每个分类的 [锚点, 标题, 父分类序号]，供脚本按需生成子分类导航
+
+    分页输出时每个分类追加第四项页码，另输出分页文件名列表、当前页码与搜索脚本地址。
+    """
+    yield '<script type="application/json" id="nav-data">'
+    if pages:
+        yield _json_for_script([[cat['anchor'], cat['title'], cat['parent'], pages['page_of'][cat['index']]]
+                                for cat in categories])
+        yield '</script>\n<script type="application/json" id="nav-pages">'
+        yield _json_for_script({'files': pages['files'], 'current': pages['current'], 'search': pages['search']})
+    else:
+        yield _json_for_script([[cat['anchor'], cat['title'], cat['parent']] for cat in categories])
+    yield '</script>\n'
+
+
+def _iter_pager(categories, pages):
+    """分页输出的页首：索引页列出各分页包含的顶层分类，分页显示返回索引与前后翻页"""
+    files = pages['files']
+    current = pages['current']
+    if not current:
+        yield '<h2>分页目录</h2><ol class="page-index">'
+        for number in range(1, len(files)):
+            cats = [cat for cat in categories if pages['page_of'][cat['index']] == number]
+            titles = '、'.join(cat['title'] for cat in cats if cat['index'] in pages['units'])
+            link_count = sum(len(cat['links']) for cat in cats)
+            yield f'<li><a href="{files[number]}">第 {number} 页</a>：{titles}（{link_count} 个链接）</li>'
+        yield '</ol>'
+        return
+    links = [f'<a href="{files[0]}">分页目录</a>']
+    if current > 1:
+        links.append(f'<a href="{files[current - 1]}">上一页</a>')
+    links.append(f'<span>第 {current} / {len(files) - 1} 页</span>')
+    if current < len(files) - 1:
+        links.append(f'<a href="{files[current + 1]}">下一页</a>')
+    yield f'<div class="pager">{"".join(links)}</div>'
+
+
+def iter_tree_pages(document, output_file, page_kb=0, lazy=False, search_index=True, asset_linker=None,
+                    icons=False, dead_links=None, offline=False):
+    """分页输出：依次产出 (文件路径, 内容块迭代器)
+
+    output_file 为索引页，各分页写在同一目录下的 <名称>.1.html、<名称>.2.html……（见 bookmark_shard），
+    按顶层分类拆分（见 bookmark_shard.plan_pages），page_kb 不为 0 时把多个分类装入约 page_kb KB 的一页。
+    每页的导航都包含全部分类，其他页的分类直接链接到对应分页的锚点；
+    启用搜索索引时另产出各页共用的 <名称>.search.js，首次使用搜索时才加载。
+    asset_linker(页面路径) 不为空时返回该页使用的 asset_link（见 bookmark_assets.AssetStore.linker）。
+    """
+    import os
+
+    from bookmark_shard import page_files, plan_pages, split_units
+
+    categories = list(build_categories(document))
+    parents = [cat['parent'] for cat in categories]
+    page_of = plan_pages(categories, parents, page_kb)
+    units = split_units(parents)
+    files = page_files(output_file, max(page_of, default=0))
+    directory = os.path.dirname(output_file)
+    search_file = f"{os.path.splitext(files[0])[0]}.search.js" if search_index else None
+    icon_tables = None
+    if icons:
+        from bookmark_icons import collect_icons
+
+        icon_tables = collect_icons(document)
+
+    for current, name in enumerate(files):
+        pages = {'categories': categories, 'page_of': page_of, 'files': files, 'current': current,
+                 'search': search_file, 'icons': icon_tables, 'units': units}
+        path = os.path.join(directory, name)
+        yield path, iter_tree_html(document, lazy=lazy, search_index=search_index,
+                                   asset_link=asset_linker(path) if asset_linker else None,
+                                   icons=icons, dead_links=dead_links, pages=pages, offline=offline)
+    if search_file:
+        yield os.path.join(directory, search_file), _iter_paged_search_script(categories)
+
+
+def _iter_paged_search_script(categories):
+    """分页输出共用的搜索脚本：搜索索引（附带全部链接，结果可指向其他分页）+ 搜索逻辑"""
+    from bookmark_search import build_search_index
+
+    index = build_search_index(categories)
+    index['links'] = [(link.title, link.href) for cat in categories for link in cat['links']]
+    yield f'window.bookmarkSearchIndex = {_json_for_script(index)};\n'
+    yield SEARCH_SCRIPT
+    # 加载期间已输入的内容立即搜索
+    yield 'document.getElementById("nav-search").dispatchEvent(new Event("input"));\n'
+
+
+def write_tree_pages(document, output_file, page_kb=0, **options):
+    """分页写出全部页面，返回写出的文件路径列表"""
+    paths = []
+    for path, chunks in iter_tree_pages(document, output_file, page_kb, **options):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(chunks)
+        paths.append(path)
+    return paths
+
+
+def _iter_search_index(categories):
+    from bookmark_search import build_search_index
+
+    yield '<script type="application/json" id="search-index">'
+    yield _json_for_script(build_search_index(categories))
+    yield '</script>'
+
+
+def _json_for_script(value):
+    """序列化为紧凑JSON，并转义 < 以便安全嵌入 <script> 标签"""
+    import json
+
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('<', '\\u003c')
+
+
+def _iter_lazy_content(categories, inline=True, icon_of=None, dead_links=()):
+    """懒加载模式的内容区：占位容器 + 分类JSON数据 + 虚拟化渲染脚本（inline 为 False 时样式与脚本由共享资源提供）
+
+    icon_of 不为空时，有图标的链接在JSON中追加第三项：图标的CSS类；
+    失效链接再追加第四项 1（没有图标时第三项为空字符串）。
+    """
+    if inline:
+        yield f'<style>{LAZY_CSS}</style>'
+    yield '<div id="lazy-content"></div>'
+    yield '<script type="application/json" id="bookmark-data">['
+    for index, cat in enumerate(categories):
+        if index:
+            yield ','
+        links = []
+        for link in cat['links']:
+            item = [link.title, link.href]
+            icon_class = icon_of.get((link.title, link.href)) if icon_of else None
+            if icon_class:
+                item.append(icon_class)
+            if link.href in dead_links:
+                item.extend(('', 1) if len(item) == 2 else (1,))
+            links.append(item)
+        yield _json_for_script([cat['anchor'], cat['title'], links, cat['depth']])
+    yield ']</script>'
+    if inline:
+        yield f'<script>{LAZY_CONTENT_SCRIPT}</script>'
 
-    return html_template
 
 def main():
     try:
@@ -447,18 +1282,17 @@ def main():
         base_name = os.path.splitext(os.path.basename(input_file))[0]
         output_file = os.path.join(output_dir, f"{base_name}_tree.html")
         
-        with open(input_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        converted_html = parse_bookmark_html(html_content)
+        from bookmark_cache import parse_bookmark_file_cached
+
+        document = parse_bookmark_file_cached(input_file)
         
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(converted_html)
+            write_tree_html(document, f)
         
         print(f"转换完成！输出文件已保存到：{output_file}")
         print("功能特性：")
         print("- 左右分栏布局，类似Word文档导航")
-        print("- 支持导航搜索功能")
+        print("- 支持全文搜索（链接标题、网址与分类）")
         print("- 平滑滚动定位")
         print("- 响应式设计，支持移动设备")
         print("- 现代化UI设计")
@@ -466,7 +1300,7 @@ def main():
         print("- 新增回到顶部按钮")
         print("- 头部标题显示书签文件名")
         print("- 链接去重")
-        print("- 简化左侧菜单，只显示一级分类")
+        print("- 左侧菜单保留完整文件夹层级，子分类按需展开")
         print("- 目录去重")
     
     except Exception as e:
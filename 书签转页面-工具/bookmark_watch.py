@@ -0,0 +1,123 @@
+"""监视书签导出文件的变化：Linux 下使用 inotify，其他平台或不可用时退回定时轮询，连续写入合并为一次通知"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from bookmark_import import has_bookmark_file_name
+
+# inotify 事件：写完关闭、移入（编辑器常先写临时文件再改名）、内容修改
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """通过 ctypes 调用 libc 的 inotify 接口监视目录，事件到达即返回，无需轮询"""
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify 仅在 Linux 上可用")
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._dirs = {}  # 监视描述符 -> 目录
+
+    def add(self, directory):
+        if directory in self._dirs.values():
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"无法监视目录：{directory}")
+        self._dirs[wd] = directory
+
+    def read(self, timeout=None):
+        """等待最多 timeout 秒（None 为一直等待），返回期间发生变化的文件路径集合"""
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return set()
+        changed = set()
+        data = os.read(self._fd, 1 << 16)
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name and wd in self._dirs:
+                changed.add(os.path.join(self._dirs[wd], os.fsdecode(name)))
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """定时比较目录中书签文件的修改时间与大小，适用于任何平台与网络文件系统"""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self._snapshots = {}  # 目录 -> {路径: (修改时间, 大小)}
+
+    def add(self, directory):
+        if directory not in self._snapshots:
+            self._snapshots[directory] = self._scan(directory)
+
+    @staticmethod
+    def _scan(directory):
+        snapshot = {}
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            return snapshot
+        with entries:
+            for entry in entries:
+                if has_bookmark_file_name(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read(self, timeout=None):
+        """每隔 interval 秒扫描一次，发现变化或超时后返回变化的文件路径集合"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for directory, old in self._snapshots.items():
+                new = self._scan(directory)
+                changed.update(path for path, stamp in new.items() if old.get(path) != stamp)
+                self._snapshots[directory] = new
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return changed
+            wait = self.interval if deadline is None else min(self.interval, max(deadline - time.monotonic(), 0))
+            time.sleep(wait)
+
+    def close(self):
+        self._snapshots.clear()
+
+
+def create_watcher(poll=False, interval=0.5):
+    """优先使用 inotify，不可用或指定 poll 时使用轮询"""
+    if not poll:
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            pass  # 非 Linux 或 libc 不提供 inotify
+    return PollingWatcher(interval)
+
+
+def wait_for_changes(watcher, debounce=0.2):
+    """阻塞直到有文件变化；此后 debounce 秒内不再有新变化才返回，一次保存引起的多次写入只触发一次重建"""
+    changed = watcher.read()
+    while True:
+        more = watcher.read(debounce)
+        if not more:
+            return changed
+        changed |= more
@@ -0,0 +1,118 @@
+"""bookmark_batch：增量构建清单记录生成的全部文件，任何一个被删除时重新生成；监视模式只在出现新的书签文件时重新扫描"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookmark_batch import find_bookmark_files, main, may_be_bookmark_file, watch  # noqa: E402
+from bookmark_manifest import MANIFEST_NAME  # noqa: E402
+
+BOOKMARKS = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks</H1>
+<DL><p>
+    <DT><H3>甲</H3>
+    <DL><p>
+        <DT><A HREF="https://a.example.com/">甲链接</A>
+    </DL><p>
+    <DT><H3>乙</H3>
+    <DL><p>
+        <DT><A HREF="https://b.example.com/">乙链接</A>
+    </DL><p>
+</DL><p>
+"""
+
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        # 解析缓存也写到临时目录，不使用真实的用户缓存目录
+        self._env = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': os.path.join(self.directory, 'cache')})
+        self._env.start()
+        self.source = os.path.join(self.directory, 'b.html')
+        with open(self.source, 'w', encoding='utf-8') as f:
+            f.write(BOOKMARKS)
+
+    def tearDown(self):
+        self._env.stop()
+        self._tmp.cleanup()
+
+    def run_batch(self):
+        """运行一次批量转换，返回本次转换的文件数"""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main([self.source, '--pages', '0', '--compress', '--split-assets', '--offline', '-j', '1'])
+        return int(output.getvalue().split('需要转换 ', 1)[1].split(' ', 1)[0])
+
+    def recorded_files(self):
+        with open(os.path.join(self.directory, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)['files']['b.html']['files']
+
+
+class ManifestFilesTest(BatchTestCase):
+    def test_deleting_any_generated_file_triggers_rebuild(self):
+        self.assertEqual(self.run_batch(), 1)
+        self.assertEqual(self.run_batch(), 0)
+        files = self.recorded_files()
+        for expected in ('b.md', 'b.md.gz', 'b_top.html', 'b_top.1.html.gz', 'b_tree.2.html',
+                         'b_tree.search.js', 'b_tree.sw.js', 'b_tree.offline.json'):
+            self.assertIn(expected, files)
+        self.assertTrue(any(name.startswith('bookmarks.') and name.endswith('.css') for name in files))
+        self.assertTrue(all(os.path.exists(os.path.join(self.directory, name)) for name in files))
+
+        for name in ('b_top.1.html.gz', 'b_tree.2.html', 'b_tree.search.js', 'b_tree.offline.json',
+                     next(name for name in files if name.endswith('.js') and name.startswith('bookmarks.'))):
+            os.remove(os.path.join(self.directory, name))
+            self.assertEqual(self.run_batch(), 1, name)
+            self.assertTrue(os.path.exists(os.path.join(self.directory, name)), name)
+            self.assertEqual(self.run_batch(), 0, name)
+
+
+class WatchTest(BatchTestCase):
+    def test_generated_files_are_not_bookmark_candidates(self):
+        self.run_batch()
+        files = self.recorded_files()
+        self.assertEqual([name for name in files if may_be_bookmark_file(os.path.join(self.directory, name))], [])
+        self.assertFalse(may_be_bookmark_file(os.path.join(self.directory, MANIFEST_NAME)))
+        for name in ('b.html', 'new.html', 'Bookmarks', 'bookmarks-2024.json', 'backup.jsonlz4'):
+            self.assertTrue(may_be_bookmark_file(os.path.join(self.directory, name)), name)
+
+    def test_only_new_inputs_trigger_rescan(self):
+        class FakeWatcher:
+            def add(self, directory):
+                pass
+
+            def close(self):
+                pass
+
+        events = [
+            # 本工具写出的输出、附属文件与清单
+            {os.path.join(self.directory, name) for name in
+             ('b.md', 'b_top.html', 'b_tree.2.html', 'b_tree.offline.json', 'b_top.html.gz', MANIFEST_NAME)},
+            {os.path.join(self.directory, 'new.html')},
+        ]
+
+        def wait_for_changes(watcher, debounce):
+            if not events:
+                raise KeyboardInterrupt
+            return events.pop(0)
+
+        args = mock.Mock(paths=[self.directory], poll=False, debounce=0, sqlite=None, stats=False)
+        with mock.patch('bookmark_watch.create_watcher', return_value=FakeWatcher()), \
+                mock.patch('bookmark_watch.wait_for_changes', wait_for_changes), \
+                mock.patch('bookmark_batch.find_bookmark_files', wraps=find_bookmark_files) as find, \
+                contextlib.redirect_stdout(io.StringIO()):
+            watch(args, {}, {})
+        # 启动时一次，new.html 出现时一次；输出文件的变化不触发重新扫描
+        self.assertEqual(find.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
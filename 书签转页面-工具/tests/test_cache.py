@@ -0,0 +1,97 @@
+"""bookmark_cache：解析缓存写到用户缓存目录，不在源文件旁留下文件；哈希与解析之间文件被改写时不写入缓存"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bookmark_cache  # noqa: E402
+from bookmark_cache import CACHE_DIR_NAME, parse_bookmark_file_cached  # noqa: E402
+from bookmark_manifest import file_sha256  # noqa: E402
+
+BOOKMARKS = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks</H1>
+<DL><p>
+    <DT><H3>工具</H3>
+    <DL><p>
+        <DT><A HREF="https://tool.example.com/">工具链接</A>
+    </DL><p>
+</DL><p>
+"""
+
+
+class CacheLocationTest(unittest.TestCase):
+    def test_cache_goes_to_user_cache_dir(self):
+        with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as cache_home:
+            source = os.path.join(source_dir, 'b.html')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.write(BOOKMARKS)
+            with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': cache_home}):
+                first = parse_bookmark_file_cached(source)
+                second = parse_bookmark_file_cached(source)
+            self.assertEqual(os.listdir(source_dir), ['b.html'])
+            entries = os.listdir(os.path.join(cache_home, CACHE_DIR_NAME))
+            self.assertEqual(len(entries), 1)
+            self.assertTrue(entries[0].endswith('.tree'))
+            # 第二次从缓存重建，内容与第一次解析相同
+            for document in (first, second):
+                links = [(link.title, link.href) for link in document.root.children[0].children]
+                self.assertEqual(links, [('工具链接', 'https://tool.example.com/')])
+
+
+
+class ChangedSourceTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self._tmp.name, 'b.html')
+        self.cache_dir = os.path.join(self._tmp.name, 'cache')
+        self.write(BOOKMARKS)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, text):
+        with open(self.source, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def cached(self):
+        return sorted(os.listdir(self.cache_dir)) if os.path.isdir(self.cache_dir) else []
+
+    @staticmethod
+    def titles(document):
+        return [link.title for link in document.root.children[0].children]
+
+    def test_stale_hash_from_caller_is_not_cached(self):
+        old_sha256 = file_sha256(self.source)
+        self.write(BOOKMARKS.replace('工具链接', '新的链接'))
+        document = parse_bookmark_file_cached(self.source, old_sha256, cache_dir=self.cache_dir)
+        self.assertEqual(self.titles(document), ['新的链接'])
+        self.assertEqual(self.cached(), [])
+        # 再次读取时按当前内容解析，不会拿到与哈希不符的缓存
+        document = parse_bookmark_file_cached(self.source, cache_dir=self.cache_dir)
+        self.assertEqual(self.titles(document), ['新的链接'])
+        self.assertEqual(self.cached(), [f"{file_sha256(self.source)}.tree"])
+
+    def test_change_during_parse_is_not_cached(self):
+        parse = bookmark_cache.parse_bookmark_file
+
+        def parse_then_modify(path):
+            document = parse(path)
+            self.write(BOOKMARKS.replace('工具链接', '解析期间改写'))
+            return document
+
+        with mock.patch.object(bookmark_cache, 'parse_bookmark_file', parse_then_modify):
+            parse_bookmark_file_cached(self.source, cache_dir=self.cache_dir)
+        self.assertEqual(self.cached(), [])
+
+    def test_matching_hash_is_cached(self):
+        sha256 = file_sha256(self.source)
+        parse_bookmark_file_cached(self.source, sha256, cache_dir=self.cache_dir)
+        self.assertEqual(self.cached(), [f"{sha256}.tree"])
+
+
+if __name__ == '__main__':
+    unittest.main()
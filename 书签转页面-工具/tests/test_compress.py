@@ -0,0 +1,130 @@
+"""bookmark_compress：按行压缩不改变页面内联脚本的语义，分块写入与整体写入结果相同，<style> 块按CSS压缩"""
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookmark_compress import MinifyWriter, minify_css, minify_line  # noqa: E402
+from bookmark_parser import parse_bookmarks  # noqa: E402
+from bookmark_top import write_top_html  # noqa: E402
+from bookmark_tree import write_tree_html  # noqa: E402
+
+BOOKMARKS = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<DL><p>
+    <DT><H3>工具</H3>
+    <DL><p>
+        <DT><A HREF="https://a.example.com/?q=1&amp;r=2">A // 不是注释</A>
+        <DT><A HREF="https://b.example.com/">/* 也不是注释 */</A>
+    </DL><p>
+    <DT><H3>学习</H3>
+    <DL><p>
+        <DT><A HREF="https://c.example.com/">C</A>
+    </DL><p>
+</DL><p>
+"""
+
+_SCRIPT_RE = re.compile(r'<script([^>]*)>(.*?)</script>', re.S)
+
+
+def minify(chunks):
+    out = io.StringIO()
+    writer = MinifyWriter(out)
+    writer.writelines(chunks)
+    writer.finish()
+    return out.getvalue()
+
+
+def script_lines(text):
+    """脚本中有意义的行：去掉缩进、空行与整行注释后的结果"""
+    return [line for line in map(minify_line, text.split('\n')) if line]
+
+
+class MinifyWriterTest(unittest.TestCase):
+    def test_chunking_does_not_matter(self):
+        text = "<div>\n    <p>a</p>\n\n    <!-- 注释 -->\n  // 注释\n  /* 注释 */\n  x = 1;\n</div>\n"
+        expected = minify([text])
+        self.assertEqual(expected, "<div>\n<p>a</p>\nx = 1;\n</div>")
+        for size in (1, 2, 3, 7):
+            self.assertEqual(minify(text[i:i + size] for i in range(0, len(text), size)), expected, size)
+
+    def test_inline_comment_markers_are_kept(self):
+        # 只有整行注释会被删除，行内的 // 与 /* */ 保留
+        text = 'const url = "https://example.com"; // 说明\nconst re = /a\\/*b/;\n'
+        self.assertEqual(minify([text]), 'const url = "https://example.com"; // 说明\nconst re = /a\\/*b/;')
+
+    def test_style_block(self):
+        text = "<style>\n  .a :hover {\n    color: red;\n  }\n  /* 注释 */\n  p { content: \"a  b\"; }\n</style>\n<p>x</p>\n"
+        self.assertEqual(minify([text]), '<style>\n.a :hover{color:red}p{content:"a  b"}</style>\n<p>x</p>')
+
+    def test_unclosed_style_is_flushed(self):
+        self.assertEqual(minify(["<style>\n  a { b: c; }\n"]), "<style>\na { b: c; }")
+
+    def test_minify_css(self):
+        self.assertEqual(minify_css('@media (max-width: 600px) {\n  .a > .b , .c { margin : 0 ; }\n}'),
+                         '@media (max-width:600px){.a>.b,.c{margin :0}}')
+
+
+class InlineScriptTest(unittest.TestCase):
+    """整页按行压缩后，每个内联脚本只少了缩进、空行与整行注释，且仍能被 JavaScript 引擎解析"""
+
+    def render(self, write, **kwargs):
+        document = parse_bookmarks(BOOKMARKS)
+        plain = io.StringIO()
+        write(document, plain, **kwargs)
+        return plain.getvalue(), minify(_render_chunks(write, document, kwargs))
+
+    def pages(self):
+        yield 'top', self.render(write_top_html)
+        yield 'tree', self.render(write_tree_html)
+        yield 'tree-lazy', self.render(write_tree_html, lazy=True)
+
+    def test_scripts_keep_their_statements(self):
+        for name, (plain, minified) in self.pages():
+            original = _SCRIPT_RE.findall(plain)
+            compressed = _SCRIPT_RE.findall(minified)
+            self.assertEqual(len(original), len(compressed), name)
+            for (attrs, body), (new_attrs, new_body) in zip(original, compressed):
+                self.assertEqual(attrs, new_attrs, name)
+                self.assertEqual(script_lines(body), script_lines(new_body), name)
+                if 'json' in attrs:
+                    self.assertEqual(json.loads(body), json.loads(new_body), name)
+            self.assertLess(len(minified), len(plain), name)
+
+    @unittest.skipUnless(shutil.which('node'), "需要 node 检查脚本语法")
+    def test_scripts_still_parse(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, (_, minified) in self.pages():
+                for number, (attrs, body) in enumerate(_SCRIPT_RE.findall(minified)):
+                    if 'json' in attrs or not body.strip():
+                        continue
+                    path = os.path.join(directory, f'{name}-{number}.js')
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(body)
+                    result = subprocess.run(['node', '--check', path], capture_output=True, text=True)
+                    self.assertEqual(result.returncode, 0, f"{name} #{number}: {result.stderr}")
+
+
+def _render_chunks(write, document, kwargs):
+    """收集写出函数逐块写入的内容，保持原来的分块"""
+    chunks = []
+
+    class Collector:
+        def write(self, text):
+            chunks.append(text)
+
+        def writelines(self, items):
+            chunks.extend(items)
+
+    write(document, Collector(), **kwargs)
+    return chunks
+
+
+if __name__ == '__main__':
+    unittest.main()
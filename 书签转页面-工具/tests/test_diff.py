@@ -0,0 +1,156 @@
+"""bookmark_diff：文件夹改名与移动的识别、链接变更分类、按分类对齐，以及 --sections 只构建一次分类表"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bookmark_diff  # noqa: E402
+from bookmark_diff import changed_categories, diff_documents, main, match_folders, snapshot  # noqa: E402
+from bookmark_md import build_categories  # noqa: E402
+from bookmark_parser import parse_bookmarks  # noqa: E402
+
+
+def bookmarks(body):
+    return f"<!DOCTYPE NETSCAPE-Bookmark-file-1>\n<DL><p>\n{body}</DL><p>\n"
+
+
+def folder(title, *items):
+    return f"<DT><H3>{title}</H3>\n<DL><p>\n{''.join(items)}</DL><p>\n"
+
+
+def link(title, href):
+    return f'<DT><A HREF="{href}">{title}</A>\n'
+
+
+OLD = bookmarks(folder('书签栏',
+                       folder('工具', link('A', 'https://a.example/'), link('B', 'https://b.example/'),
+                              link('C', 'https://c.example/'), folder('子', link('D', 'https://d.example/'))),
+                       folder('学习', link('E', 'https://e.example/'), link('F', 'https://f.example/')),
+                       folder('娱乐', link('G', 'https://g.example/'))))
+
+NEW = bookmarks(folder('书签栏',
+                       folder('实用工具', link('A', 'http://A.example/'), link('B', 'https://b.example/'),
+                              link('C2', 'https://c.example/'), folder('子', link('D', 'https://d.example/'))),
+                       folder('学习', link('E', 'https://e.example/')),
+                       folder('新', link('F', 'https://f.example/'), link('H', 'https://h.example/'))))
+
+
+class DiffDocumentsTest(unittest.TestCase):
+    def setUp(self):
+        self.report = diff_documents(parse_bookmarks(OLD), parse_bookmarks(NEW))
+
+    def test_folders(self):
+        # 子文件夹随父文件夹改名，不单独列出
+        self.assertEqual(self.report['folders'], {
+            'added': ['新'], 'removed': ['娱乐'],
+            'renamed': [{'from': '工具', 'to': '实用工具'}], 'moved': []})
+
+    def test_links(self):
+        links = self.report['links']
+        self.assertEqual(links['added'], [{'title': 'H', 'href': 'https://h.example/', 'folder': '新'}])
+        self.assertEqual(links['removed'], [{'title': 'G', 'href': 'https://g.example/', 'folder': '娱乐'}])
+        # 所在文件夹改名不算移动；网址只是大小写与协议不同时视为同一链接
+        self.assertEqual(links['moved'], [{'title': 'F', 'href': 'https://f.example/', 'from': '学习', 'to': '新'}])
+        self.assertEqual(links['renamed'], [{'href': 'https://c.example/', 'from': 'C', 'to': 'C2',
+                                             'folder': '实用工具'}])
+        self.assertEqual(self.report['summary']['links'], {'added': 1, 'removed': 1, 'moved': 1, 'renamed': 1})
+
+    def test_categories(self):
+        summary = self.report['summary']['categories']
+        self.assertEqual(len(self.report['categories']['changed']), summary['changed'])
+        self.assertEqual(len(self.report['categories']['removed']), summary['removed'])
+        self.assertTrue(summary['changed'])
+        self.assertTrue(summary['removed'])
+
+    def test_identical_documents(self):
+        report = diff_documents(parse_bookmarks(OLD), parse_bookmarks(OLD))
+        self.assertTrue(all(not count for counts in report['summary'].values() for count in counts.values()))
+
+    def test_precomputed_categories_are_used(self):
+        old, new = parse_bookmarks(OLD), parse_bookmarks(NEW)
+        old_categories, new_categories = build_categories(old), build_categories(new)
+        with mock.patch.object(bookmark_diff, 'build_categories') as build:
+            report = diff_documents(old, new, old_categories, new_categories)
+        build.assert_not_called()
+        self.assertEqual(report, self.report)
+
+
+class MatchFoldersTest(unittest.TestCase):
+    def match(self, old, new):
+        old_folders, old_links = snapshot(parse_bookmarks(old))
+        new_folders, new_links = snapshot(parse_bookmarks(new))
+        return match_folders(old_folders, new_folders, old_links, new_links)
+
+    def test_renamed_folder_and_children_follow(self):
+        self.assertEqual(self.match(OLD, NEW), {('', '工具'): ('', '实用工具'), ('', '工具', '子'): ('', '实用工具', '子')})
+
+    def test_moved_folder(self):
+        old = bookmarks(folder('甲', folder('子', link('A', 'https://a.example/'))) + folder('乙'))
+        new = bookmarks(folder('甲') + folder('乙', folder('子', link('A', 'https://a.example/'))))
+        self.assertEqual(self.match(old, new), {('甲', '子'): ('乙', '子')})
+        report = diff_documents(parse_bookmarks(old), parse_bookmarks(new))
+        self.assertEqual(report['folders']['moved'], [{'from': '甲 / 子', 'to': '乙 / 子'}])
+        self.assertEqual(report['links']['moved'], [])
+
+    def test_minority_of_links_is_not_a_match(self):
+        # 三个链接中只有一个出现在新文件夹里，不足一半
+        old = bookmarks(folder('旧', link('A', 'https://a.example/'), link('B', 'https://b.example/'),
+                               link('C', 'https://c.example/')))
+        new = bookmarks(folder('新', link('A', 'https://a.example/')))
+        self.assertEqual(self.match(old, new), {})
+
+    def test_each_new_folder_matches_once(self):
+        old = bookmarks(folder('甲', link('A', 'https://a.example/')) + folder('乙', link('B', 'https://b.example/')))
+        new = bookmarks(folder('丙', link('A', 'https://a.example/'), link('B', 'https://b.example/')))
+        self.assertEqual(self.match(old, new), {('甲',): ('丙',)})
+
+
+class ChangedCategoriesTest(unittest.TestCase):
+    def categories(self, text):
+        return build_categories(parse_bookmarks(text))
+
+    def test_changes_are_aligned_by_unique_id(self):
+        old = bookmarks(folder('甲', link('A', 'https://a.example/')) + folder('乙', link('B', 'https://b.example/'))
+                        + folder('丙', link('C', 'https://c.example/')))
+        new = bookmarks(folder('甲', link('A', 'https://a.example/')) + folder('乙', link('B2', 'https://b.example/'))
+                        + folder('丁', link('D', 'https://d.example/')))
+        changed, removed = changed_categories(self.categories(old), self.categories(new))
+        self.assertEqual([cat['title'] for cat in changed], ['乙', '丁'])
+        self.assertEqual([cat['title'] for cat in removed], ['丙'])
+
+    def test_link_order_counts_as_change(self):
+        old = bookmarks(folder('甲', link('A', 'https://a.example/'), link('B', 'https://b.example/')))
+        new = bookmarks(folder('甲', link('B', 'https://b.example/'), link('A', 'https://a.example/')))
+        changed, removed = changed_categories(self.categories(old), self.categories(new))
+        self.assertEqual(([cat['title'] for cat in changed], removed), (['甲'], []))
+        self.assertEqual(changed_categories(self.categories(old), self.categories(old)), ([], []))
+
+
+class MainTest(unittest.TestCase):
+    def test_sections_build_categories_once_per_version(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(os.environ, {'XDG_CACHE_HOME': os.path.join(directory, 'cache')}):
+            paths = []
+            for name, text in (('old.html', OLD), ('new.html', NEW)):
+                paths.append(os.path.join(directory, name))
+                with open(paths[-1], 'w', encoding='utf-8') as f:
+                    f.write(text)
+            sections = os.path.join(directory, 'sections.md')
+            with mock.patch.object(bookmark_diff, 'build_categories', wraps=build_categories) as build, \
+                    contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                main(paths + ['--sections', sections])
+            self.assertEqual(build.call_count, 2)
+            with open(sections, encoding='utf-8') as f:
+                text = f.read()
+        self.assertIn('[C2](https://c.example/)', text)
+        self.assertIn('[H](https://h.example/)', text)
+        self.assertNotIn('[G](https://g.example/)', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
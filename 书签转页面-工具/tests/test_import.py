@@ -0,0 +1,134 @@
+"""bookmark_import：流式 JSON 扫描器在任意块边界下结果相同，以及转义、Firefox 备份的特殊节点"""
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookmark_import import (MOZLZ4_MAGIC, is_json_bookmark_file, parse_json_bookmark_file,  # noqa: E402
+                             parse_json_bookmarks)
+from bookmark_parser import Folder  # noqa: E402
+
+# 手写的 JSON 文本，包含各种转义、代理对、需要跳过的同步数据与各类标量
+CHROME = r"""{
+   "checksum": "0123456789abcdef",
+   "roots": {
+      "bookmark_bar": {
+         "children": [ {
+            "date_added": "13300000000000000",
+            "guid": "00000000-0000-4000-a000-000000000001",
+            "id": "5",
+            "meta_info": { "sync": "\"quoted\" \\ back\\slash \\", "empty": "" },
+            "name": "引号\"与\\反斜杠",
+            "type": "url",
+            "url": "https://a.example.com/?q=&x"
+         }, {
+            "children": [ {
+               "name": "表情 \ud83d\ude00 与 \u00e9\t",
+               "type": "url",
+               "url": "https://b.example.com/"
+            } ],
+            "name": "子文件夹",
+            "type": "folder",
+            "visits": [ 1, -2.5, 3e2, true, false, null ]
+         } ],
+         "name": "书签栏",
+         "type": "folder"
+      },
+      "other": { "children": [ ], "name": "其他书签", "type": "folder" },
+      "synced": { "children": [ { "name": "同步", "type": "url", "url": "https://c.example.com/" } ],
+                  "name": "移动设备书签", "type": "folder" }
+   },
+   "version": 1
+}
+"""
+
+FIREFOX = {
+    'guid': 'root________', 'title': '', 'root': 'placesRoot', 'type': 'text/x-moz-place-container',
+    'children': [
+        {'guid': 'menu________', 'title': 'menu', 'root': 'bookmarksMenuFolder', 'type': 'text/x-moz-place-container',
+         'children': [
+             {'title': '最近使用的标签', 'type': 'text/x-moz-place', 'uri': 'place:type=6&sort=14&maxResults=10'},
+             {'title': '甲', 'type': 'text/x-moz-place', 'uri': 'https://a.example.com/', 'dateAdded': 1700000000000000,
+              'iconUri': 'https://a.example.com/favicon.ico'},
+             {'type': 'text/x-moz-place-separator'},
+             {'title': '乙', 'type': 'text/x-moz-place', 'uri': 'https://b.example.com/'},
+         ]},
+        {'guid': 'toolbar_____', 'title': 'toolbar', 'root': 'toolbarFolder', 'type': 'text/x-moz-place-container',
+         'children': [{'title': '丙', 'type': 'text/x-moz-place', 'uri': 'https://c.example.com/'}]},
+        {'guid': 'tags________', 'title': 'tags', 'root': 'tagsFolder', 'type': 'text/x-moz-place-container',
+         'children': [{'title': '标签', 'type': 'text/x-moz-place-container',
+                       'children': [{'title': '甲', 'type': 'text/x-moz-place', 'uri': 'https://a.example.com/'}]}]},
+        {'guid': 'mobile______', 'title': 'mobile', 'root': 'mobileFolder', 'type': 'text/x-moz-place-container',
+         'children': []},
+    ],
+}
+
+
+def outline(folder):
+    return [(node.title, outline(node)) if isinstance(node, Folder) else (node.title, node.href, dict(node.attrs))
+            for node in folder.children]
+
+
+def parse(text, chunk_size=1 << 16):
+    return parse_json_bookmarks(io.StringIO(text), chunk_size)
+
+
+class ChromeTest(unittest.TestCase):
+    def test_tree_escapes_and_surrogate_pairs(self):
+        self.assertEqual(outline(parse(CHROME).root), [
+            ('书签栏', [
+                ('引号"与\\反斜杠', 'https://a.example.com/?q=&x', {'add_date': '1655526400'}),
+                ('子文件夹', [('表情 😀 与 é', 'https://b.example.com/', {})]),
+            ]),
+            # 空的根文件夹（其他书签）不输出
+            ('移动设备书签', [('同步', 'https://c.example.com/', {})]),
+        ])
+
+    def test_every_chunk_size_gives_same_tree(self):
+        expected = outline(parse(CHROME).root)
+        for chunk_size in range(1, len(CHROME) + 1):
+            self.assertEqual(outline(parse(CHROME, chunk_size).root), expected, chunk_size)
+
+    def test_truncated_file_is_rejected(self):
+        for chunk_size in (1, 7, 1 << 16):
+            for end in (len(CHROME) // 2, CHROME.index('\\ud83d') + 3, len(CHROME.rstrip()) - 1):
+                with self.assertRaises(ValueError, msg=(chunk_size, end)):
+                    parse(CHROME[:end], chunk_size)
+
+
+class FirefoxTest(unittest.TestCase):
+    def test_special_nodes(self):
+        text = json.dumps(FIREFOX, ensure_ascii=False, indent=1)
+        expected = [
+            ('书签菜单', [
+                ('甲', 'https://a.example.com/', {'add_date': '1700000000',
+                                                 'icon_uri': 'https://a.example.com/favicon.ico'}),
+                ('乙', 'https://b.example.com/', {}),
+            ]),
+            ('书签栏', [('丙', 'https://c.example.com/', {})]),
+        ]
+        # place: 查询、分隔线与标签文件夹都跳过，空的移动设备书签不输出
+        for chunk_size in (1, 2, 5, 1 << 16):
+            self.assertEqual(outline(parse(text, chunk_size).root), expected, chunk_size)
+
+    def test_mozlz4_without_lz4_module(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bookmarks-2024-01-01.jsonlz4')
+            with open(path, 'wb') as f:
+                f.write(MOZLZ4_MAGIC + b'\x10\x00\x00\x00' + b'\x00' * 16)
+            self.assertTrue(is_json_bookmark_file(path))
+            try:
+                import lz4.block  # noqa: F401
+            except ImportError:
+                with self.assertRaisesRegex(ValueError, 'pip install lz4'):
+                    parse_json_bookmark_file(path)
+            else:
+                self.skipTest('已安装 lz4，缺少模块时的错误提示无法测试')
+
+
+if __name__ == '__main__':
+    unittest.main()
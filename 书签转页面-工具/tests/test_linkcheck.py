@@ -0,0 +1,197 @@
+"""bookmark_linkcheck：对本地桩服务器探测重定向、HEAD 改用 GET、连接复用、超时与格式错误的响应"""
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookmark_linkcheck import DEAD, OK, UNKNOWN, LinkCache, LinkChecker, check_links  # noqa: E402
+
+
+class StubServer:
+    """按路径返回预设响应的 HTTP/1.1 服务器，记录建立的连接数、收到的请求与被客户端关闭的连接数"""
+
+    def __init__(self):
+        self.connections = 0
+        self.closed_by_client = 0
+        self.requests = []
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    self.closed_by_client += 1
+                    return
+                method, path = head.decode('latin-1').split(' ', 2)[:2]
+                self.requests.append((method, path))
+                if path == '/slow':
+                    # 不响应，等待客户端超时后关闭连接
+                    await reader.read()
+                    self.closed_by_client += 1
+                    return
+                response = await self._respond(method, path.split('?')[0])
+                if response is None:
+                    return
+                writer.write(response)
+                await writer.drain()
+        except ConnectionError:
+            return
+        finally:
+            writer.close()
+
+    async def _respond(self, method, path):
+        if path == '/ok':
+            return b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n'
+        if path == '/redirect':
+            return b'HTTP/1.1 301 Moved Permanently\r\nLocation: /ok\r\nContent-Length: 0\r\n\r\n'
+        if path == '/redirect-gone':
+            return b'HTTP/1.1 302 Found\r\nLocation: /gone\r\nContent-Length: 0\r\n\r\n'
+        if path == '/gone':
+            return b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n'
+        if path == '/no-head':
+            if method == 'HEAD':
+                return b'HTTP/1.1 405 Method Not Allowed\r\nContent-Length: 0\r\n\r\n'
+            return b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok'
+        if path == '/close':
+            return b'HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: 0\r\n\r\n'
+        if path == '/short-status':
+            return b'HTTP/1.1\r\n\r\n'
+        if path == '/bad-status':
+            return b'HTTP/1.1 abc OK\r\n\r\n'
+        if path == '/not-http':
+            return b'hello\r\n\r\n'
+        if path == '/huge-headers':
+            return b'HTTP/1.1 200 OK\r\nX-Padding: ' + b'a' * (70 * 1024) + b'\r\n\r\n'
+        if path == '/eof':
+            return None  # 不响应直接关闭
+        return b'HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\n\r\n'
+
+
+class LinkCheckerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = await StubServer().start()
+        self.checker = LinkChecker(concurrency=4, per_host=1, timeout=0.5)
+
+    async def asyncTearDown(self):
+        self.checker.close()
+        await self.server.stop()
+
+    async def test_ok_and_dead(self):
+        self.assertEqual((await self.checker.check(self.server.url('/ok')))['state'], OK)
+        result = await self.checker.check(self.server.url('/gone'))
+        self.assertEqual((result['state'], result['status']), (DEAD, 404))
+
+    async def test_redirects_are_followed(self):
+        result = await self.checker.check(self.server.url('/redirect'))
+        self.assertEqual((result['state'], result['status']), (OK, 200))
+        result = await self.checker.check(self.server.url('/redirect-gone'))
+        self.assertEqual((result['state'], result['status']), (DEAD, 404))
+        self.assertIn(('HEAD', '/gone'), self.server.requests)
+
+    async def test_head_falls_back_to_get(self):
+        result = await self.checker.check(self.server.url('/no-head'))
+        self.assertEqual((result['state'], result['status']), (OK, 200))
+        self.assertEqual(self.server.requests, [('HEAD', '/no-head'), ('GET', '/no-head')])
+
+    async def test_keep_alive_connection_is_reused(self):
+        for number in range(3):
+            await self.checker.check(self.server.url(f'/ok?{number}'))
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.server.connections, 1)
+
+    async def test_stale_idle_connection_is_retried_without_dropping_others(self):
+        class StaleWriter:
+            closed = False
+
+            def write(self, data):
+                pass
+
+            async def drain(self):
+                pass
+
+            def close(self):
+                self.closed = True
+
+        stale_reader = asyncio.StreamReader()
+        stale_reader.feed_eof()
+        stale_writer = StaleWriter()
+        good = await asyncio.open_connection('127.0.0.1', self.server.port)
+        key = ('http', '127.0.0.1', self.server.port)
+        self.checker._idle[key] = [good, (stale_reader, stale_writer)]
+
+        result = await self.checker.check(self.server.url('/ok'))
+        self.assertEqual((result['state'], result['status']), (OK, 200))
+        self.assertTrue(stale_writer.closed)
+        # 其余空闲连接仍留在池中（之后由 close 关闭），重试用的新连接也放回池中
+        self.assertEqual(len(self.checker._idle[key]), 2)
+        self.assertIs(self.checker._idle[key][0], good)
+        self.assertEqual(self.server.connections, 2)
+
+    async def test_connection_close_is_not_reused(self):
+        await self.checker.check(self.server.url('/close'))
+        await self.checker.check(self.server.url('/ok'))
+        self.assertEqual(self.server.connections, 2)
+
+    async def test_timeout_closes_connection(self):
+        result = await self.checker.check(self.server.url('/slow'))
+        self.assertEqual((result['state'], result['status']), (UNKNOWN, None))
+        self.assertIn('超时', result['error'])
+        for _ in range(50):
+            if self.server.closed_by_client:
+                break
+            await asyncio.sleep(0.02)
+        self.assertEqual(self.server.closed_by_client, 1)
+
+    async def test_malformed_responses_are_unknown(self):
+        for path in ('/short-status', '/bad-status', '/not-http', '/huge-headers', '/eof'):
+            result = await self.checker.check(self.server.url(path))
+            self.assertEqual((result['state'], result['status']), (UNKNOWN, None), path)
+            self.assertTrue(result['error'], path)
+
+    async def test_check_links_survives_misbehaving_hosts(self):
+        paths = ['/ok', '/short-status', '/huge-headers', '/slow', '/gone', '/redirect', '/eof']
+        urls = [self.server.url(path) for path in paths]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LinkCache(os.path.join(directory, 'links.json'))
+            checked = await check_links(urls, cache, self.checker)
+        self.assertEqual(checked, len(urls))
+        states = [cache.entries[url]['state'] for url in urls]
+        self.assertEqual(states, [OK, UNKNOWN, UNKNOWN, UNKNOWN, DEAD, OK, UNKNOWN])
+        self.assertEqual(self.checker._idle, {})
+
+    async def test_unexpected_error_does_not_cancel_other_checks(self):
+        class FailingChecker(LinkChecker):
+            async def check(self, url):
+                if url.endswith('/boom'):
+                    raise RuntimeError('boom')
+                return await super().check(url)
+
+        checker = FailingChecker(per_host=1, timeout=0.5)
+        urls = [self.server.url('/boom'), self.server.url('/ok'), self.server.url('/gone')]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LinkCache(os.path.join(directory, 'links.json'))
+            await check_links(urls, cache, checker)
+        self.assertEqual([cache.entries[url]['state'] for url in urls], [UNKNOWN, OK, DEAD])
+        self.assertIn('RuntimeError', cache.entries[urls[0]]['error'])
+        self.assertEqual(checker._idle, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""bookmark_merge：URL 规范化、文档合并与去重、空文件夹清理，以及关闭分页/离线后清理旧文件"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookmark_merge import _prune_empty, main, merge_documents, normalize_url  # noqa: E402
+from bookmark_parser import Folder, Link, parse_bookmarks  # noqa: E402
+
+
+def outline(folder):
+    return [(node.title, outline(node)) if isinstance(node, Folder) else (node.title, node.href)
+            for node in folder.children]
+
+
+class NormalizeUrlTest(unittest.TestCase):
+    def test_equivalent_urls(self):
+        cases = {
+            # 协议与主机名大小写、http 与 https
+            'HTTP://Example.COM/Path': 'https://example.com/Path',
+            'https://EXAMPLE.com./': 'https://example.com',
+            # 默认端口去掉，其他端口保留
+            'http://example.com:80/a': 'https://example.com/a',
+            'https://example.com:443/a': 'https://example.com/a',
+            'http://example.com:443/a': 'https://example.com:443/a',
+            'https://example.com:8443/a': 'https://example.com:8443/a',
+            # 路径末尾的斜杠、片段与跟踪参数
+            'https://example.com/a/': 'https://example.com/a',
+            'https://example.com/a#section': 'https://example.com/a',
+            'https://example.com/a/?utm_source=x&b=1&fbclid=y&c=2#f': 'https://example.com/a?b=1&c=2',
+            'https://example.com/?utm_medium=x': 'https://example.com',
+            # 主机含用户信息、IPv6 时走 urlsplit
+            'https://user@Example.com/a/': 'https://example.com/a',
+            'http://[::1]:80/a/': 'https://[::1]/a',
+            'http://[::1]:8080/a': 'https://[::1]:8080/a',
+        }
+        for href, expected in cases.items():
+            self.assertEqual(normalize_url(href), expected, href)
+
+    def test_case_of_path_and_query_is_kept(self):
+        self.assertNotEqual(normalize_url('https://example.com/A'), normalize_url('https://example.com/a'))
+        self.assertEqual(normalize_url('https://example.com/?B=1'), 'https://example.com?B=1')
+
+    def test_other_schemes_and_empty(self):
+        self.assertEqual(normalize_url(' javascript:void(0) '), 'javascript:void(0)')
+        self.assertEqual(normalize_url('ftp://Example.com/'), 'ftp://Example.com/')
+        self.assertEqual(normalize_url(''), '')
+
+
+class MergeDocumentsTest(unittest.TestCase):
+    def test_merge_by_folder_path_and_dedup(self):
+        first = parse_bookmarks("""<TITLE>第一份</TITLE><DL><p>
+            <DT><H3>书签栏</H3><DL><p>
+                <DT><H3>工具</H3><DL><p>
+                    <DT><A HREF="https://a.example.com/">甲</A>
+                    <DT><A HREF="">空网址一</A>
+                </DL><p>
+            </DL><p>
+        </DL><p>""")
+        second = parse_bookmarks("""<TITLE>第二份</TITLE><DL><p>
+            <DT><H3>收藏夹</H3><DL><p>
+                <DT><H3>工具</H3><DL><p>
+                    <DT><A HREF="HTTP://A.example.com">甲（重复）</A>
+                    <DT><A HREF="https://b.example.com/">乙</A>
+                    <DT><A HREF="">空网址二</A>
+                </DL><p>
+                <DT><H3>只有重复</H3><DL><p>
+                    <DT><H3>子文件夹</H3><DL><p><DT><A HREF="https://b.example.com/#x">乙（重复）</A></DL><p>
+                </DL><p>
+            </DL><p>
+        </DL><p>""")
+        merged, duplicates = merge_documents([first, second])
+        self.assertEqual(merged.title, '第一份')
+        self.assertEqual(duplicates, 2)
+        # 书签栏与收藏夹视为同一个文件夹，沿用先出现的标题；空网址不参与去重；只剩空文件夹的分支被删除
+        self.assertEqual(outline(merged.root), [
+            ('书签栏', [('工具', [('甲', 'https://a.example.com/'), ('空网址一', ''),
+                                 ('乙', 'https://b.example.com/'), ('空网址二', '')])]),
+        ])
+
+    def test_prune_empty(self):
+        root = Folder(None)
+        kept = Folder('保留', root)
+        empty = Folder('空', kept)
+        empty.children.append(Folder('更深的空文件夹', empty))
+        kept.children.extend([empty, Link('链接', 'https://a.example.com/')])
+        root.children.extend([Folder('空', root), kept])
+        _prune_empty(root)
+        self.assertEqual(outline(root), [('保留', [('链接', 'https://a.example.com/')])])
+
+
+class MainCleanupTest(unittest.TestCase):
+    def test_stale_pages_and_offline_files_are_removed(self):
+        source = """<DL><p>
+            <DT><H3>甲</H3><DL><p><DT><A HREF="https://a.example.com/">甲链接</A></DL><p>
+            <DT><H3>乙</H3><DL><p><DT><A HREF="https://b.example.com/">乙链接</A></DL><p>
+        </DL><p>"""
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(os.environ, {'XDG_CACHE_HOME': os.path.join(directory, 'cache')}):
+            path = os.path.join(directory, 'b.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('<!DOCTYPE NETSCAPE-Bookmark-file-1>\n' + source)
+            prefix = os.path.join(directory, 'out', 'merged')
+
+            def run(*options):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    main([path, '-o', prefix, *options])
+                return sorted(os.listdir(os.path.dirname(prefix)))
+
+            files = run('--pages', '0', '--offline')
+            for name in ('merged_top.2.html', 'merged_tree.2.html', 'merged_tree.search.js',
+                         'merged_tree.sw.js', 'merged_tree.offline.json'):
+                self.assertIn(name, files)
+            self.assertEqual(run(), ['merged.md', 'merged_top.html', 'merged_tree.html'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""bookmark_offline：离线清单列出页面、各分页与搜索索引及其引用的共享资源，哈希与磁盘内容一致"""
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookmark_batch import main  # noqa: E402
+from bookmark_offline import HASH_LENGTH, build_offline_manifest, offline_paths  # noqa: E402
+
+BOOKMARKS = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks</H1>
+<DL><p>
+    <DT><H3>甲</H3>
+    <DL><p>
+        <DT><A HREF="https://a.example.com/">甲链接</A>
+    </DL><p>
+    <DT><H3>乙</H3>
+    <DL><p>
+        <DT><A HREF="https://b.example.com/">乙链接</A>
+    </DL><p>
+</DL><p>
+"""
+
+
+def sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+
+
+class OfflineManifestTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        self._env = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': os.path.join(self.directory, 'cache')})
+        self._env.start()
+        source = os.path.join(self.directory, 'b.html')
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(BOOKMARKS)
+        with contextlib.redirect_stdout(io.StringIO()):
+            main([source, '--pages', '0', '--split-assets', '--offline', '-j', '1'])
+        self.page = os.path.join(self.directory, 'b_tree.html')
+
+    def tearDown(self):
+        self._env.stop()
+        self._tmp.cleanup()
+
+    def test_lists_pages_shards_and_assets(self):
+        manifest = build_offline_manifest(self.page)
+        pages = ['b_tree.html', 'b_tree.1.html', 'b_tree.2.html', 'b_tree.search.js']
+        page_text = ''
+        for name in pages:
+            with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                page_text += f.read()
+        # 共享资源中只有 _tree 页面引用的才列入，_top 页面独有的样式不在其中
+        assets = [os.path.basename(path) for path in glob.glob(os.path.join(self.directory, 'bookmarks.*'))]
+        used = sorted(name for name in assets if name in page_text)
+        self.assertTrue(used)
+        self.assertLess(len(used), len(assets))
+        self.assertEqual(list(manifest['files']), pages + used)
+        for name, digest in manifest['files'].items():
+            self.assertEqual(digest, sha256(os.path.join(self.directory, name)), name)
+        expected_version = hashlib.sha256(json.dumps(manifest['files'], sort_keys=True).encode('utf-8'))
+        self.assertEqual(manifest['version'], expected_version.hexdigest()[:HASH_LENGTH])
+
+    def test_written_manifest_matches_and_tracks_changes(self):
+        worker_file, manifest_file = offline_paths(self.page)
+        self.assertTrue(os.path.exists(worker_file))
+        with open(manifest_file, encoding='utf-8') as f:
+            written = json.load(f)
+        self.assertEqual(written, build_offline_manifest(self.page))
+        # 任何一个分页变化，哈希与版本号都随之变化
+        with open(os.path.join(self.directory, 'b_tree.2.html'), 'a', encoding='utf-8') as f:
+            f.write('\n')
+        changed = build_offline_manifest(self.page)
+        self.assertNotEqual(changed['files']['b_tree.2.html'], written['files']['b_tree.2.html'])
+        self.assertNotEqual(changed['version'], written['version'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+"""bookmark_parser：单遍解析器构建的文件夹/链接树、分块解析、JSON 格式识别，以及 md、top 按所在文件夹归类链接"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bookmark_md  # noqa: E402
+import bookmark_top  # noqa: E402
+from bookmark_parser import (UNCATEGORIZED_TITLE, CategoryRegistry, Folder, parse_bookmark_file,  # noqa: E402
+                             parse_bookmarks)
+
+# 子文件夹关闭（</DL><p>）之后，父文件夹中还有链接
+NESTED = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks</H1>
+<DL><p>
+    <DT><H3>文库学术</H3>
+    <DL><p>
+        <DT><A HREF="https://before.example.com/">子文件夹之前</A>
+        <DT><H3>论文</H3>
+        <DL><p>
+            <DT><A HREF="https://paper.example.com/">论文链接</A>
+        </DL><p>
+        <DT><A HREF="https://separator.example.com/">————————————</A>
+    </DL><p>
+    <DT><H3>工具</H3>
+    <DL><p>
+        <DT><A HREF="https://tool.example.com/">工具链接</A>
+    </DL><p>
+</DL><p>
+"""
+
+
+def outline(folder):
+    """把文件夹树转换为便于比较的嵌套列表"""
+    return [(node.title, outline(node)) if isinstance(node, Folder) else (node.title, node.href)
+            for node in folder.children]
+
+
+class NestedFolderTest(unittest.TestCase):
+    def setUp(self):
+        self.document = parse_bookmarks(NESTED)
+
+    def test_link_after_closed_subfolder_stays_in_parent(self):
+        self.assertEqual(outline(self.document.root), [
+            ('文库学术', [
+                ('子文件夹之前', 'https://before.example.com/'),
+                ('论文', [('论文链接', 'https://paper.example.com/')]),
+                ('————————————', 'https://separator.example.com/'),
+            ]),
+            ('工具', [('工具链接', 'https://tool.example.com/')]),
+        ])
+
+    def test_walk_with_parent(self):
+        pairs = [(parent.title, node.title) for parent, node in self.document.walk_with_parent()]
+        self.assertEqual(pairs, [(None, '文库学术'), ('文库学术', '子文件夹之前'), ('文库学术', '论文'),
+                                 ('论文', '论文链接'), ('文库学术', '————————————'),
+                                 (None, '工具'), ('工具', '工具链接')])
+
+    def test_md_and_top_use_enclosing_folder(self):
+        for module in (bookmark_md, bookmark_top):
+            links = {cat['title']: [link.title for link in cat['links']]
+                     for cat in module.build_categories(self.document)}
+            self.assertEqual(links, {'文库学术': ['子文件夹之前', '————————————'], '论文': ['论文链接'],
+                                     '工具': ['工具链接']}, module.__name__)
+
+    def test_loose_links_and_skipped_folders(self):
+        document = parse_bookmarks("""<DL><p>
+            <DT><A HREF="https://first.example.com/">最前面</A>
+            <DT><H3>书签栏</H3>
+            <DL><p>
+                <DT><H3>工具</H3>
+                <DL><p><DT><A HREF="https://tool.example.com/">工具链接</A></DL><p>
+                <DT><A HREF="https://toolbar.example.com/">书签栏链接</A>
+            </DL><p>
+        </DL><p>""")
+        for module in (bookmark_md, bookmark_top):
+            categories = list(module.build_categories(document))
+            self.assertEqual([cat['title'] for cat in categories], [UNCATEGORIZED_TITLE, '工具'], module.__name__)
+            self.assertEqual([link.title for link in categories[0]['links']], ['最前面', '书签栏链接'])
+
+    def test_duplicate_folder_links_join_first_category(self):
+        document = parse_bookmarks("""<DL><p>
+            <DT><H3>工具</H3><DL><p><DT><A HREF="https://a.example.com/">甲</A></DL><p>
+            <DT><H3>其他</H3><DL><p><DT><A HREF="https://b.example.com/">乙</A></DL><p>
+            <DT><H3>工具</H3><DL><p><DT><A HREF="https://c.example.com/">丙</A></DL><p>
+        </DL><p>""")
+        for module in (bookmark_md, bookmark_top):
+            links = {cat['title']: [link.title for link in cat['links']] for cat in module.build_categories(document)}
+            self.assertEqual(links, {'工具': ['甲', '丙'], '其他': ['乙']}, module.__name__)
+
+
+# 覆盖标题、属性、字符引用、空文件夹与多层嵌套的样例，用于比较整块解析与分块解析
+SAMPLE = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">
+<TITLE>我的 &amp; 书签</TITLE>
+<H1>Bookmarks</H1>
+<DL><p>
+    <DT><H3 ADD_DATE="1700000000" PERSONAL_TOOLBAR_FOLDER="true">书签栏</H3>
+    <DL><p>
+        <DT><A HREF="https://a.example.com/?x=1&amp;y=2" ADD_DATE="1700000001" ICON="data:image/png;base64,AAAA">甲 &lt;一&gt;</A>
+        <DT><H3>第一层</H3>
+        <DL><p>
+            <DT><H3>第二层</H3>
+            <DL><p>
+                <DT><A HREF="https://deep.example.com/">深处</A>
+            </DL><p>
+            <DT><H3>空文件夹</H3>
+            <DL><p>
+            </DL><p>
+        </DL><p>
+        <DT><A HREF="https://b.example.com/">  乙  </A>
+    </DL><p>
+</DL><p>
+"""
+
+
+class ParserTest(unittest.TestCase):
+    def test_nested_folders_and_depth(self):
+        document = parse_bookmarks(SAMPLE)
+        self.assertEqual(outline(document.root), [
+            ('书签栏', [
+                ('甲 <一>', 'https://a.example.com/?x=1&y=2'),
+                ('第一层', [('第二层', [('深处', 'https://deep.example.com/')]), ('空文件夹', [])]),
+                ('乙', 'https://b.example.com/'),
+            ]),
+        ])
+        depths = {node.title: node.depth for node in document.walk() if isinstance(node, Folder)}
+        self.assertEqual(depths, {'书签栏': 0, '第一层': 1, '第二层': 2, '空文件夹': 2})
+        toolbar = document.root.children[0]
+        self.assertIs(toolbar.children[1].parent, toolbar)
+
+    def test_title(self):
+        self.assertEqual(parse_bookmarks(SAMPLE).title, '我的 & 书签')
+        # 只取第一个 TITLE；没有 TITLE 时为 None，由各转换器使用默认标题
+        self.assertEqual(parse_bookmarks('<TITLE>一</TITLE><TITLE>二</TITLE>').title, '一')
+        self.assertIsNone(parse_bookmarks('<DL><p><DT><A HREF="https://a/">a</A></DL>').title)
+
+    def test_link_attrs_exclude_href(self):
+        document = parse_bookmarks(SAMPLE)
+        first, *_, last = [node for node in document.walk() if not isinstance(node, Folder)]
+        self.assertEqual(dict(first.attrs), {'add_date': '1700000001', 'icon': 'data:image/png;base64,AAAA'})
+        self.assertEqual(dict(last.attrs), {})
+        with self.assertRaises(TypeError):
+            last.attrs['x'] = '1'  # 没有其余属性的链接共用只读的空映射
+        # 没有 HREF 的链接网址为空字符串，由各转换器跳过
+        link = parse_bookmarks('<DL><p><DT><A ADD_DATE="1">无网址</A></DL>').root.children[0]
+        self.assertEqual((link.href, dict(link.attrs)), ('', {'add_date': '1'}))
+
+    def test_missing_closing_dl(self):
+        # 文件被截断、缺少 </DL> 时已读到的内容照常保留
+        document = parse_bookmarks("""<DL><p>
+            <DT><H3>甲</H3>
+            <DL><p>
+                <DT><A HREF="https://a.example.com/">甲链接</A>
+                <DT><H3>乙</H3>
+                <DL><p>
+                    <DT><A HREF="https://b.example.com/">乙链接</A>""")
+        self.assertEqual(outline(document.root),
+                         [('甲', [('甲链接', 'https://a.example.com/'), ('乙', [('乙链接', 'https://b.example.com/')])])])
+        # 多余的 </DL> 不会弹出根文件夹
+        document = parse_bookmarks('<DL><p></DL></DL><DT><A HREF="https://c.example.com/">丙</A>')
+        self.assertEqual(outline(document.root), [('丙', 'https://c.example.com/')])
+
+    def test_chunked_feed_matches_single_feed(self):
+        expected = outline(parse_bookmarks(SAMPLE).root)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'b.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(SAMPLE)
+            for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+                document = parse_bookmark_file(path, chunk_size)
+                self.assertEqual(outline(document.root), expected, chunk_size)
+                self.assertEqual(document.title, '我的 & 书签', chunk_size)
+
+    def test_sniffs_json_files(self):
+        chrome = {'roots': {'bookmark_bar': {'type': 'folder', 'name': '书签栏', 'children': [
+            {'type': 'url', 'name': '甲', 'url': 'https://a.example.com/'}]}}, 'version': 1}
+        with tempfile.TemporaryDirectory() as directory:
+            # 文件名不能说明格式，按内容开头判断；允许 BOM 与前导空白
+            path = os.path.join(directory, 'Bookmarks')
+            with open(path, 'w', encoding='utf-8-sig') as f:
+                f.write('\n  ' + json.dumps(chrome, ensure_ascii=False))
+            self.assertEqual(outline(parse_bookmark_file(path).root),
+                             [('书签栏', [('甲', 'https://a.example.com/')])])
+
+            path = os.path.join(directory, 'backup.jsonlz4')
+            with open(path, 'wb') as f:
+                f.write(b'mozLz40\0' + b'\0' * 16)
+            try:
+                import lz4.block  # noqa: F401
+            except ImportError:
+                with self.assertRaisesRegex(ValueError, 'lz4'):
+                    parse_bookmark_file(path)
+
+
+class CategoryRegistryTest(unittest.TestCase):
+    def test_first_added_wins(self):
+        categories = CategoryRegistry()
+        first = categories.add('甲', '甲', 'h2', 'a')
+        self.assertIsNone(categories.add('甲', '甲（重复）', 'h2', 'b'))
+        second = categories.add(('乙',), '乙', 'h3', 'b')
+        self.assertIs(categories.get('甲'), first)
+        self.assertIn(('乙',), categories)
+        self.assertNotIn('丙', categories)
+        self.assertEqual(len(categories), 2)
+        self.assertEqual(list(categories), [first, second])
+        self.assertEqual(first, {'title': '甲', 'unique_id': '甲', 'tag_type': 'h2', 'links': [], 'anchor': 'a'})
+
+
+if __name__ == '__main__':
+    unittest.main()
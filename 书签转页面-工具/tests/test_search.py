@@ -0,0 +1,97 @@
+"""bookmark_search：分词与倒排索引编码需与 _tree.html 中 queryTerms/lookup 的解码方式一致"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookmark_parser import Link  # noqa: E402
+from bookmark_search import _base36, build_search_index, tokenize, url_host  # noqa: E402
+
+
+def decode_index(index):
+    """按页面脚本的方式解码：空格分隔的词与倒排表，36进制差分还原为文档编号"""
+    keys = index['keys'].split(' ')
+    postings = {}
+    for key, encoded in zip(keys, index['postings'].split(' ')):
+        doc = 0
+        docs = []
+        for delta in encoded.split(','):
+            doc += int(delta, 36)
+            docs.append(doc)
+        postings[key] = docs
+    return keys, postings
+
+
+class TokenizeTest(unittest.TestCase):
+    def test_mixed_cjk_and_latin(self):
+        self.assertEqual(tokenize('Python入门教程'), {'python', '入门', '门教', '教程', '程'})
+
+    def test_nfkc_and_case(self):
+        # 全角字母数字与连字都归一化为半角小写
+        self.assertEqual(tokenize('ＡＢＣ１２３ ﬁle'), {'abc123', 'file'})
+
+    def test_kana_and_hangul_are_bigrams(self):
+        self.assertEqual(tokenize('テスト'), {'テス', 'スト', 'ト'})
+        self.assertEqual(tokenize('한국어'), {'한국', '국어', '어'})
+
+    def test_single_cjk_character(self):
+        self.assertEqual(tokenize('书'), {'书'})
+
+    def test_punctuation_and_underscore_split_words(self):
+        self.assertEqual(tokenize('a_b, c-d！'), {'a', 'b', 'c', 'd'})
+        self.assertEqual(tokenize(''), set())
+
+    def test_url_host(self):
+        self.assertEqual(url_host('https://www.example.com/path'), 'example.com')
+        self.assertEqual(url_host('https://[bad'), '')
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        filler = [Link(f'item {number}', f'https://n{number}.example/') for number in range(40)]
+        self.categories = [
+            {'title': '学习资料', 'links': [Link('Python入门教程', 'https://www.python.org/'),
+                                        Link('ＧｉｔＨｕｂ', 'https://github.com/')]},
+            {'title': 'Tools', 'links': filler + [Link('𠀀 﨎', 'https://rare.example/')]},
+        ]
+        self.index = build_search_index(self.categories)
+        self.keys, self.postings = decode_index(self.index)
+
+    def test_postings_round_trip(self):
+        expected = {}
+        doc = 0
+        for cat in self.categories:
+            for link in cat['links']:
+                for token in tokenize(link.title) | tokenize(url_host(link.href).replace('.', ' ')):
+                    expected.setdefault(token, []).append(doc)
+                doc += 1
+        for number, cat in enumerate(self.categories):
+            for token in tokenize(cat['title']):
+                expected.setdefault(token, []).append(doc + number)
+        self.assertEqual(self.postings, expected)
+        self.assertEqual(self.index['counts'], [2, 41])
+
+    def test_documents_are_numbered_links_then_categories(self):
+        self.assertEqual(self.postings['python'], [0])
+        self.assertEqual(self.postings['github'], [1])
+        self.assertEqual(self.postings['学习'], [43])
+        self.assertEqual(self.postings['tools'], [44])
+        self.assertEqual(self.postings['example'], list(range(2, 43)))
+
+    def test_keys_use_utf16_order(self):
+        # 浏览器按 UTF-16 码元比较字符串，增补平面字符（代理对 D800-DFFF）排在 U+E000 之后的字符之前
+        self.assertEqual(self.keys, sorted(self.keys, key=lambda key: key.encode('utf-16-be')))
+        self.assertLess(self.keys.index('𠀀'), self.keys.index('﨎'))  # 按码位排序时 U+FA0E 在 U+20000 之前
+        self.assertNotEqual(self.keys, sorted(self.keys))
+
+    def test_base36_deltas(self):
+        self.assertEqual([_base36(value) for value in (0, 9, 10, 35, 36, 1295, 1296)],
+                         ['0', '9', 'a', 'z', '10', 'zz', '100'])
+        # 40 个连续链接的差分都是 1，首项为起始编号
+        encoded = self.index['postings'].split(' ')[self.keys.index('example')]
+        self.assertEqual(encoded, ','.join(['2'] + ['1'] * 40))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""bookmark_service：请求解析的错误处理、结果缓存淘汰、并发相同请求合并与完整的转换往返"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bookmark_service  # noqa: E402
+from bookmark_service import MAX_HEADER_LINES, ConversionService, ResultCache  # noqa: E402
+
+BOOKMARKS = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<TITLE>测试书签</TITLE>
+<DL><p>
+    <DT><H3>工具</H3>
+    <DL><p>
+        <DT><A HREF="https://tool.example.com/">工具链接</A>
+    </DL><p>
+</DL><p>
+""".encode('utf-8')
+
+
+class ContentLengthTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.service = ConversionService(1024 * 1024, workers=1, max_upload=1024)
+
+    def tearDown(self):
+        self.service.close()
+
+    async def dispatch(self, content_length):
+        reader = asyncio.StreamReader()
+        reader.feed_data(f"POST /convert?format=md HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n".encode())
+        reader.feed_eof()
+        return await self.service._dispatch(reader)
+
+    async def test_invalid_length_is_rejected(self):
+        for value in ('abc', '-1', '-100'):
+            status, body, _, _ = await self.dispatch(value)
+            self.assertEqual(status, 400, value)
+            self.assertIn('Content-Length', body.decode('utf-8'))
+
+    async def test_length_over_limit_is_rejected(self):
+        status, _, _, _ = await self.dispatch(4096)
+        self.assertEqual(status, 413)
+
+
+class RequestLimitTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = ConversionService(1024 * 1024, workers=1)
+        self.server = await asyncio.start_server(self.service.handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.service.close()
+
+    async def request(self, head, body=b''):
+        """发送原始请求，返回 (状态码, 响应头文本, 响应体)"""
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(head + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        return int(head.split()[1]), head.decode('latin-1'), body
+
+    async def test_long_request_line(self):
+        status, _, _ = await self.request(b'GET /' + b'a' * 70000 + b' HTTP/1.1\r\n\r\n')
+        self.assertEqual(status, 400)
+
+    async def test_long_header_line(self):
+        status, _, _ = await self.request(b'GET /health HTTP/1.1\r\nX-Padding: ' + b'a' * 70000 + b'\r\n\r\n')
+        self.assertEqual(status, 431)
+
+    async def test_too_many_header_lines(self):
+        headers = b''.join(b'X-Header: 1\r\n' for _ in range(MAX_HEADER_LINES + 1))
+        status, _, _ = await self.request(b'GET /health HTTP/1.1\r\n' + headers + b'\r\n')
+        self.assertEqual(status, 431)
+        headers = b''.join(b'X-Header: 1\r\n' for _ in range(MAX_HEADER_LINES))
+        status, _, body = await self.request(b'GET /health HTTP/1.1\r\n' + headers + b'\r\n')
+        self.assertEqual((status, body), (200, b'ok'))
+
+    async def test_convert_round_trip(self):
+        head = f"POST /convert?format=md HTTP/1.1\r\nContent-Length: {len(BOOKMARKS)}\r\n\r\n".encode()
+        status, headers, body = await self.request(head, BOOKMARKS)
+        self.assertEqual(status, 200)
+        self.assertIn('X-Cache: MISS', headers)
+        text = body.decode('utf-8')
+        self.assertTrue(text.startswith('# 测试书签\n'))
+        self.assertIn('- [工具链接](https://tool.example.com/)', text)
+        # 相同内容再次提交时直接返回缓存
+        status, headers, cached = await self.request(head, BOOKMARKS)
+        self.assertEqual((status, cached), (200, body))
+        self.assertIn('X-Cache: HIT', headers)
+
+
+class ResultCacheTest(unittest.TestCase):
+    def test_evicts_least_recently_used_by_size(self):
+        cache = ResultCache(10)
+        cache.put('a', b'1234')
+        cache.put('b', b'1234')
+        self.assertEqual(cache.get('a'), b'1234')  # a 变为最近使用
+        cache.put('c', b'1234')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'1234')
+        self.assertEqual(cache.get('c'), b'1234')
+        self.assertEqual(cache.size, 8)
+
+    def test_oversized_and_replaced_values(self):
+        cache = ResultCache(10)
+        cache.put('big', b'x' * 11)
+        self.assertIsNone(cache.get('big'))
+        cache.put('a', b'12')
+        cache.put('a', b'123456')
+        self.assertEqual((cache.size, cache.get('a')), (6, b'123456'))
+        self.assertEqual(cache.stats(), {'entries': 1, 'bytes': 6, 'max_bytes': 10, 'hits': 1, 'misses': 1})
+
+
+class CoalescingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_identical_requests_convert_once(self):
+        calls = []
+        lock = threading.Lock()
+
+        def slow_convert(data, fmt, options):
+            with lock:
+                calls.append((data, fmt))
+            time.sleep(0.1)
+            return data.upper()
+
+        service = ConversionService(1024)
+        service.executor.shutdown()
+        service.executor = ThreadPoolExecutor(4)
+        try:
+            with mock.patch.object(bookmark_service, 'convert', slow_convert):
+                results = await asyncio.gather(*(service.convert(b'abc', 'md', {}) for _ in range(3)),
+                                               service.convert(b'xyz', 'md', {}))
+        finally:
+            service.close()
+        self.assertEqual(sorted(calls), [(b'abc', 'md'), (b'xyz', 'md')])
+        self.assertEqual([body for body, _ in results], [b'ABC', b'ABC', b'ABC', b'XYZ'])
+        self.assertEqual([hit for _, hit in results], [False, True, True, False])
+        self.assertEqual(service._inflight, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""bookmark_sqlite：写入、重新写入（FTS 外部内容的 delete 命令）与长短词混合搜索"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookmark_parser import parse_bookmarks  # noqa: E402
+from bookmark_sqlite import connect, index_document, search  # noqa: E402
+
+TOOLS = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<DL><p>
+    <DT><H3>书签栏</H3>
+    <DL><p>
+        <DT><H3>在线工具</H3>
+        <DL><p>
+            <DT><A HREF="https://regex.example.com/" ADD_DATE="1700000000">正则表达式测试</A>
+            <DT><A HREF="https://json.example.com/">JSON 格式化</A>
+        </DL><p>
+        <DT><A HREF="https://pdf.example.com/">PDF 转换</A>
+    </DL><p>
+</DL><p>
+"""
+
+TOOLS_UPDATED = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<DL><p>
+    <DT><H3>在线工具</H3>
+    <DL><p>
+        <DT><A HREF="https://json.example.com/">JSON 格式化与校验</A>
+        <DT><A HREF="https://diff.example.com/">文本对比</A>
+    </DL><p>
+</DL><p>
+"""
+
+OTHER = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<DL><p>
+    <DT><A HREF="https://json.example.org/">JSON 教程</A>
+</DL><p>
+"""
+
+
+class SqliteTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = connect(':memory:')
+        index_document(self.conn, '/data/工具_100%.html', parse_bookmarks(TOOLS))
+        index_document(self.conn, '/data/学习.html', parse_bookmarks(OTHER))
+
+    def tearDown(self):
+        self.conn.close()
+
+    def titles(self, query, **kwargs):
+        return sorted(title for title, _, _, _ in search(self.conn, query, **kwargs))
+
+    def test_long_and_short_terms(self):
+        self.assertEqual(self.titles('json'), ['JSON 教程', 'JSON 格式化'])
+        # 两个汉字短于 trigram，走 LIKE；与长词同时出现时两种条件都要满足
+        self.assertEqual(self.titles('格式'), ['JSON 格式化'])
+        self.assertEqual(self.titles('json 教程'), ['JSON 教程'])
+        self.assertEqual(self.titles('正则表达式'), ['正则表达式测试'])
+        self.assertEqual(self.titles(''), [])
+
+    def test_folder_path_is_searchable(self):
+        # 浏览器顶层文件夹（书签栏）不计入路径
+        hits = search(self.conn, '在线工具')
+        self.assertEqual({folder for _, _, _, folder in hits}, {'在线工具'})
+        self.assertEqual(self.titles('在线'), ['JSON 格式化', '正则表达式测试'])
+
+    def test_reindex_replaces_fts_rows(self):
+        count = index_document(self.conn, '/data/工具_100%.html', parse_bookmarks(TOOLS_UPDATED))
+        self.assertEqual(count, 2)
+        self.assertEqual(self.titles('正则表达式'), [])
+        self.assertEqual(self.titles('pdf'), [])
+        self.assertEqual(self.titles('校验'), ['JSON 格式化与校验'])
+        self.assertEqual(self.titles('json'), ['JSON 教程', 'JSON 格式化与校验'])
+        self.assertEqual(self.titles('文本对比'), ['文本对比'])
+        # 外部内容表的索引与链接表一致（integrity-check 在不一致时抛出异常）
+        self.conn.execute("INSERT INTO links_fts(links_fts, rank) VALUES ('integrity-check', 1)")
+        self.assertEqual(self.conn.execute('SELECT count(*) FROM collections').fetchone()[0], 2)
+
+    def test_collection_filter_is_literal(self):
+        self.assertEqual(self.titles('json', collection='工具'), ['JSON 格式化'])
+        self.assertEqual(self.titles('json', collection='100%'), ['JSON 格式化'])
+        # % 与 _ 按字面匹配，不作为通配符
+        self.assertEqual(self.titles('json', collection='%'), ['JSON 格式化'])
+        self.assertEqual(self.titles('json', collection='_'), ['JSON 格式化'])
+        self.assertEqual(self.titles('json', collection='工_'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""bookmark_stats：--stats-hook 回调的导入、注册与调用，写法或模块有误时给出错误信息而不是异常堆栈"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bookmark_stats  # noqa: E402
+from bookmark_batch import main  # noqa: E402
+from bookmark_stats import emit, load_hook  # noqa: E402
+
+HOOK_MODULE = """
+calls = []
+NOT_CALLABLE = 1
+
+
+def collect(input_file, record):
+    calls.append((input_file, record))
+"""
+
+
+class LoadHookTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        with open(os.path.join(self.directory, 'stats_hook_sample.py'), 'w', encoding='utf-8') as f:
+            f.write(HOOK_MODULE)
+        with open(os.path.join(self.directory, 'stats_hook_broken.py'), 'w', encoding='utf-8') as f:
+            f.write("raise RuntimeError('broken on import')\n")
+        sys.path.insert(0, self.directory)
+        # 每个测试使用独立的回调列表，不影响其他测试
+        self._hooks = mock.patch.object(bookmark_stats, '_hooks', [])
+        self._hooks.start()
+
+    def tearDown(self):
+        self._hooks.stop()
+        sys.path.remove(self.directory)
+        for name in ('stats_hook_sample', 'stats_hook_broken'):
+            sys.modules.pop(name, None)
+        self._tmp.cleanup()
+
+    def test_hook_is_registered_and_called(self):
+        hook = load_hook('stats_hook_sample:collect')
+        emit('a.html', {'stages': {}})
+        self.assertEqual(sys.modules['stats_hook_sample'].calls, [('a.html', {'stages': {}})])
+        self.assertEqual(bookmark_stats._hooks, [hook])
+
+    def test_bad_specs_raise_value_error(self):
+        cases = {
+            'stats_hook_sample': '模块:函数',
+            ':collect': '模块:函数',
+            'stats_hook_missing:collect': '无法导入',
+            'stats_hook_broken:collect': 'broken on import',
+            'stats_hook_sample:missing': '没有可调用的 missing',
+            'stats_hook_sample:NOT_CALLABLE': '没有可调用的 NOT_CALLABLE',
+        }
+        for spec, message in cases.items():
+            with self.assertRaises(ValueError, msg=spec) as context:
+                load_hook(spec)
+            self.assertIn(message, str(context.exception), spec)
+        self.assertEqual(bookmark_stats._hooks, [])
+
+    def test_batch_reports_bad_hook(self):
+        source = os.path.join(self.directory, 'b.html')
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write('<!DOCTYPE NETSCAPE-Bookmark-file-1>\n<DL><p>\n</DL><p>\n')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), self.assertRaises(SystemExit) as context:
+            main([source, '--stats-hook', 'stats_hook_missing:collect'])
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn('错误：无法导入回调模块 stats_hook_missing', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""bookmark_top：分页输出时每个分页的目录都列出全部分类，其他页的分类链接到所在分页"""
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookmark_parser import parse_bookmarks  # noqa: E402
+from bookmark_top import iter_top_pages  # noqa: E402
+
+BOOKMARKS = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks</H1>
+<DL><p>
+    <DT><H3>甲</H3>
+    <DL><p>
+        <DT><A HREF="https://a.example.com/">甲链接</A>
+        <DT><H3>甲子</H3>
+        <DL><p>
+            <DT><A HREF="https://a1.example.com/">甲子链接</A>
+        </DL><p>
+    </DL><p>
+    <DT><H3>乙</H3>
+    <DL><p>
+        <DT><A HREF="https://b.example.com/">乙链接</A>
+    </DL><p>
+    <DT><H3>丙</H3>
+    <DL><p>
+        <DT><A HREF="https://c.example.com/">丙链接</A>
+    </DL><p>
+</DL><p>
+"""
+
+
+class PagedTocTest(unittest.TestCase):
+    def test_every_page_lists_all_categories(self):
+        # --pages 0：每个顶层分类一页，子分类跟随所属的顶层分类
+        pages = [(os.path.basename(path), ''.join(chunks))
+                 for path, chunks in iter_top_pages(parse_bookmarks(BOOKMARKS), 'b_top.html', 0)]
+        self.assertEqual([name for name, _ in pages], ['b_top.html', 'b_top.1.html', 'b_top.2.html', 'b_top.3.html'])
+        # 分类标题 -> (锚点, 所在分页)；子分类的锚点带上父分类标题
+        expected = {'甲': ('甲', 'b_top.1.html'), '甲子': ('甲甲子', 'b_top.1.html'),
+                    '乙': ('乙', 'b_top.2.html'), '丙': ('丙', 'b_top.3.html')}
+        for name, html in pages:
+            toc = html.split('<div class="toc-content">', 1)[1].split('</div>', 1)[0]
+            hrefs = dict((title, href) for href, title in re.findall(r'<a href="([^"]*)"[^>]*>([^<]*)</a>', toc))
+            self.assertEqual(list(hrefs), list(expected), name)
+            for title, (anchor, page) in expected.items():
+                target = f'#{anchor}' if page == name else f'{page}#{anchor}'
+                self.assertEqual(hrefs[title], target, name)
+                # 本页的分类在正文中有对应锚点
+                self.assertEqual(f'id="{anchor}"' in html, page == name, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
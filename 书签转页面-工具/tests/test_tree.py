@@ -0,0 +1,87 @@
+"""bookmark_tree：不在任何文件夹中的链接（书签栏顶层、文档根部）不能丢失"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookmark_md import render_markdown  # noqa: E402
+from bookmark_parser import parse_bookmarks  # noqa: E402
+from bookmark_top import render_top_html  # noqa: E402
+from bookmark_tree import UNCATEGORIZED_TITLE, build_categories, iter_tree_pages, render_tree_html  # noqa: E402
+
+BOOKMARKS = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks</H1>
+<DL><p>
+    <DT><H3 PERSONAL_TOOLBAR_FOLDER="true">书签栏</H3>
+    <DL><p>
+        <DT><A HREF="https://toolbar.example.com/">书签栏链接</A>
+        <DT><H3>工具</H3>
+        <DL><p>
+            <DT><A HREF="https://tool.example.com/">工具链接</A>
+        </DL><p>
+        <DT><A HREF="https://toolbar-after.example.com/">书签栏后面的链接</A>
+    </DL><p>
+    <DT><A HREF="https://root.example.com/">根部链接</A>
+    <DT><H3>未分类</H3>
+    <DL><p>
+        <DT><A HREF="https://folder.example.com/">同名文件夹中的链接</A>
+    </DL><p>
+</DL><p>
+"""
+
+LOOSE_LINKS = ['https://toolbar.example.com/', 'https://toolbar-after.example.com/', 'https://root.example.com/']
+
+
+class UncategorizedLinksTest(unittest.TestCase):
+    def setUp(self):
+        self.document = parse_bookmarks(BOOKMARKS)
+
+    def test_loose_links_go_to_synthetic_category(self):
+        categories = list(build_categories(self.document))
+        loose = [cat for cat in categories if cat['unique_id'] == ()]
+        self.assertEqual(len(loose), 1)
+        self.assertEqual(loose[0]['title'], UNCATEGORIZED_TITLE)
+        self.assertEqual(loose[0]['depth'], 0)
+        self.assertEqual(loose[0]['parent'], -1)
+        self.assertEqual([link.href for link in loose[0]['links']], LOOSE_LINKS)
+        # 建在第一个这样的链接处，排在其后出现的文件夹之前
+        self.assertIs(categories[0], loose[0])
+
+    def test_folder_with_same_title_stays_separate(self):
+        categories = list(build_categories(self.document))
+        folder = [cat for cat in categories if cat['unique_id'] == (UNCATEGORIZED_TITLE,)]
+        self.assertEqual(len(folder), 1)
+        self.assertEqual([(link.title, link.href) for link in folder[0]['links']],
+                         [('同名文件夹中的链接', 'https://folder.example.com/')])
+        anchors = [cat['anchor'] for cat in categories]
+        self.assertEqual(len(anchors), len(set(anchors)))
+
+    def test_tree_page_and_search_index_contain_loose_links(self):
+        for options in ({}, {'lazy': True}):
+            page = render_tree_html(self.document, **options)
+            search_index = json.loads(page.split('id="search-index">', 1)[1].split('</script>', 1)[0])
+            for href in LOOSE_LINKS:
+                self.assertIn(href, page)
+            # 索引按分类记录链接数：未分类在前，其后为“工具”与同名文件夹
+            self.assertEqual(search_index['counts'], [3, 1, 1])
+            self.assertIn('root', search_index['keys'].split())
+            self.assertIn('toolbar', search_index['keys'].split())
+
+    def test_paged_output_contains_loose_links(self):
+        chunks = ''.join(''.join(content) for _, content in iter_tree_pages(self.document, 'out_tree.html'))
+        for href in LOOSE_LINKS:
+            self.assertIn(f'href="{href}"', chunks)
+
+    def test_other_formats_still_contain_loose_links(self):
+        # 与 md、top 一致：书签栏中夹在文件夹之后的链接不会丢失
+        for text in (render_markdown(self.document), render_top_html(self.document)):
+            self.assertIn('https://toolbar-after.example.com/', text)
+            self.assertIn('https://root.example.com/', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""bookmark_watch：inotify 与轮询两种监视方式报告变化的书签文件，防抖把连续写入合并为一次通知"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bookmark_watch  # noqa: E402
+from bookmark_watch import InotifyWatcher, PollingWatcher, create_watcher, wait_for_changes  # noqa: E402
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+class WatcherTestMixin:
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        self.bookmarks = os.path.join(self.directory, 'b.html')
+        write(self.bookmarks, 'old')
+        self.watcher = self.create()
+        self.watcher.add(self.directory)
+
+    def tearDown(self):
+        self.watcher.close()
+        self._tmp.cleanup()
+
+    def test_no_change_times_out(self):
+        self.assertEqual(self.watcher.read(0.05), set())
+
+    def test_modified_file_is_reported(self):
+        write(self.bookmarks, 'new content')
+        self.assertIn(self.bookmarks, self.watcher.read(2))
+
+    def test_renamed_into_place_is_reported(self):
+        # 编辑器常先写临时文件再改名
+        temporary = os.path.join(self.directory, 'b.html.tmp')
+        write(temporary, 'new content')
+        self.watcher.read(0.05)
+        os.replace(temporary, self.bookmarks)
+        self.assertIn(self.bookmarks, self.watcher.read(2))
+
+    def test_adding_directory_twice_is_harmless(self):
+        self.watcher.add(self.directory)
+        write(self.bookmarks, 'new content')
+        self.assertIn(self.bookmarks, self.watcher.read(2))
+
+
+class PollingWatcherTest(WatcherTestMixin, unittest.TestCase):
+    def create(self):
+        return PollingWatcher(interval=0.01)
+
+    def test_non_bookmark_files_are_ignored(self):
+        write(os.path.join(self.directory, 'notes.txt'), 'text')
+        write(os.path.join(self.directory, 'b.md'), 'text')
+        self.assertEqual(self.watcher.read(0.05), set())
+
+    def test_new_file_is_reported(self):
+        path = os.path.join(self.directory, 'Bookmarks')
+        write(path, '{}')
+        self.assertEqual(self.watcher.read(2), {path})
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), "inotify 仅在 Linux 上可用")
+class InotifyWatcherTest(WatcherTestMixin, unittest.TestCase):
+    def create(self):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            self.skipTest(f"inotify 不可用：{e}")
+
+
+class CreateWatcherTest(unittest.TestCase):
+    def test_poll_forces_polling(self):
+        watcher = create_watcher(poll=True, interval=0.3)
+        self.assertIsInstance(watcher, PollingWatcher)
+        self.assertEqual(watcher.interval, 0.3)
+
+    def test_falls_back_to_polling_without_inotify(self):
+        with mock.patch.object(bookmark_watch.sys, 'platform', 'darwin'):
+            self.assertIsInstance(create_watcher(), PollingWatcher)
+
+
+class WaitForChangesTest(unittest.TestCase):
+    class FakeWatcher:
+        """按顺序返回预设的变化集合，记录每次 read 的超时参数"""
+
+        def __init__(self, batches):
+            self.batches = list(batches)
+            self.timeouts = []
+
+        def read(self, timeout=None):
+            self.timeouts.append(timeout)
+            return self.batches.pop(0) if self.batches else set()
+
+    def test_bursts_are_merged(self):
+        watcher = self.FakeWatcher([{'a'}, {'b'}, {'a', 'c'}])
+        self.assertEqual(wait_for_changes(watcher, debounce=0.1), {'a', 'b', 'c'})
+        # 第一次一直等待，之后每次最多等待 debounce 秒，直到一段安静期
+        self.assertEqual(watcher.timeouts, [None, 0.1, 0.1, 0.1])
+
+    def test_single_change(self):
+        watcher = self.FakeWatcher([{'a'}])
+        self.assertEqual(wait_for_changes(watcher, debounce=0.2), {'a'})
+        self.assertEqual(watcher.timeouts, [None, 0.2])
+
+
+if __name__ == '__main__':
+    unittest.main()